@@ -10,7 +10,8 @@ def load_commands(package_name='dfode_kit.cli_tools.commands'):
         module = importlib.import_module(module_name)
         
         # Check if the module has the required functions
+        # Module bench_infer provides the command bench-infer
         if hasattr(module, 'add_command_parser') and hasattr(module, 'handle_command'):
-            commands[module_name.split('.')[-1]] = module
+            commands[module_name.split('.')[-1].replace('_', '-')] = module
 
     return commands
\ No newline at end of file
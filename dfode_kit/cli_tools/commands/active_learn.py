@@ -0,0 +1,117 @@
+from dfode_kit.dfode_core.train.active import active_learning
+
+def add_command_parser(subparsers):
+    active_parser = subparsers.add_parser('active-learn', help='Label and train only where an ensemble of models disagrees.')
+    active_parser.add_argument(
+        '--mech',
+        required=True,
+        type=str,
+        help='Path to the YAML mechanism file.'
+    )
+    active_parser.add_argument(
+        '--pool',
+        required=True,
+        type=str,
+        help='NUMPY file of unlabeled [T, p, Y...] states.'
+    )
+    active_parser.add_argument(
+        '--output_dir',
+        required=True,
+        type=str,
+        help='Directory for the labeled set, checkpoints and active_learning.json.'
+    )
+    active_parser.add_argument(
+        '--time_step',
+        type=float,
+        default=1e-6,
+        help='Time step of the CVODE labels.'
+    )
+    active_parser.add_argument(
+        '--members',
+        type=int,
+        default=3,
+        help='Number of networks in the ensemble.'
+    )
+    active_parser.add_argument(
+        '--initial_size',
+        type=int,
+        default=1000,
+        help='Randomly drawn states labeled before the first round.'
+    )
+    active_parser.add_argument(
+        '--query_size',
+        type=int,
+        default=1000,
+        help='Most uncertain states labeled per round.'
+    )
+    active_parser.add_argument(
+        '--rounds',
+        type=int,
+        default=5,
+        help='Maximum number of query rounds.'
+    )
+    active_parser.add_argument(
+        '--initial_epochs',
+        type=int,
+        default=100,
+        help='Epochs of the initial training.'
+    )
+    active_parser.add_argument(
+        '--round_epochs',
+        type=int,
+        default=20,
+        help='Epochs of the warm-started retraining in each round.'
+    )
+    active_parser.add_argument(
+        '--test_file',
+        type=str,
+        default=None,
+        help='Labeled NUMPY file for the a-priori error of each round.'
+    )
+    active_parser.add_argument(
+        '--target_error',
+        type=float,
+        default=None,
+        help='Stop once the test RMSE reaches this value.'
+    )
+    active_parser.add_argument(
+        '--layers',
+        type=int,
+        nargs='+',
+        default=[400, 400, 400, 400],
+        help='Widths of the hidden layers.'
+    )
+    active_parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=4096,
+        help='Number of samples per optimizer step.'
+    )
+    active_parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed of the initial draw and the ensemble members.'
+    )
+
+def handle_command(args):
+    print("Handling active-learn command")
+
+    history = active_learning(
+        args.mech,
+        args.pool,
+        args.output_dir,
+        time_step=args.time_step,
+        n_members=args.members,
+        initial_size=args.initial_size,
+        query_size=args.query_size,
+        n_rounds=args.rounds,
+        initial_epochs=args.initial_epochs,
+        round_epochs=args.round_epochs,
+        test_file=args.test_file,
+        target_error=args.target_error,
+        seed=args.seed,
+        hidden_layers=args.layers,
+        batch_size=args.batch_size,
+    )
+    print(f"Finished after {len(history)} rounds with {history[-1]['n_labeled']} labeled states")
@@ -1,6 +1,7 @@
 import numpy as np
 from dfode_kit.data_operations.augment_data import random_perturb
 from dfode_kit.data_operations.h5_kit import get_TPY_from_h5
+from dfode_kit.utils import STORAGE_DTYPES
 
 def add_command_parser(subparsers):
     augment_parser = subparsers.add_parser('augment', help='Perform data augmentation.')
@@ -48,17 +49,24 @@ def add_command_parser(subparsers):
         default=0.1,
         help='Factor to perturb the data by.'
     )
+    augment_parser.add_argument(
+        '--dtype',
+        type=str,
+        choices=STORAGE_DTYPES,
+        default='float64',
+        help='Storage dtype of the augmented states; perturbation and screening run in float64.'
+    )
 
 def handle_command(args):
     print("Handling augment command")
     
     print(f"Loading data from h5 file: {args.h5_file}")
-    data = get_TPY_from_h5(args.h5_file)
+    data = get_TPY_from_h5(args.h5_file).astype(np.float64)
     print("Data shape:", data.shape)
 
 
     All_data = random_perturb(data, args.mech, args.dataset_num, args.heat_limit, args.element_limit, args.perturb_factor)
 
-    np.save(args.output_file, All_data)
+    np.save(args.output_file, All_data.astype(args.dtype))
     print("Saved augmented data shape:", All_data.shape)
     print(f"Saved augmented data to {args.output_file}")
\ No newline at end of file
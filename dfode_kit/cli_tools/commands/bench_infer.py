@@ -0,0 +1,98 @@
+from dfode_kit.dfode_core.inference.benchmark import benchmark_inference, save_benchmark, DTYPES, MODES
+from dfode_kit.dfode_core.model.build import ARCHITECTURES
+
+def add_command_parser(subparsers):
+    bench_parser = subparsers.add_parser('bench-infer', help='Benchmark inference throughput, latency and memory of a trained network.')
+    bench_parser.add_argument(
+        '--mech',
+        required=True,
+        type=str,
+        help='Path to the YAML mechanism file.'
+    )
+    model_group = bench_parser.add_mutually_exclusive_group(required=True)
+    model_group.add_argument(
+        '--model',
+        type=str,
+        help='Path to a checkpoint produced by the train command.'
+    )
+    model_group.add_argument(
+        '--layers',
+        type=int,
+        nargs='+',
+        help='Hidden layer widths of a randomly initialised network, e.g. 400 400 400 400.'
+    )
+    bench_parser.add_argument(
+        '--architecture',
+        type=str,
+        choices=list(ARCHITECTURES),
+        default='mlp',
+        help='Network type of the randomly initialised network used with --layers.'
+    )
+    bench_parser.add_argument(
+        '--batch_sizes',
+        type=int,
+        nargs='+',
+        default=[1024, 16384, 131072],
+        help='Numbers of cells per inference call.'
+    )
+    bench_parser.add_argument(
+        '--threads',
+        type=int,
+        nargs='+',
+        default=None,
+        help='Intra-op thread counts. Defaults to 1 and all cores.'
+    )
+    bench_parser.add_argument(
+        '--dtypes',
+        type=str,
+        nargs='+',
+        choices=DTYPES,
+        default=list(DTYPES),
+        help='Network dtypes.'
+    )
+    bench_parser.add_argument(
+        '--modes',
+        type=str,
+        nargs='+',
+        choices=MODES,
+        default=list(MODES),
+        help='Execution modes.'
+    )
+    bench_parser.add_argument(
+        '--device',
+        type=str,
+        default='cpu',
+        help='Inference device.'
+    )
+    bench_parser.add_argument(
+        '--n_repeats',
+        type=int,
+        default=50,
+        help='Timed calls per configuration.'
+    )
+    bench_parser.add_argument(
+        '--output',
+        type=str,
+        default='bench_infer.json',
+        help='Path of the JSON results file.'
+    )
+
+def handle_command(args):
+    print("Handling bench-infer command")
+
+    settings = {}
+    if args.threads is not None:
+        settings['threads'] = args.threads
+    report = benchmark_inference(
+        args.mech,
+        model_path=args.model,
+        layers=args.layers,
+        architecture=args.architecture,
+        batch_sizes=args.batch_sizes,
+        dtypes=args.dtypes,
+        modes=args.modes,
+        device=args.device,
+        n_repeats=args.n_repeats,
+        **settings,
+    )
+    save_benchmark(report, args.output)
@@ -0,0 +1,89 @@
+from dfode_kit.dfode_core.inference.export import export_model
+
+def add_command_parser(subparsers):
+    export_parser = subparsers.add_parser('export', help='Export a trained model as a TorchScript reaction-rate module.')
+    export_parser.add_argument(
+        '--mech', 
+        required=True,
+        type=str, 
+        help='Path to the YAML mechanism file.'
+    )
+    export_parser.add_argument(
+        '--model',
+        required=True,
+        type=str,
+        help='Path to the checkpoint produced by the train command.'
+    )
+    export_parser.add_argument(
+        '--output_path',
+        required=True,
+        type=str,
+        help='Path to the exported TorchScript file.'
+    )
+    export_parser.add_argument(
+        '--time',
+        required=True,
+        type=float,
+        help='Inference time step used to compute reaction rates.'
+    )
+    export_parser.add_argument(
+        '--frozen_temperature',
+        type=float,
+        default=0.0,
+        help='Temperature below which reaction rates are set to zero.'
+    )
+    export_parser.add_argument(
+        '--pressure',
+        type=float,
+        default=101325.0,
+        help='Pressure imposed on the model input; a non-positive value keeps the solver pressure.'
+    )
+    export_parser.add_argument(
+        '--device',
+        type=str,
+        default='cpu',
+        help='Device the exported module is placed on.'
+    )
+    export_parser.add_argument(
+        '--method',
+        type=str,
+        choices=['script', 'trace'],
+        default='script',
+        help='TorchScript export method.'
+    )
+    export_parser.add_argument(
+        '--precision',
+        type=str,
+        choices=['fp32', 'bf16', 'int8'],
+        default='fp32',
+        help='Network precision. Reduced precisions are only exported if they pass the accuracy gate on --gate_data; otherwise fp32 is exported.'
+    )
+    export_parser.add_argument(
+        '--gate_data',
+        type=str,
+        default=None,
+        help='Held-out labeled NUMPY file for the accuracy gate. Required with --precision bf16 or int8.'
+    )
+    export_parser.add_argument(
+        '--max_degradation',
+        type=float,
+        default=0.1,
+        help='Allowed relative increase of the per-species RMSE over fp32.'
+    )
+
+def handle_command(args):
+    print("Handling export command")
+
+    export_model(
+        args.model,
+        args.mech,
+        args.output_path,
+        args.time,
+        frozen_temperature=args.frozen_temperature,
+        pressure=args.pressure,
+        device=args.device,
+        method=args.method,
+        precision=args.precision,
+        gate_data=args.gate_data,
+        max_degradation=args.max_degradation,
+    )
@@ -0,0 +1,48 @@
+from dfode_kit.df_interface.flame_cache import FlameCache
+
+def add_command_parser(subparsers):
+    cache_parser = subparsers.add_parser('flame-cache', help='List or invalidate cached laminar flame solutions.')
+    cache_parser.add_argument(
+        '--cache_dir',
+        type=str,
+        default=None,
+        help='Flame cache directory. Defaults to $DFODE_FLAME_CACHE or ~/.cache/dfode_kit/flames.'
+    )
+    action = cache_parser.add_mutually_exclusive_group()
+    action.add_argument(
+        '--invalidate',
+        type=str,
+        default=None,
+        metavar='MECH',
+        help='Delete all entries of this mechanism file.'
+    )
+    action.add_argument(
+        '--prune',
+        action='store_true',
+        help='Delete the entries whose mechanism file is gone or has changed.'
+    )
+    action.add_argument(
+        '--clear',
+        action='store_true',
+        help='Delete every entry.'
+    )
+
+def handle_command(args):
+    print("Handling flame-cache command")
+
+    cache = FlameCache(args.cache_dir)
+    if args.invalidate is not None:
+        print(f"Deleted {cache.invalidate(args.invalidate)} entries of {args.invalidate}")
+    elif args.prune:
+        print(f"Deleted {cache.prune()} stale entries")
+    elif args.clear:
+        print(f"Deleted {cache.invalidate()} entries")
+    else:
+        entries = cache.entries()
+        print(f"{len(entries)} cached flames in {cache.root}")
+        print(f"{'phi':>6} {'T0 [K]':>8} {'p0 [Pa]':>10} {'S_L [m/s]':>10} {'delta [m]':>11} {'start':>9}  mechanism")
+        for r in entries:
+            print(
+                f"{r['eq_ratio']:6.2f} {r['T0']:8.1f} {r['p0']:10.0f} {r['flame_speed']:10.4f} "
+                f"{r['flame_thickness']:11.4e} {r.get('start', 'unknown'):>9}  {r['mechanism']}"
+            )
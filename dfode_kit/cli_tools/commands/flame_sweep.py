@@ -0,0 +1,93 @@
+from dfode_kit.df_interface.flame_cache import FlameCache
+from dfode_kit.df_interface.flame_sweep import flame_sweep, print_sweep_summary
+
+def add_command_parser(subparsers):
+    sweep_parser = subparsers.add_parser('flame-sweep', help='Solve 1D premixed flames on a parameter grid in parallel.')
+    sweep_parser.add_argument(
+        '--mech',
+        required=True,
+        type=str,
+        help='Path to the YAML mechanism file.'
+    )
+    sweep_parser.add_argument(
+        '--phi',
+        required=True,
+        type=float,
+        nargs='+',
+        help='Equivalence ratios of the grid.'
+    )
+    sweep_parser.add_argument(
+        '--T0',
+        required=True,
+        type=float,
+        nargs='+',
+        help='Inlet temperatures of the grid in K.'
+    )
+    sweep_parser.add_argument(
+        '--p0',
+        type=float,
+        nargs='+',
+        default=[101325.0],
+        help='Inlet pressures of the grid in Pa.'
+    )
+    sweep_parser.add_argument(
+        '--fuel',
+        type=str,
+        default='H2',
+        help='Fuel composition, as accepted by Cantera.'
+    )
+    sweep_parser.add_argument(
+        '--oxidizer',
+        type=str,
+        default='O2:1, N2:3.76',
+        help='Oxidizer composition, as accepted by Cantera.'
+    )
+    sweep_parser.add_argument(
+        '--width',
+        type=float,
+        default=0.1,
+        help='Domain width in m.'
+    )
+    sweep_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes. Defaults to the number of CPUs.'
+    )
+    sweep_parser.add_argument(
+        '--cache_dir',
+        type=str,
+        default=None,
+        help='Flame cache directory. Defaults to $DFODE_FLAME_CACHE or ~/.cache/dfode_kit/flames.'
+    )
+    sweep_parser.add_argument(
+        '--no_cache',
+        action='store_true',
+        help='Solve every flame instead of loading cached solutions, and do not store them.'
+    )
+    sweep_parser.add_argument(
+        '--output_dir',
+        type=str,
+        default=None,
+        help='Optional directory for the flame solutions and flame_sweep.json.'
+    )
+
+def handle_command(args):
+    print("Handling flame-sweep command")
+
+    records = flame_sweep(
+        args.mech,
+        args.phi,
+        args.T0,
+        args.p0,
+        fuel=args.fuel,
+        oxidizer=args.oxidizer,
+        n_workers=args.workers,
+        width=args.width,
+        cache=None if args.no_cache else FlameCache(args.cache_dir),
+        output_dir=args.output_dir,
+    )
+    print_sweep_summary(records)
+
+    if args.output_dir is not None:
+        print(f"Saved flame solutions to {args.output_dir}")
@@ -2,6 +2,8 @@ import argparse
 import h5py
 import numpy as np
 
+from dfode_kit.utils import STORAGE_DTYPES
+
 def add_command_parser(subparsers):
     h52npy_parser = subparsers.add_parser('h52npy', help='Convert HDF5 scalar fields to NumPy array.')
     h52npy_parser.add_argument('--source', 
@@ -12,14 +14,19 @@ def add_command_parser(subparsers):
                                required=True,
                                type=str, 
                                help='Path for the output NumPy file.')
+    h52npy_parser.add_argument('--dtype',
+                               type=str,
+                               choices=STORAGE_DTYPES,
+                               default=None,
+                               help='Dtype of the output array. Defaults to the dtype stored in the HDF5 file.')
 
 def handle_command(args):
     print("Handling h52npy command")
     # Load the HDF5 file and concatenate datasets
-    concatenate_datasets_to_npy(args.source, args.save_to)
+    concatenate_datasets_to_npy(args.source, args.save_to, args.dtype)
 
-def concatenate_datasets_to_npy(hdf5_file_path, output_npy_file):
-    """Concatenate all datasets under the 'scalar_fields' group and save to a NumPy file."""
+def concatenate_datasets_to_npy(hdf5_file_path, output_npy_file, dtype=None):
+    """Concatenate all datasets under the 'scalar_fields' group and save to a NumPy file, optionally cast to `dtype`."""
     with h5py.File(hdf5_file_path, 'r') as hdf5_file:
         # Check if the 'scalar_fields' group exists
         if 'scalar_fields' not in hdf5_file:
@@ -39,6 +46,8 @@ def concatenate_datasets_to_npy(hdf5_file_path, output_npy_file):
 
         # Concatenate all arrays along the first axis
         concatenated_array = np.concatenate(all_arrays, axis=0)
+        if dtype is not None:
+            concatenated_array = concatenated_array.astype(dtype, copy=False)
 
         # Print the shape of the final concatenated array
         print(f"Shape of the final concatenated array: {concatenated_array.shape}")
@@ -1,6 +1,7 @@
 import argparse
 import numpy as np
 from dfode_kit.data_operations import label_npy as label_main
+from dfode_kit.utils import STORAGE_DTYPES
 
 def add_command_parser(subparsers):
     label_parser = subparsers.add_parser('label', help='Label data.')
@@ -27,6 +28,13 @@ def add_command_parser(subparsers):
         type=str, 
         help='Path to save the labeled dataset.'
     )
+    label_parser.add_argument(
+        '--dtype',
+        type=str,
+        choices=STORAGE_DTYPES,
+        default='float64',
+        help='Storage dtype of the labels; CVODE integrates in float64 and float32 labels report the resulting target error.'
+    )
     label_parser.set_defaults(func=handle_command)
 
 def handle_command(args):
@@ -34,7 +42,8 @@ def handle_command(args):
         labeled_data = label_main(
             mech_path=args.mech,
             time_step=float(args.time),
-            source_path=args.source
+            source_path=args.source,
+            dtype=args.dtype,
         )
         np.save(args.save, labeled_data)
         print(f"Labeled data saved to: {args.save}")
@@ -0,0 +1,67 @@
+import json
+
+from dfode_kit.dfode_core.inference.quantize import check_precision, print_precision_report
+
+def add_command_parser(subparsers):
+    quantize_parser = subparsers.add_parser('quantize', help='Check a reduced-precision inference mode against fp32 and CVODE labels.')
+    quantize_parser.add_argument(
+        '--mech', 
+        required=True,
+        type=str, 
+        help='Path to the YAML mechanism file.'
+    )
+    quantize_parser.add_argument(
+        '--model',
+        required=True,
+        type=str,
+        help='Path to the checkpoint produced by the train command.'
+    )
+    quantize_parser.add_argument(
+        '--source',
+        required=True,
+        type=str,
+        help='Path to a held-out labeled NUMPY file.'
+    )
+    quantize_parser.add_argument(
+        '--precision',
+        type=str,
+        choices=['bf16', 'int8'],
+        default='int8',
+        help='Reduced precision to check.'
+    )
+    quantize_parser.add_argument(
+        '--max_degradation',
+        type=float,
+        default=0.1,
+        help='Allowed relative increase of the per-species RMSE against the labels.'
+    )
+    quantize_parser.add_argument(
+        '--n_samples',
+        type=int,
+        default=10000,
+        help='Maximum number of held-out states to evaluate.'
+    )
+    quantize_parser.add_argument(
+        '--report',
+        type=str,
+        default=None,
+        help='Optional path of a JSON file to write the report to.'
+    )
+
+def handle_command(args):
+    print("Handling quantize command")
+
+    report = check_precision(
+        args.model,
+        args.mech,
+        args.source,
+        args.precision,
+        max_degradation=args.max_degradation,
+        n_samples=args.n_samples,
+    )
+    print_precision_report(report)
+
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved report to {args.report}")
@@ -0,0 +1,79 @@
+import numpy as np
+from dfode_kit.data_operations.reduce_data import reduce_states, print_reduction_summary, METHODS
+from dfode_kit.data_operations.h5_kit import get_TPY_from_h5
+
+def add_command_parser(subparsers):
+    reduce_parser = subparsers.add_parser('reduce', help='Reduce a state dataset to representatives of its thermochemical space.')
+    reduce_parser.add_argument(
+        '--source',
+        required=True,
+        type=str,
+        help='Sampled HDF5 file or NUMPY file of [T, p, Y...] states, e.g. from augment.'
+    )
+    reduce_parser.add_argument(
+        '--save',
+        required=True,
+        type=str,
+        help='Path of the output NUMPY file with the kept states.'
+    )
+    reduce_parser.add_argument(
+        '--method',
+        type=str,
+        choices=METHODS,
+        default='grid',
+        help='Grid hashing or mini-batch k-means in normalised (T, BCT(Y)) space.'
+    )
+    reduce_parser.add_argument(
+        '--n_bins',
+        type=int,
+        default=32,
+        help='Grid cells per axis for the grid method.'
+    )
+    reduce_parser.add_argument(
+        '--n_clusters',
+        type=int,
+        default=10000,
+        help='Number of clusters for the kmeans method.'
+    )
+    reduce_parser.add_argument(
+        '--per_cell',
+        type=int,
+        default=1,
+        help='Representatives kept per cell.'
+    )
+    reduce_parser.add_argument(
+        '--weights',
+        type=str,
+        default=None,
+        help='Optional NUMPY file for the number of original states each kept state stands for.'
+    )
+    reduce_parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed of the random draws.'
+    )
+
+def handle_command(args):
+    print("Handling reduce command")
+
+    if args.source.endswith(('.h5', '.hdf5')):
+        states = get_TPY_from_h5(args.source)
+    else:
+        states = np.load(args.source)
+    print(f"Loaded states of shape {states.shape} from {args.source}")
+
+    indices, weights, n_cells = reduce_states(
+        states,
+        method=args.method,
+        n_bins=args.n_bins,
+        n_clusters=args.n_clusters,
+        per_cell=args.per_cell,
+        seed=args.seed,
+    )
+    np.save(args.save, states[indices])
+    print_reduction_summary(states.shape[0], indices.shape[0], n_cells)
+    print(f"Saved reduced states to {args.save}")
+    if args.weights is not None:
+        np.save(args.weights, weights)
+        print(f"Saved weights to {args.weights}")
@@ -0,0 +1,124 @@
+import numpy as np
+
+from dfode_kit.data_operations.rollout import evaluate_rollout, print_rollout_summary
+
+def add_command_parser(subparsers):
+    rollout_parser = subparsers.add_parser('rollout', help='Roll 0D reactors forward with a model and with CVODE and compare.')
+    rollout_parser.add_argument(
+        '--mech',
+        required=True,
+        type=str,
+        help='Path to the YAML mechanism file.'
+    )
+    rollout_parser.add_argument(
+        '--model',
+        required=True,
+        type=str,
+        help='Path to the checkpoint produced by the train command.'
+    )
+    rollout_parser.add_argument(
+        '--phi',
+        required=True,
+        type=float,
+        nargs='+',
+        help='Equivalence ratios of the initial-condition grid.'
+    )
+    rollout_parser.add_argument(
+        '--T0',
+        required=True,
+        type=float,
+        nargs='+',
+        help='Initial temperatures of the grid in K.'
+    )
+    rollout_parser.add_argument(
+        '--p0',
+        type=float,
+        nargs='+',
+        default=[101325.0],
+        help='Initial pressures of the grid in Pa.'
+    )
+    rollout_parser.add_argument(
+        '--fuel',
+        type=str,
+        default='H2',
+        help='Fuel composition, as accepted by Cantera.'
+    )
+    rollout_parser.add_argument(
+        '--oxidizer',
+        type=str,
+        default='O2:1, N2:3.76',
+        help='Oxidizer composition, as accepted by Cantera.'
+    )
+    rollout_parser.add_argument(
+        '--time',
+        type=float,
+        default=1e-6,
+        help='Model time step.'
+    )
+    rollout_parser.add_argument(
+        '--n_steps',
+        type=int,
+        default=1000,
+        help='Number of time steps to roll out.'
+    )
+    rollout_parser.add_argument(
+        '--frozen_temperature',
+        type=float,
+        default=0.0,
+        help='Reactors at or below this temperature are not advanced by the model.'
+    )
+    rollout_parser.add_argument(
+        '--device',
+        type=str,
+        default='cpu',
+        help='Device for the model rollout.'
+    )
+    rollout_parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=None,
+        help='Micro-batch size of the network evaluation.'
+    )
+    rollout_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of CVODE worker processes. Defaults to the number of CPUs.'
+    )
+    rollout_parser.add_argument(
+        '--save_every',
+        type=int,
+        default=1,
+        help='Keep every n-th state of the trajectories.'
+    )
+    rollout_parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='Optional path of a .npz file for the results and error curves.'
+    )
+
+def handle_command(args):
+    print("Handling rollout command")
+
+    results = evaluate_rollout(
+        args.model,
+        args.mech,
+        args.phi,
+        args.T0,
+        args.p0,
+        time_step=args.time,
+        n_steps=args.n_steps,
+        fuel=args.fuel,
+        oxidizer=args.oxidizer,
+        frozen_temperature=args.frozen_temperature,
+        device=args.device,
+        batch_size=args.batch_size,
+        n_workers=args.workers,
+        save_every=args.save_every,
+    )
+    print_rollout_summary(results)
+
+    if args.output is not None:
+        np.savez(args.output, **results)
+        print(f"Saved rollout results to {args.output}")
@@ -1,6 +1,7 @@
 import argparse
 from dfode_kit.df_interface.sample_case import df_to_h5
 from dfode_kit.data_operations.h5_kit import touch_h5
+from dfode_kit.utils import STORAGE_DTYPES
 
 def add_command_parser(subparsers):
     sample_parser = subparsers.add_parser('sample', help='Perform sampling.')
@@ -29,11 +30,18 @@ def add_command_parser(subparsers):
         action='store_true', 
         help='Include mesh data in the HDF5 file.'
     )
+    sample_parser.add_argument(
+        '--dtype',
+        type=str,
+        choices=STORAGE_DTYPES,
+        default='float64',
+        help='Storage dtype of the sampled scalar fields.'
+    )
 
 def handle_command(args):
     print("Handling sample command")
     # Call the save_arrays_to_hdf5 function with the parsed arguments
-    df_to_h5(args.case, args.mech, args.save, include_mesh=args.include_mesh)
+    df_to_h5(args.case, args.mech, args.save, include_mesh=args.include_mesh, dtype=args.dtype)
     print()
     
     # Optionally load and print the contents of the HDF5 file
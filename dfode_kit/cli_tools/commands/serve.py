@@ -0,0 +1,93 @@
+from dfode_kit.dfode_core.inference.engine import InferenceEngine
+from dfode_kit.dfode_core.inference.server import InferenceServer
+from dfode_kit.dfode_core.inference.server_check import check_server, print_server_check
+
+def add_command_parser(subparsers):
+    serve_parser = subparsers.add_parser('serve', help='Serve a model to local solver processes over a Unix domain socket.')
+    serve_parser.add_argument(
+        '--properties',
+        type=str,
+        default='constant/CanteraTorchProperties',
+        help='Path to the CanteraTorchProperties file of the case.'
+    )
+    serve_parser.add_argument(
+        '--socket',
+        type=str,
+        default='/tmp/dfode-kit.sock',
+        help='Path of the Unix domain socket to listen on.'
+    )
+    serve_parser.add_argument(
+        '--max_latency',
+        type=float,
+        default=2e-3,
+        help='Longest time in seconds a request waits for others to join its batch.'
+    )
+    serve_parser.add_argument(
+        '--max_batch_cells',
+        type=int,
+        default=2**20,
+        help='Maximum number of cells in one coalesced batch.'
+    )
+    serve_parser.add_argument(
+        '--max_request_cells',
+        type=int,
+        default=2**22,
+        help='Largest number of cells a client may send in one request.'
+    )
+    serve_parser.add_argument(
+        '--no_frozen_temperature',
+        action='store_true',
+        help='Pass every cell through the network regardless of frozenTemperature.'
+    )
+    serve_parser.add_argument(
+        '--batch_size',
+        type=str,
+        default=None,
+        help="Inference micro-batch size, or 'auto' to tune it on this host."
+    )
+    serve_parser.add_argument(
+        '--threads',
+        type=int,
+        default=None,
+        help='Number of intra-op CPU threads.'
+    )
+    serve_parser.add_argument(
+        '--check',
+        type=int,
+        default=None,
+        metavar='N_CLIENTS',
+        help='Instead of serving, start a server, drive it from this many client processes and compare their rates with direct engine calls.'
+    )
+
+def handle_command(args):
+    print("Handling serve command")
+
+    if args.check is not None:
+        report = check_server(
+            args.properties,
+            n_clients=args.check,
+            socket_path=args.socket,
+            max_latency=args.max_latency,
+            use_frozen_temperature=not args.no_frozen_temperature,
+        )
+        print_server_check(report)
+        if not report['passed']:
+            raise SystemExit(1)
+        return
+
+    batch_size = args.batch_size
+    if batch_size is not None and batch_size != 'auto':
+        batch_size = int(batch_size)
+
+    engine = InferenceEngine.from_properties(
+        args.properties,
+        use_frozen_temperature=not args.no_frozen_temperature,
+        batch_size=batch_size,
+        intra_op_threads=args.threads,
+        verbose=False,
+    )
+    server = InferenceServer(engine, args.socket, args.max_latency, args.max_batch_cells, args.max_request_cells)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,81 @@
+from dfode_kit.dfode_core.train.sweep import run_sweep, METRICS
+
+def add_command_parser(subparsers):
+    sweep_parser = subparsers.add_parser('sweep', help='Run a parallel hyperparameter sweep and rank the trained models.')
+    sweep_parser.add_argument(
+        '--mech',
+        required=True,
+        type=str,
+        help='Path to the YAML mechanism file.'
+    )
+    sweep_parser.add_argument(
+        '--source_file',
+        required=True,
+        type=str,
+        help='Path to the labeled NUMPY or HDF5 file.'
+    )
+    sweep_parser.add_argument(
+        '--spec',
+        required=True,
+        type=str,
+        help='JSON file with the sweep method, swept parameters and fixed settings.'
+    )
+    sweep_parser.add_argument(
+        '--output_dir',
+        required=True,
+        type=str,
+        help='Directory for the trial checkpoints and sweep_results.json.'
+    )
+    sweep_parser.add_argument(
+        '--time',
+        type=float,
+        default=1e-6,
+        help='Time step of the labeled data.'
+    )
+    sweep_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of trials trained at once. Defaults to the CPU count divided by --threads.'
+    )
+    sweep_parser.add_argument(
+        '--threads',
+        type=int,
+        default=1,
+        help='Intra-op threads per trial.'
+    )
+    sweep_parser.add_argument(
+        '--val_fraction',
+        type=float,
+        default=0.1,
+        help='Fraction of the data held out for validation.'
+    )
+    sweep_parser.add_argument(
+        '--metric',
+        type=str,
+        choices=METRICS,
+        default='loss1',
+        help='Validation metric used to rank the trials.'
+    )
+    sweep_parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed of the validation split, random search and trials.'
+    )
+
+def handle_command(args):
+    print("Handling sweep command")
+
+    run_sweep(
+        args.mech,
+        args.source_file,
+        args.spec,
+        args.output_dir,
+        time_step=args.time,
+        n_workers=args.workers,
+        threads_per_trial=args.threads,
+        val_fraction=args.val_fraction,
+        metric=args.metric,
+        seed=args.seed,
+    )
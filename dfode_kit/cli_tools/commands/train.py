@@ -1,4 +1,9 @@
+import os
+
 from dfode_kit.dfode_core.train.train import train
+from dfode_kit.dfode_core.model.build import ARCHITECTURES
+from dfode_kit.dfode_core.model.mlp import ACTIVATIONS
+from dfode_kit.utils import STORAGE_DTYPES
 
 def add_command_parser(subparsers):
     train_parser = subparsers.add_parser('train', help='Train the model.')
@@ -20,12 +25,146 @@ def add_command_parser(subparsers):
         type=str,
         help='Path to the output model.' 
     )
+    train_parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=4096,
+        help='Number of samples per optimizer step.'
+    )
+    train_parser.add_argument(
+        '--epochs',
+        type=int,
+        default=100,
+        help='Number of passes over the training data.'
+    )
+    train_parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=0,
+        help='Number of data-loading worker processes.'
+    )
+    train_parser.add_argument(
+        '--no_shuffle',
+        action='store_true',
+        help='Visit the mini-batches in file order instead of shuffling.'
+    )
+    train_parser.add_argument(
+        '--h5_dataset',
+        type=str,
+        default='labeled_data',
+        help='Dataset holding the labeled rows when the source file is HDF5.'
+    )
+    train_parser.add_argument(
+        '--distributed',
+        action='store_true',
+        default=None,
+        help='Require data-parallel training over the torchrun process group (gloo backend). '
+             'Enabled automatically when launched by torchrun with several processes.'
+    )
+    train_parser.add_argument(
+        '--no_compile',
+        action='store_true',
+        help='Run the training step eagerly instead of compiling it with torch.compile.'
+    )
+    train_parser.add_argument(
+        '--in_memory',
+        action='store_true',
+        help='Precompute all training tensors once and keep them in memory.'
+    )
+    train_parser.add_argument(
+        '--layers',
+        type=int,
+        nargs='+',
+        default=[400, 400, 400, 400],
+        help='Widths of the hidden layers.'
+    )
+    train_parser.add_argument(
+        '--lr',
+        type=float,
+        default=1e-3,
+        help='Adam learning rate.'
+    )
+    train_parser.add_argument(
+        '--mass_weight',
+        type=float,
+        default=1.0,
+        help='Weight of the mass-sum loss term.'
+    )
+    train_parser.add_argument(
+        '--enthalpy_weight',
+        type=float,
+        default=1e-13,
+        help='Weight of the formation-enthalpy loss term.'
+    )
+    train_parser.add_argument(
+        '--architecture',
+        type=str,
+        choices=list(ARCHITECTURES),
+        default='mlp',
+        help='Network type: plain MLP, residual MLP or per-species ensemble.'
+    )
+    train_parser.add_argument(
+        '--activation',
+        type=str,
+        choices=list(ACTIVATIONS),
+        default='gelu',
+        help='Hidden-layer activation.'
+    )
+    train_parser.add_argument(
+        '--init_from',
+        type=str,
+        default=None,
+        help='Checkpoint whose weights initialise the network (warm start).'
+    )
+    train_parser.add_argument(
+        '--no_telemetry',
+        action='store_true',
+        help='Do not write per-epoch timing, throughput, memory and loss records next to the checkpoint.'
+    )
+    train_parser.add_argument(
+        '--profile_steps',
+        type=int,
+        nargs=2,
+        default=None,
+        metavar=('START', 'STOP'),
+        help='Record optimizer steps START to STOP with torch.profiler into a Chrome trace next to the checkpoint.'
+    )
+    train_parser.add_argument(
+        '--dtype',
+        type=str,
+        choices=STORAGE_DTYPES,
+        default='float64',
+        help='Dtype in which labeled rows are read and preprocessed.'
+    )
     # Add specific arguments for the train command here
 
 def handle_command(args):
     print("Handling train command")
     # Implement your train logic here
 
-    train(args.mech,args.source_file,args.output_path)
+    train(
+        args.mech,
+        args.source_file,
+        args.output_path,
+        batch_size=args.batch_size,
+        epochs=args.epochs,
+        num_workers=args.num_workers,
+        shuffle=not args.no_shuffle,
+        h5_dataset=args.h5_dataset,
+        distributed=args.distributed,
+        compile=not args.no_compile,
+        in_memory=args.in_memory,
+        hidden_layers=args.layers,
+        lr=args.lr,
+        mass_weight=args.mass_weight,
+        enthalpy_weight=args.enthalpy_weight,
+        architecture=args.architecture,
+        activation=args.activation,
+        init_from=args.init_from,
+        telemetry=not args.no_telemetry,
+        profile_steps=args.profile_steps,
+        dtype=args.dtype,
+    )
 
-    print(f"Saved Model to {args.output_path}")
\ No newline at end of file
+    if int(os.environ.get('RANK', 0)) == 0:
+        print(f"Saved Model to {args.output_path}")
\ No newline at end of file
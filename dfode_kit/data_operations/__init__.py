@@ -1,3 +1,5 @@
 from .h5_kit import touch_h5, get_TPY_from_h5, integrate_h5, load_model, nn_integrate, predict_Y, calculate_error
 from .augment_data import random_perturb
-from .label_data import label_npy
\ No newline at end of file
+from .label_data import label_npy
+from .reduce_data import reduce_states
+from .heat_release import heat_release_rate
@@ -2,10 +2,11 @@ import numpy as np
 import cantera as ct
 import time
 from dfode_kit.data_operations.h5_kit import advance_reactor
-from dfode_kit.dfode_core.train.formation import formation_calculate
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.data_operations.heat_release import heat_release_rate
 
 def single_step(npstate, chem, time_step=1e-6):
-    gas = ct.Solution(chem)
+    gas = get_mechanism(chem).new_solution()
     T_old, P_old, Y_old = npstate[0], npstate[1], npstate[2:]
     gas.TPY = T_old, P_old, Y_old
     res_1st = [T_old, P_old] + list(gas.Y) 
@@ -32,8 +33,8 @@ def random_perturb(
     time_step: float = 1e-6,
 ) -> np.ndarray:
     
-    gas = ct.Solution(mech_path)
-    n_species = gas.n_species
+    mech = get_mechanism(mech_path)
+    n_species = mech.n_species
     maxT = np.max(array[:,0])
     minT = np.min(array[:,0])
     maxP = np.max(array[:,1])
@@ -41,64 +42,53 @@ def random_perturb(
     maxN2 = np.max(array[:,-1])
     minN2 = np.min(array[:,-1])
 
+    if heat_limit:
+        # Instantaneous chemical heat release [W/kg] of the source states
+        qdot_ = heat_release_rate(array, mech)
+
+    if element_limit:
+        # H/O elemental mole ratio of a state is (Y/W) @ n_H / (Y/W) @ n_O
+        n_atoms = np.array([[mech.gas.n_atoms(k, element) for element in ('H', 'O')] for k in range(n_species)])
+        atoms_per_mass = n_atoms / mech.molecular_weights[:, None]
+
     num = 0
     new_array = []
     while num < dataset:
-        if heat_limit:
-            qdot_ = np.zeros_like(array[:, 0])
-            formation = formation_calculate(mech_path)
-            label_array = label(array, mech_path)
-            for i in range(label_array.shape[0]):
-                qdot_[i] = (-(formation*(label_array[i, 4+n_species:4+2*n_species]-label_array[i, 2:2+n_species])/time_step).sum())
-
-        test_tmp = np.copy(array[0])
-        for j in range(array.shape[0]):
-            k = 0
-            while True:
-                k += 1
-
-                test_r = array[j]
-
-                test_tmp[0] = test_r[0] + (maxT - minT)*(2*np.random.rand() - 1.0)*alpha
-                test_tmp[1] = test_r[1] + (maxP - minP)*(2*np.random.rand() - 1.0)*alpha*10
-                test_tmp[-1] = test_r[-1] + (maxN2 - minN2)*(2*np.random.rand() - 1)*alpha
-                for i in range(2, array.shape[1] -1):
-                    test_tmp[i] = np.abs(test_r[i])**(1 + (2*np.random.rand() -1)*alpha)
-                test_tmp[2: -1] = test_tmp[2:-1]/np.sum(test_tmp[2:-1])*(1 - test_tmp[-1])
-
-
-                if heat_limit:
-                    label_test_tmp = single_step(test_tmp, mech_path)
-                    label_test_tmp = np.array(label_test_tmp)
-                    # print(formation.shape)
-                    # print(label_test_tmp.shape)
-                    qdot_new_ = (-(formation*(label_test_tmp[4+n_species:4+2*n_species]-label_test_tmp[2:2+n_species])/time_step).sum())
-                    
-                if element_limit:
-                    gas.TPY = test_tmp[0], test_tmp[1], test_tmp[2:] 
-                    H_mole_fraction = gas.elemental_mole_fraction("H")
-                    O_mole_fraction = gas.elemental_mole_fraction("O") 
-                    H_O_ratio = H_mole_fraction / O_mole_fraction
-
-
-                if heat_limit and element_limit:
-                    condition = (minT * (1 - gamma)) <= test_tmp[0] <= (maxT * (1 + gamma)) and  (2 * (1 - gamma)) <= H_O_ratio <= (2 * (1 + gamma)) and (qdot_new_ > 1/cq*qdot_[j] and qdot_new_ < cq*qdot_[j])  
-                elif heat_limit and not element_limit:
-                    condition = (minT * (1 - gamma)) <= test_tmp[0] <= (maxT * (1 + gamma)) and  (qdot_new_ > 1/cq*qdot_[j] and qdot_new_ < cq*qdot_[j])
-                elif not heat_limit and element_limit:
-                    condition = (minT * (1 - gamma)) <= test_tmp[0] <= (maxT * (1 + gamma)) and  (2 * (1 - gamma)) <= H_O_ratio <= (2 * (1 + gamma))
-                else:
-                    condition = (minT * (1 - gamma)) <= test_tmp[0] <= (maxT * (1 + gamma))
-                
-                # print('k', k)
-                if condition or k > 20:
-                    break
-                
-
-            if k <= 20:
-                # print('j', j)
-                new_array.append(test_tmp)
-
+        # Every source row gets up to 20 draws; each draw perturbs all rows
+        # still pending at once and screens them in one batch
+        accepted = np.empty_like(array)
+        found = np.zeros(array.shape[0], dtype=bool)
+        pending = np.arange(array.shape[0])
+        for _ in range(20):
+            test_r = array[pending]
+            test_tmp = np.empty_like(test_r)
+            n_rows = len(pending)
+
+            test_tmp[:, 0] = test_r[:, 0] + (maxT - minT)*(2*np.random.rand(n_rows) - 1.0)*alpha
+            test_tmp[:, 1] = test_r[:, 1] + (maxP - minP)*(2*np.random.rand(n_rows) - 1.0)*alpha*10
+            test_tmp[:, -1] = test_r[:, -1] + (maxN2 - minN2)*(2*np.random.rand(n_rows) - 1)*alpha
+            test_tmp[:, 2:-1] = np.abs(test_r[:, 2:-1])**(1 + (2*np.random.rand(n_rows, array.shape[1] - 3) - 1)*alpha)
+            test_tmp[:, 2:-1] = test_tmp[:, 2:-1]/np.sum(test_tmp[:, 2:-1], axis=1, keepdims=True)*(1 - test_tmp[:, -1:])
+
+            condition = ((minT * (1 - gamma)) <= test_tmp[:, 0]) & (test_tmp[:, 0] <= (maxT * (1 + gamma)))
+
+            if heat_limit:
+                qdot_new_ = heat_release_rate(test_tmp, mech)
+                condition &= (qdot_new_ > 1/cq*qdot_[pending]) & (qdot_new_ < cq*qdot_[pending])
+
+            if element_limit:
+                H_O_atoms = np.clip(test_tmp[:, 2:], 0, None) @ atoms_per_mass
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    H_O_ratio = H_O_atoms[:, 0] / H_O_atoms[:, 1]
+                condition &= ((2 * (1 - gamma)) <= H_O_ratio) & (H_O_ratio <= (2 * (1 + gamma)))
+
+            accepted[pending[condition]] = test_tmp[condition]
+            found[pending[condition]] = True
+            pending = pending[~condition]
+            if len(pending) == 0:
+                break
+
+        new_array.extend(accepted[found])
         num = len(new_array)
         print(num)
 
@@ -116,7 +106,7 @@ def label(
     time_step: float = 1e-06,
 ) -> np.ndarray:
 
-    gas = ct.Solution(mech_path)
+    gas = get_mechanism(mech_path).new_solution()
     n_species = gas.n_species
 
     labeled_data = np.empty((array.shape[0], 2 * n_species + 4))
@@ -3,7 +3,13 @@ import torch
 import numpy as np
 import cantera as ct
 
-from dfode_kit.utils import BCT, inverse_BCT
+from dfode_kit.utils import load_checkpoint
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.dfode_core.inference.batching import batched_forward, set_threads, tune_batch_size
+from dfode_kit.dfode_core.inference.router import OODRouter, normalize_states
+from dfode_kit.dfode_core.inference.conservation import ElementProjection
+from dfode_kit.dfode_core.model.build import model_from_checkpoint
+from dfode_kit.dfode_core.preprocess import checkpoint_pipelines, species_box_cox
 
 def touch_h5(hdf5_file_path):
     """
@@ -132,12 +138,31 @@ def advance_reactor(gas, state, reactor, reactor_net, time_step):
     
     return gas
 
+def cvode_next_Y(states, mech, time_step):
+    """Advance ``[T, p, Y...]`` rows with the CVODE setup used by `label_npy` and return the new Y."""
+    gas = get_mechanism(mech).new_solution()
+    n_species = gas.n_species
+
+    reactor = ct.Reactor(gas, name='Reactor1', energy='off')
+    reactor_net = ct.ReactorNet([reactor])
+    reactor_net.rtol, reactor_net.atol = 1e-6, 1e-10
+
+    next_Y = np.empty((states.shape[0], n_species))
+    for i, state in enumerate(states):
+        gas = advance_reactor(gas, state[:2 + n_species], reactor, reactor_net, time_step)
+        next_Y[i] = gas.Y
+    return next_Y
+
 @torch.no_grad()
-def load_model(model_path, device, model_class, model_layers):
-    state_dict = torch.load(model_path, map_location='cpu')
+def load_model(model_path, device, model_class=None, model_layers=None):
+    state_dict = load_checkpoint(model_path)
     
-    model = model_class(model_layers)
-    model.load_state_dict(state_dict['net'])
+    if model_class is None:
+        # Rebuild whatever architecture the checkpoint was trained with
+        model = model_from_checkpoint(state_dict)
+    else:
+        model = model_class(model_layers)
+        model.load_state_dict(state_dict['net'])
     
     model.eval()
     model.to(device=device)
@@ -145,56 +170,109 @@ def load_model(model_path, device, model_class, model_layers):
     return model
 
 @torch.no_grad()
-def predict_Y(model, model_path, d_arr, mech, device):
-    gas = ct.Solution(mech)
-    n_species = gas.n_species
+def predict_Y(model, model_path, d_arr, mech, device, batch_size=None, projection=None):
+    n_species = get_mechanism(mech).n_species
     expected_dims = 2 + n_species
     assert d_arr.shape[1] == expected_dims
     
     
-    state_dict = torch.load(model_path, map_location='cpu')
-    
-    Xmu0 = state_dict['data_in_mean']
-    Xstd0 = state_dict['data_in_std']
-    Ymu0 = state_dict['data_target_mean']
-    Ystd0 = state_dict['data_target_std']
+    state_dict = load_checkpoint(model_path)
+    features_pipeline, targets_pipeline = checkpoint_pipelines(state_dict)
     
     d_arr = np.clip(d_arr, 0, None)
     d_arr[:, 1] *= 0
     d_arr[:, 1] += 101325
     
     orig_Y = d_arr[:, 2:].copy()
-    in_bct = d_arr.copy()
-    in_bct[:, 2:] = BCT(in_bct[:, 2:])
-    in_bct_norm = (in_bct - Xmu0) / Xstd0      
+    in_bct = features_pipeline[:2].transform(d_arr)
+    in_bct_norm = features_pipeline[2:].transform(in_bct)
     
     input = torch.from_numpy(in_bct_norm).float().to(device=device)
     
-    output = model(input)
+    output = batched_forward(model, input, batch_size)
     
-    out_bct = output.cpu().numpy() * Ystd0 + Ymu0 + in_bct[:, 2:-1]
+    out_bct = targets_pipeline.inverse_transform(output.cpu().numpy().astype(np.float64))
+    out_bct += in_bct[:, 2:-1]
     next_Y = orig_Y.copy()
-    next_Y[:, :-1] = inverse_BCT(out_bct)
+    # Undo the Box-Cox transform of the first n_species - 1 species
+    next_Y[:, :-1] = species_box_cox(features_pipeline, n_species - 1).inverse_transform(out_bct)
     next_Y[:, :-1] = next_Y[:, :-1] / np.sum(next_Y[:, :-1], axis=1, keepdims=True) * (1 - next_Y[:, -1:])
     
+    if projection is not None:
+        next_Y = projection.apply(orig_Y, next_Y)
+    
     return next_Y
 
 @torch.no_grad()
-def nn_integrate(orig_arr, model_path, device, model_class, model_layers, time_step, mech, frozen_temperature=305):
+def nn_integrate(
+    orig_arr,
+    model_path,
+    device,
+    model_class,
+    model_layers,
+    time_step,
+    mech,
+    frozen_temperature=305,
+    batch_size=None,
+    intra_op_threads=None,
+    inter_op_threads=None,
+    hybrid=False,
+    router=None,
+    conserve_elements=False,
+):
+    """
+    Advance states by one time step with a trained model.
+
+    `batch_size` bounds the memory of the network evaluation by running it in
+    micro-batches; 'auto' picks the fastest size for this host with
+    `tune_batch_size`. The thread settings are passed to `set_threads`.
+
+    With `hybrid=True` the cells that the `OODRouter` built from the training
+    envelope in the checkpoint flags as out of distribution are integrated
+    with CVODE instead. Pass the same `router` to successive calls to
+    accumulate its per-step counters; giving a router implies hybrid mode.
+
+    With `conserve_elements=True` the network predictions are corrected with
+    the mechanism's `ElementProjection` so that each step conserves the
+    element mass fractions.
+    """
+    set_threads(intra_op_threads, inter_op_threads)
     model = load_model(model_path, device, model_class, model_layers)
     
     mask = orig_arr[:, 0] > frozen_temperature
     infer_arr = orig_arr[mask, :]
     
-    next_Y = predict_Y(model, model_path, infer_arr, mech, device)
+    if batch_size == 'auto':
+        batch_size = None
+        if infer_arr.shape[0] > 0:
+            sample = torch.randn(min(infer_arr.shape[0], 2**14), model_layers[0], device=device)
+            batch_size, _ = tune_batch_size(model, sample)
+            print(f"Using inference batch size {batch_size}")
+    
+    ood = np.zeros(infer_arr.shape[0], dtype=bool)
+    if hybrid or router is not None:
+        checkpoint = load_checkpoint(model_path)
+        if router is None:
+            router = OODRouter.from_checkpoint(checkpoint)
+        ood = router.route(normalize_states(infer_arr, checkpoint))
+        print(router.summary())
+    
+    projection = ElementProjection.from_mechanism(mech) if conserve_elements else None
+    
+    next_Y = np.empty((infer_arr.shape[0], infer_arr.shape[1] - 2))
+    if (~ood).any():
+        next_Y[~ood] = predict_Y(model, model_path, infer_arr[~ood], mech, device, batch_size, projection)
+    if ood.any():
+        next_Y[ood] = cvode_next_Y(infer_arr[ood], mech, time_step)
     
     new_states = np.hstack((np.zeros((orig_arr.shape[0], 1)), orig_arr))
     new_states[:, 0] += time_step
     new_states[:, 2] = orig_arr[:, 1]
     new_states[mask, 3:] = next_Y
     
-    setter_gas = ct.Solution(mech)
-    getter_gas = ct.Solution(mech)
+    mechanism = get_mechanism(mech)
+    setter_gas = mechanism.new_solution()
+    getter_gas = mechanism.new_solution()
     new_T = np.zeros_like(next_Y[:, 0])
     
     for idx, (state, next_y) in enumerate(zip(infer_arr, next_Y)):
@@ -241,7 +319,8 @@ def integrate_h5(
     model_settings : dict, optional
         A dictionary containing model settings for the neural network integration. 
         Must include keys: 'model_path', 'device', 'model_class', 'model_layers', 
-        'time_step', and 'mech'.
+        'time_step', and 'mech'. May include 'frozen_temperature', 'batch_size',
+        'intra_op_threads', 'inter_op_threads', 'hybrid' and 'conserve_elements'.
 
     Returns
     -------
@@ -258,7 +337,7 @@ def integrate_h5(
             data_dict[dataset_name] = dataset  # Store in a dictionary
     
     if cvode_integration:
-        gas = ct.Solution(mech)
+        gas = get_mechanism(mech).new_solution()
         reactor = ct.Reactor(gas, name='Reactor1', energy='off')
         reactor_net = ct.ReactorNet([reactor])
         reactor_net.rtol, reactor_net.atol = 1e-6, 1e-10
@@ -311,7 +390,7 @@ def calculate_error(
     save_path2, 
     error = 'RMSE'
 ):
-    gas = ct.Solution(mech_path)
+    species_names = get_mechanism(mech_path).species_names
 
     with h5py.File(save_path1, 'r') as f1, h5py.File(save_path2, 'r') as f2:
         cvode_group = f1['cvode_integration']
@@ -332,7 +411,7 @@ def calculate_error(
                 
                 print(f"RMSE of ataset: {ds_name}")
                 for dim_idx, rmse_val in enumerate(rmse_per_dim, start=1):
-                    id = gas.species_names[dim_idx - 3]
+                    id = species_names[dim_idx - 3]
                     print(f"  Species {id}: {rmse_val:.6e}")
                 print()
 
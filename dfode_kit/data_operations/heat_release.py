@@ -0,0 +1,53 @@
+import numpy as np
+
+from dfode_kit.mechanism import Mechanism, get_mechanism
+
+def heat_release_rate(states, mech, enthalpy='formation', per_mass=True):
+    """
+    Instantaneous heat release rates of many ``[T, p, Y...]`` states.
+
+    The net production rates are read from one `ct.Solution` per call and
+    weighted with cached species enthalpies, with no reactor integration.
+
+    Parameters
+    ----------
+    states : np.ndarray
+        States ``[T, p, Y...]``, shape (N, 2 + n_species).
+    mech : str or Mechanism
+        Mechanism file or object.
+    enthalpy : {'formation', 'total'}, optional
+        'formation' weights the rates with the formation enthalpies at
+        298.15 K, the chemical heat release used by the augmentation screen
+        and the training loss; 'total' uses the species enthalpies at the
+        state temperature, as `ct.Solution.heat_release_rate` does.
+        Default is 'formation'.
+    per_mass : bool, optional
+        Return W/kg instead of W/m^3. Default is True.
+
+    Returns
+    -------
+    np.ndarray
+        Heat release rates, positive for exothermic states, shape (N,).
+
+    Examples
+    --------
+    >>> qdot = heat_release_rate(np.load('augmented.npy'), 'mechanisms/Burke2012_s9r23.yaml')
+    """
+    if enthalpy not in ('formation', 'total'):
+        raise ValueError(f"Unknown enthalpy '{enthalpy}', expected 'formation' or 'total'.")
+    if not isinstance(mech, Mechanism):
+        mech = get_mechanism(mech)
+    states = np.asarray(states, dtype=np.float64).reshape(-1, 2 + mech.n_species)
+
+    gas = mech.new_solution()
+    molar_enthalpies = mech.formation_enthalpies * mech.molecular_weights
+    qdot = np.empty(states.shape[0])
+    for i, state in enumerate(states):
+        gas.TPY = state[0], state[1], np.clip(state[2:], 0, None)
+        if enthalpy == 'formation':
+            qdot[i] = -(gas.net_production_rates @ molar_enthalpies)
+        else:
+            qdot[i] = gas.heat_release_rate
+        if per_mass:
+            qdot[i] /= gas.density
+    return qdot
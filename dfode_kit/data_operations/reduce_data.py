@@ -0,0 +1,171 @@
+import numpy as np
+
+from dfode_kit.utils import BCT
+
+METHODS = ('grid', 'kmeans')
+
+def reduction_space(states, lam=0.1, bounds=None):
+    """
+    Map ``[T, p, Y...]`` states to the unit cube of ``(T, BCT(Y))``.
+
+    Every column is scaled to [0, 1] with its minimum and maximum (or the
+    given `bounds`), so temperature and each Box-Cox transformed species
+    get the same resolution. Pressure is left out: sampled flames run at one
+    pressure and it does not distinguish thermochemical states.
+
+    Returns
+    -------
+    points : np.ndarray
+        Scaled coordinates, shape (N, n_species + 1).
+    bounds : tuple of np.ndarray
+        Lower and upper values used for the scaling.
+    """
+    points = np.empty((states.shape[0], states.shape[1] - 1))
+    points[:, 0] = states[:, 0]
+    points[:, 1:] = BCT(np.clip(states[:, 2:], 0, 1), lam)
+    if bounds is None:
+        bounds = (points.min(axis=0), points.max(axis=0))
+    lower, upper = bounds
+    points -= lower
+    points /= np.where(upper > lower, upper - lower, 1.0)
+    return points, bounds
+
+def grid_cells(points, n_bins):
+    """Label each point with the index of its cell on a regular grid of `n_bins` per axis."""
+    codes = np.minimum((points * n_bins).astype(np.int64), n_bins - 1)
+    _, cells = np.unique(codes, axis=0, return_inverse=True)
+    return cells.ravel()
+
+def _nearest(points, centers, chunk_size=2**16):
+    """Index of and squared distance to the nearest center of every point."""
+    labels = np.empty(points.shape[0], dtype=np.int64)
+    distances = np.empty(points.shape[0])
+    center_norms = (centers**2).sum(axis=1)
+    for start in range(0, points.shape[0], chunk_size):
+        chunk = points[start:start + chunk_size]
+        d2 = center_norms - 2 * chunk @ centers.T
+        labels[start:start + chunk_size] = d2.argmin(axis=1)
+        distances[start:start + chunk_size] = np.maximum(
+            d2[np.arange(chunk.shape[0]), labels[start:start + chunk_size]] + (chunk**2).sum(axis=1), 0,
+        )
+    return labels, distances
+
+def kmeans_cells(points, n_clusters, batch_size=4096, n_iterations=100, seed=0):
+    """
+    Label each point with its cluster from mini-batch k-means.
+
+    Centers start from a k-means++ draw on a sample of the points and are
+    updated with per-center learning rates from random mini-batches
+    (Sculley, 2010). The final assignment uses all points.
+    """
+    rng = np.random.default_rng(seed)
+    n_points = points.shape[0]
+    n_clusters = min(n_clusters, n_points)
+
+    # k-means++ seeding on a sample
+    sample = points[rng.choice(n_points, size=min(n_points, max(10 * n_clusters, batch_size)), replace=False)]
+    centers = np.empty((n_clusters, points.shape[1]))
+    centers[0] = sample[rng.integers(sample.shape[0])]
+    closest = ((sample - centers[0])**2).sum(axis=1)
+    for k in range(1, n_clusters):
+        total = closest.sum()
+        index = rng.choice(sample.shape[0], p=closest / total) if total > 0 else rng.integers(sample.shape[0])
+        centers[k] = sample[index]
+        closest = np.minimum(closest, ((sample - centers[k])**2).sum(axis=1))
+
+    counts = np.zeros(n_clusters)
+    for _ in range(n_iterations):
+        batch = points[rng.integers(n_points, size=min(batch_size, n_points))]
+        labels, _ = _nearest(batch, centers)
+        for k in np.unique(labels):
+            members = batch[labels == k]
+            counts[k] += members.shape[0]
+            centers[k] += (members - centers[k]).sum(axis=0) / counts[k]
+
+    labels, distances = _nearest(points, centers)
+    return labels, distances
+
+def reduce_states(
+    states,
+    method='grid',
+    n_bins=32,
+    n_clusters=10000,
+    per_cell=1,
+    lam=0.1,
+    seed=0,
+):
+    """
+    Keep a few representatives of every region of thermochemical space.
+
+    States are mapped to the unit cube of ``(T, BCT(Y))`` by
+    `reduction_space` and grouped into cells, either by hashing them onto a
+    regular grid or by mini-batch k-means. Each cell keeps at most
+    `per_cell` states, so near-duplicate reactant and product states
+    collapse to a handful of rows while sparsely populated regions, such as
+    the flame front, are kept whole.
+
+    Parameters
+    ----------
+    states : np.ndarray
+        States ``[T, p, Y...]``, shape (N, 2 + n_species).
+    method : {'grid', 'kmeans'}, optional
+        Cell construction. Default is 'grid'.
+    n_bins : int, optional
+        Grid cells per axis for 'grid'. Default is 32.
+    n_clusters : int, optional
+        Number of clusters for 'kmeans'. Default is 10000.
+    per_cell : int, optional
+        Representatives kept per cell. 'grid' draws them at random, 'kmeans'
+        keeps the states closest to the cluster center. Default is 1.
+    lam : float, optional
+        Box-Cox lambda. Default is 0.1.
+    seed : int, optional
+        Seed of the random draws. Default is 0.
+
+    Returns
+    -------
+    indices : np.ndarray
+        Sorted row indices of the kept states.
+    weights : np.ndarray
+        Number of original states each kept state stands for, i.e. the cell
+        population divided by the number of states kept from the cell. The
+        weights sum to N.
+    n_cells : int
+        Number of occupied cells.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {METHODS}.")
+    if per_cell < 1:
+        raise ValueError("per_cell must be at least 1.")
+
+    points, _ = reduction_space(states, lam)
+    rng = np.random.default_rng(seed)
+    if method == 'grid':
+        cells = grid_cells(points, n_bins)
+        # A random order makes the first members of each cell a random draw
+        order = rng.permutation(points.shape[0])
+    else:
+        cells, distances = kmeans_cells(points, n_clusters, seed=seed)
+        order = np.argsort(distances, kind='stable')
+
+    # Rank of every state within its cell in `order`
+    order = order[np.argsort(cells[order], kind='stable')]
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    sizes = np.diff(np.r_[starts, sorted_cells.shape[0]])
+    rank = np.arange(sorted_cells.shape[0]) - np.repeat(starts, sizes)
+
+    keep = rank < per_cell
+    kept_cells = np.repeat(np.arange(starts.shape[0]), sizes)[keep]
+    kept_per_cell = np.minimum(sizes, per_cell)
+    indices = order[keep]
+    weights = (sizes / kept_per_cell)[kept_cells]
+
+    sort = np.argsort(indices)
+    return indices[sort], weights[sort], starts.shape[0]
+
+def print_reduction_summary(n_input, n_output, n_cells):
+    print(f"Input states:        {n_input}")
+    print(f"Occupied cells:      {n_cells}")
+    print(f"Kept states:         {n_output}")
+    print(f"Compression ratio:   {n_input / max(n_output, 1):.2f}x")
@@ -0,0 +1,280 @@
+import time
+import itertools
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import torch
+import numpy as np
+import cantera as ct
+
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.dfode_core.inference.export import build_reaction_rate_module
+from dfode_kit.dfode_core.inference.batching import batched_forward
+
+class PolynomialThermo:
+    """
+    Vectorised mixture enthalpy and temperature recovery from NASA7 polynomials.
+
+    Parameters
+    ----------
+    mech : str
+        Path to the YAML mechanism file.
+    device : str, optional
+        Device holding the coefficient tensors. Default is 'cpu'.
+    """
+    def __init__(self, mech, device='cpu'):
+        mechanism = get_mechanism(mech)
+        coeffs = torch.as_tensor(mechanism.nasa_coefficients, dtype=torch.float64, device=device)
+        self.T_mid = coeffs[:, 0]
+        self.high = coeffs[:, 1:8]
+        self.low = coeffs[:, 8:15]
+        # Per unit mass instead of per kmol
+        self.R = ct.gas_constant / torch.as_tensor(mechanism.molecular_weights, dtype=torch.float64, device=device)
+
+    def _coeffs(self, T):
+        return torch.where((T < self.T_mid)[..., None], self.low, self.high)
+
+    def enthalpy_mass(self, T, Y):
+        """Mixture enthalpy [J/kg] for temperatures (N,) and mass fractions (N, n_species)."""
+        a = self._coeffs(T[:, None])
+        T = T[:, None]
+        h_RT = (
+            a[..., 0] + T * (a[..., 1] / 2 + T * (a[..., 2] / 3 + T * (a[..., 3] / 4 + T * a[..., 4] / 5)))
+            + a[..., 5] / T
+        )
+        return (Y * self.R * T * h_RT).sum(dim=1)
+
+    def cp_mass(self, T, Y):
+        """Mixture heat capacity at constant pressure [J/kg/K]."""
+        a = self._coeffs(T[:, None])
+        T = T[:, None]
+        cp_R = a[..., 0] + T * (a[..., 1] + T * (a[..., 2] + T * (a[..., 3] + T * a[..., 4])))
+        return (Y * self.R * cp_R).sum(dim=1)
+
+    def temperature(self, h, Y, T_guess, n_iterations=20, tolerance=1e-6):
+        """Solve ``enthalpy_mass(T, Y) == h`` for T with Newton iterations from `T_guess`."""
+        T = T_guess.clone()
+        for _ in range(n_iterations):
+            dT = (self.enthalpy_mass(T, Y) - h) / self.cp_mass(T, Y)
+            T = (T - dT).clamp(200.0, 6000.0)
+            if not (dT.abs() > tolerance).any():
+                break
+        return T
+
+def initial_states(mech, phi, T0, p0, fuel='H2', oxidizer='O2:1, N2:3.76'):
+    """
+    Build premixed initial states on the grid spanned by `phi`, `T0` and `p0`.
+
+    Returns
+    -------
+    conditions : np.ndarray
+        ``[phi, T0, p0]`` of each grid point, shape (n_conditions, 3).
+    states : np.ndarray
+        ``[T, p, Y...]`` of each grid point, shape (n_conditions, 2 + n_species).
+    """
+    gas = get_mechanism(mech).new_solution()
+    conditions = np.array(list(itertools.product(phi, T0, p0)), dtype=np.float64)
+    states = np.empty((conditions.shape[0], 2 + gas.n_species))
+    for i, (eq_ratio, T, p) in enumerate(conditions):
+        gas.set_equivalence_ratio(eq_ratio, fuel, oxidizer)
+        gas.TP = T, p
+        states[i] = [T, p] + list(gas.Y)
+    return conditions, states
+
+@torch.no_grad()
+def nn_rollout(
+    model_path,
+    mech,
+    states,
+    time_step,
+    n_steps,
+    frozen_temperature=0.0,
+    device='cpu',
+    batch_size=None,
+    save_every=1,
+):
+    """
+    Advance many adiabatic constant-pressure 0D reactors with a trained model.
+
+    All reactors are stepped together: one batched network evaluation per
+    step gives the new mass fractions, and the temperature follows from
+    conservation of the initial mixture enthalpy with `PolynomialThermo`.
+    The network sees each reactor's own pressure. Reactors whose state
+    becomes non-finite are frozen at their last finite state.
+
+    Parameters
+    ----------
+    model_path : str
+        Path to the checkpoint written by `train`.
+    mech : str
+        Path to the YAML mechanism file.
+    states : np.ndarray
+        Initial ``[T, p, Y...]`` rows.
+    time_step : float
+        Model time step.
+    n_steps : int
+        Number of steps to take.
+    frozen_temperature : float, optional
+        Reactors at or below this temperature are not advanced. Default is 0.
+    device : str, optional
+        Inference device. Default is 'cpu'.
+    batch_size : int, optional
+        Micro-batch size of the network evaluation, see `batched_forward`.
+    save_every : int, optional
+        Keep every `save_every`-th state in the history. Default is 1.
+
+    Returns
+    -------
+    history : np.ndarray
+        Saved states, shape (n_saved, n_reactors, 2 + n_species).
+    diverged_step : np.ndarray
+        Step at which each reactor became non-finite, or -1.
+    """
+    # Keep each reactor's own pressure, as cvode_rollout integrates at p0
+    module = build_reaction_rate_module(model_path, mech, time_step, frozen_temperature, pressure=0.0, device=device)
+    thermo = PolynomialThermo(mech, device)
+
+    current = torch.as_tensor(states, dtype=torch.float64, device=device).clone()
+    # Unit density turns the module's rates into mass-fraction increments / dt
+    vec = torch.cat((current, torch.ones_like(current[:, :1])), dim=1)
+    h0 = thermo.enthalpy_mass(current[:, 0], current[:, 2:])
+    diverged_step = torch.full((current.shape[0],), -1, dtype=torch.long, device=device)
+
+    history = [current.cpu().numpy().copy()]
+    for step in range(1, n_steps + 1):
+        vec[:, :-1] = current
+        next_Y = current[:, 2:] + batched_forward(module, vec, batch_size) * time_step
+        next_T = thermo.temperature(h0, next_Y, current[:, 0])
+
+        finite = torch.isfinite(next_Y).all(dim=1) & torch.isfinite(next_T) & (diverged_step < 0)
+        diverged_step[~finite & (diverged_step < 0)] = step
+        current[finite, 0] = next_T[finite]
+        current[finite, 2:] = next_Y[finite]
+
+        if step % save_every == 0:
+            history.append(current.cpu().numpy().copy())
+
+    return np.stack(history), diverged_step.cpu().numpy()
+
+def _cvode_trajectory(state, mech, time_step, n_steps, save_every):
+    gas = get_mechanism(mech).new_solution()
+    gas.TPY = state[0], state[1], state[2:]
+    reactor = ct.IdealGasConstPressureReactor(gas, name='R1')
+    reactor_net = ct.ReactorNet([reactor])
+    reactor_net.rtol, reactor_net.atol = 1e-6, 1e-10
+
+    history = [np.array(state, dtype=np.float64)]
+    for step in range(1, n_steps + 1):
+        reactor_net.advance(step * time_step)
+        if step % save_every == 0:
+            history.append(np.array([gas.T, gas.P] + list(gas.Y)))
+    return np.stack(history)
+
+def cvode_rollout(mech, states, time_step, n_steps, n_workers=None, save_every=1):
+    """
+    Reference CVODE trajectories of the same reactors, one process per worker.
+
+    Returns the saved states, shape (n_saved, n_reactors, 2 + n_species), on
+    the same output times as `nn_rollout`.
+    """
+    worker = partial(_cvode_trajectory, mech=str(mech), time_step=time_step, n_steps=n_steps, save_every=save_every)
+    chunksize = max(1, len(states) // (4 * (n_workers or 1)))
+    # Spawn rather than fork, the parent may already run torch threads
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as executor:
+        trajectories = list(executor.map(worker, np.asarray(states), chunksize=chunksize))
+    return np.stack(trajectories, axis=1)
+
+def ignition_delay(times, temperatures, min_rise=100.0):
+    """
+    Time of the steepest temperature rise of each trajectory.
+
+    Trajectories rising by less than `min_rise` K get NaN.
+
+    Parameters
+    ----------
+    times : np.ndarray
+        Output times, shape (n_saved,).
+    temperatures : np.ndarray
+        Temperatures, shape (n_saved, n_reactors).
+    """
+    slope = np.diff(temperatures, axis=0) / np.diff(times)[:, None]
+    delay = 0.5 * (times[1:] + times[:-1])[np.argmax(slope, axis=0)]
+    rise = temperatures.max(axis=0) - temperatures[0]
+    return np.where(rise >= min_rise, delay, np.nan)
+
+def evaluate_rollout(
+    model_path,
+    mech,
+    phi,
+    T0,
+    p0=(101325.0,),
+    time_step=1e-6,
+    n_steps=1000,
+    fuel='H2',
+    oxidizer='O2:1, N2:3.76',
+    frozen_temperature=0.0,
+    device='cpu',
+    batch_size=None,
+    n_workers=None,
+    save_every=1,
+):
+    """
+    Screen a model by rolling 0D reactors forward with it and with CVODE.
+
+    Every combination of `phi`, `T0` and `p0` starts one premixed reactor.
+    The network side advances all reactors at once (`nn_rollout`); the CVODE
+    reference runs in a process pool (`cvode_rollout`).
+
+    Returns
+    -------
+    dict
+        ``conditions`` (n, 3) and ``time`` (n_saved,); ``ignition_delay_nn``
+        and ``ignition_delay_cvode`` (n,); ``final_nn`` and ``final_cvode``
+        (n, 2 + n_species); error-growth curves ``T_error`` (absolute) and
+        ``Y_error`` (RMS over species), both (n_saved, n); ``diverged_step``
+        (n,); and the wall times ``nn_time`` and ``cvode_time`` in seconds.
+    """
+    conditions, states = initial_states(mech, phi, T0, p0, fuel, oxidizer)
+
+    start = time.perf_counter()
+    nn_history, diverged_step = nn_rollout(
+        model_path, mech, states, time_step, n_steps,
+        frozen_temperature=frozen_temperature,
+        device=device,
+        batch_size=batch_size,
+        save_every=save_every,
+    )
+    nn_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cvode_history = cvode_rollout(mech, states, time_step, n_steps, n_workers, save_every)
+    cvode_time = time.perf_counter() - start
+
+    times = np.arange(nn_history.shape[0]) * time_step * save_every
+    return {
+        'conditions': conditions,
+        'time': times,
+        'ignition_delay_nn': ignition_delay(times, nn_history[:, :, 0]),
+        'ignition_delay_cvode': ignition_delay(times, cvode_history[:, :, 0]),
+        'final_nn': nn_history[-1],
+        'final_cvode': cvode_history[-1],
+        'T_error': np.abs(nn_history[:, :, 0] - cvode_history[:, :, 0]),
+        'Y_error': np.sqrt(np.mean((nn_history[:, :, 2:] - cvode_history[:, :, 2:])**2, axis=2)),
+        'diverged_step': diverged_step,
+        'nn_time': nn_time,
+        'cvode_time': cvode_time,
+    }
+
+def print_rollout_summary(results):
+    """Print the per-condition ignition delays and end-of-rollout errors."""
+    print(f"{'phi':>6} {'T0 [K]':>8} {'p0 [Pa]':>10} {'tau_nn [s]':>12} {'tau_cvode [s]':>14} {'T err [K]':>10} {'Y err':>10}")
+    for i, (eq_ratio, T, p) in enumerate(results['conditions']):
+        print(
+            f"{eq_ratio:6.2f} {T:8.1f} {p:10.0f} {results['ignition_delay_nn'][i]:12.4e} "
+            f"{results['ignition_delay_cvode'][i]:14.4e} {results['T_error'][-1, i]:10.3e} {results['Y_error'][-1, i]:10.3e}"
+        )
+    n_diverged = int((results['diverged_step'] >= 0).sum())
+    print(f"Diverged reactors: {n_diverged}/{len(results['conditions'])}")
+    print(f"Wall time: NN {results['nn_time']:.2f} s, CVODE {results['cvode_time']:.2f} s")
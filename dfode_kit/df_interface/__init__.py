@@ -1,4 +1,6 @@
 from .sample_case import df_to_h5
 
 from .flame_configurations import OneDFreelyPropagatingFlameConfig
-from .oneDflame_setup import setup_one_d_flame_case
\ No newline at end of file
+from .oneDflame_setup import setup_one_d_flame_case
+from .flame_sweep import flame_sweep, solve_free_flame
+from .flame_cache import FlameCache
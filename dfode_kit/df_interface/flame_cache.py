@@ -0,0 +1,151 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+
+import cantera as ct
+
+from dfode_kit.mechanism import get_mechanism
+
+CACHE_ENV = 'DFODE_FLAME_CACHE'
+
+def default_cache_dir():
+    """The flame cache directory: ``$DFODE_FLAME_CACHE`` or ``~/.cache/dfode_kit/flames``."""
+    return Path(os.environ.get(CACHE_ENV, Path.home() / '.cache' / 'dfode_kit' / 'flames'))
+
+class FlameCache:
+    """
+    On-disk store of converged laminar premixed flames.
+
+    Each entry holds the full flame solution as a Cantera YAML file, which
+    restores into a `ct.FreeFlame` (and from there into the
+    `ct.SolutionArray` kept by `OneDFreelyPropagatingFlameConfig`), and a
+    JSON record with the flame speed, thickness, the key parameters and
+    whether the flame was solved from scratch or continued from a
+    neighbouring one.
+    The key combines the SHA-256 of the mechanism file, fuel, oxidizer,
+    equivalence ratio, T0, p0, domain width and refine criteria, so editing
+    the mechanism makes its old entries unreachable; `invalidate` and
+    `prune` delete them.
+
+    Parameters
+    ----------
+    root : str or Path, optional
+        Cache directory. Defaults to `default_cache_dir`.
+    """
+    def __init__(self, root=None):
+        self.root = Path(root) if root is not None else default_cache_dir()
+
+    def __repr__(self):
+        return f"FlameCache('{self.root}')"
+
+    @staticmethod
+    def parameters(mech, fuel, oxidizer, eq_ratio, T0, p0, width, refine_criteria):
+        """The normalised parameters an entry is keyed on."""
+        mechanism = get_mechanism(mech)
+        return {
+            'mechanism_hash': mechanism.file_hash,
+            'fuel': fuel.replace(' ', ''),
+            'oxidizer': oxidizer.replace(' ', ''),
+            'eq_ratio': float(eq_ratio),
+            'T0': float(T0),
+            'p0': float(p0),
+            'width': float(width),
+            'refine_criteria': {name: float(value) for name, value in sorted(refine_criteria.items())},
+        }
+
+    @staticmethod
+    def key(parameters):
+        return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()[:32]
+
+    def _paths(self, key):
+        return self.root / f'{key}.yaml', self.root / f'{key}.json'
+
+    def load(self, gas, parameters, width, refine_criteria, scratch_only=False):
+        """
+        Restore the cached flame for `parameters` into a new `ct.FreeFlame`.
+
+        Returns None when there is no complete entry, or with `scratch_only`
+        when the entry was not solved from scratch.
+        """
+        solution_path, record_path = self._paths(self.key(parameters))
+        if not record_path.exists():
+            return None
+        if scratch_only:
+            with open(record_path) as f:
+                # Entries written before the start mode was recorded are of unknown origin
+                if json.load(f).get('start') != 'scratch':
+                    return None
+        flame = ct.FreeFlame(gas, width=width)
+        flame.set_refine_criteria(**refine_criteria)
+        flame.restore(str(solution_path), 'solution')
+        return flame
+
+    def store(self, flame, parameters, mech, flame_speed, flame_thickness, start='scratch'):
+        """
+        Write `flame` and its record; the record is written last and marks the entry complete.
+
+        `start` is 'scratch' or 'neighbour', as returned by `solve_free_flame`.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        key = self.key(parameters)
+        solution_path, record_path = self._paths(key)
+
+        tmp_path = solution_path.with_suffix(f'.{os.getpid()}.tmp.yaml')
+        flame.save(str(tmp_path), name='solution', overwrite=True)
+        os.replace(tmp_path, solution_path)
+
+        record = dict(
+            parameters,
+            key=key,
+            mechanism=str(get_mechanism(mech).path),
+            flame_speed=float(flame_speed),
+            flame_thickness=float(flame_thickness),
+            n_points=len(flame.grid),
+            start=start,
+        )
+        tmp_path = record_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp_path, record_path)
+        return record
+
+    def entries(self):
+        """The records of all complete entries."""
+        if not self.root.exists():
+            return []
+        records = []
+        for record_path in sorted(self.root.glob('*.json')):
+            with open(record_path) as f:
+                records.append(json.load(f))
+        return records
+
+    def _remove(self, record):
+        for path in self._paths(record['key']):
+            path.unlink(missing_ok=True)
+
+    def invalidate(self, mech=None):
+        """
+        Delete the entries of a mechanism file, whatever its contents were
+        when they were written, or every entry when `mech` is None.
+
+        Returns the number of deleted entries.
+        """
+        path = str(Path(mech).resolve()) if mech is not None else None
+        removed = 0
+        for record in self.entries():
+            if path is None or record['mechanism'] == path:
+                self._remove(record)
+                removed += 1
+        return removed
+
+    def prune(self):
+        """Delete the entries whose mechanism file is gone or has changed since; returns their number."""
+        removed = 0
+        for record in self.entries():
+            mechanism = Path(record['mechanism'])
+            # Hash the file directly, an edited mechanism may no longer parse
+            if not mechanism.exists() or hashlib.sha256(mechanism.read_bytes()).hexdigest() != record['mechanism_hash']:
+                self._remove(record)
+                removed += 1
+        return removed
@@ -3,6 +3,10 @@ from dataclasses import dataclass, field
 
 import cantera as ct
 
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.df_interface.flame_cache import FlameCache
+from dfode_kit.df_interface.flame_sweep import solve_free_flame, flame_properties
+
 @dataclass
 class OneDFreelyPropagatingFlameConfig:
     mechanism: str
@@ -33,15 +37,19 @@ class OneDFreelyPropagatingFlameConfig:
     num_output_steps: int = field(init=False, default=None)
     inlet_speed: float = field(init=False, default=None)
     inert_specie: str = field(init=False, default='N2')
+    use_flame_cache: bool = field(init=False, default=True)
+    flame_cache_dir: str = field(init=False, default=None)
     
     
     def __post_init__(self):
         """Post-initialization to set up initial and burnt gas states."""
-        self.initial_gas = ct.Solution(self.mechanism)
+        mech = get_mechanism(self.mechanism)
+
+        self.initial_gas = mech.new_solution()
         self.initial_gas.TP = self.T0, self.p0
         self.initial_gas.set_equivalence_ratio(self.eq_ratio, self.fuel, self.oxidizer)
         
-        self.burnt_gas = ct.Solution(self.mechanism)
+        self.burnt_gas = mech.new_solution()
         self.burnt_gas.TP = self.T0, self.p0
         self.burnt_gas.set_equivalence_ratio(self.eq_ratio, self.fuel, self.oxidizer)
         self.burnt_gas.equilibrate('HP')
@@ -54,31 +62,21 @@ class OneDFreelyPropagatingFlameConfig:
         self.mech_path = Path(self.mechanism).resolve()
 
     def calculate_laminar_flame_properties(self):
-        """Calculate laminar flame speed and thickness."""
-        
-        # Initialize the gas object
-        flame_speed_gas = ct.Solution(self.mechanism)
-        flame_speed_gas.TP = self.T0, self.p0
+        """
+        Calculate laminar flame speed and thickness, loading the flame from the
+        `FlameCache` when it was solved from scratch before; entries continued
+        from a neighbouring flame by `flame_sweep` are solved again.
+        """
         
-        # Set the equivalence ratio
-        flame_speed_gas.set_equivalence_ratio(self.eq_ratio, self.fuel, self.oxidizer)
-
-        # Create and solve the flame
-        width = 0.1
-        flame = ct.FreeFlame(flame_speed_gas, width=width)
-        flame.set_refine_criteria(ratio=3, slope=0.05, curve=0.1, prune=0.0)
-
+        cache = FlameCache(self.flame_cache_dir) if self.use_flame_cache else None
         print("Solving premixed flame...")
-        flame.solve(loglevel=0, auto=True)
+        flame, start = solve_free_flame(self.mechanism, self.fuel, self.oxidizer, self.eq_ratio, self.T0, self.p0, cache=cache, scratch_only=True)
+        if start == 'cache':
+            print(f"Loaded premixed flame from {cache.root}")
 
-        # Access laminar flame speed
-        laminar_flame_speed = flame.velocity[0]
+        # Access laminar flame speed and thickness
+        laminar_flame_speed, laminar_flame_thickness = flame_properties(flame)
         print(f'{"Laminar Flame Speed":<25}:{laminar_flame_speed:>15.10f} m/s')
-
-        # Calculate laminar flame thickness
-        z, T = flame.grid, flame.T
-        grad = (T[1:] - T[:-1]) / (z[1:] - z[:-1])
-        laminar_flame_thickness = (max(T) - min(T)) / max(grad)
         print(f'{"Laminar Flame Thickness":<25}:{laminar_flame_thickness:>15.10f} m')
         
         final_flame = flame.to_solution_array()
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import itertools
+from pathlib import Path
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import cantera as ct
+
+from dfode_kit.mechanism import get_mechanism
+
+FLAME_WIDTH = 0.1
+REFINE_CRITERIA = {'ratio': 3, 'slope': 0.05, 'curve': 0.1, 'prune': 0.0}
+
+def new_free_flame(gas, width=FLAME_WIDTH, refine_criteria=None):
+    """A `ct.FreeFlame` of `width` m for the inlet state of `gas`, with the given refine criteria."""
+    flame = ct.FreeFlame(gas, width=width)
+    flame.set_refine_criteria(**dict(REFINE_CRITERIA, **(refine_criteria or {})))
+    return flame
+
+def flame_properties(flame):
+    """Laminar flame speed [m/s] and thermal thickness [m] of a solved flame."""
+    z, T = flame.grid, flame.T
+    grad = (T[1:] - T[:-1]) / (z[1:] - z[:-1])
+    return flame.velocity[0], (max(T) - min(T)) / max(grad)
+
+def solve_free_flame(
+    mech,
+    fuel,
+    oxidizer,
+    eq_ratio,
+    T0,
+    p0,
+    flame=None,
+    width=FLAME_WIDTH,
+    refine_criteria=None,
+    cache=None,
+    scratch_only=False,
+):
+    """
+    Solve a freely propagating premixed flame, optionally by continuation.
+
+    When `flame` is given, its inlet temperature, composition and pressure
+    are set to the new conditions and the solver restarts from its current
+    converged profiles, which for neighbouring conditions converges several
+    times faster than a solve from scratch. If that fails, or without a
+    `flame`, a new flame is solved with ``auto=True``. With a `cache`, a
+    stored solution for the same conditions is restored instead of solving,
+    and new solutions are stored along with how they were started.
+
+    Parameters
+    ----------
+    mech : str
+        Path to the YAML mechanism file.
+    fuel, oxidizer : str
+        Compositions as accepted by Cantera.
+    eq_ratio, T0, p0 : float
+        Equivalence ratio, inlet temperature [K] and pressure [Pa].
+    flame : ct.FreeFlame, optional
+        Converged flame to continue from; it is modified in place.
+    width : float, optional
+        Domain width [m] of a new flame. Default is 0.1.
+    refine_criteria : dict, optional
+        Arguments of `set_refine_criteria` for a new flame. Defaults to
+        `REFINE_CRITERIA`.
+    cache : FlameCache, optional
+        Flame cache to read from and write to.
+    scratch_only : bool, optional
+        Ignore cached solutions that were continued from a neighbouring
+        flame, so the result matches a solve from scratch; the solve then
+        replaces the cache entry. Default is False.
+
+    Returns
+    -------
+    flame : ct.FreeFlame
+        The solved flame.
+    start : {'cache', 'neighbour', 'scratch'}
+        Where the solution came from.
+
+    Raises
+    ------
+    ct.CanteraError
+        If the solve from scratch does not converge either.
+    """
+    refine_criteria = dict(REFINE_CRITERIA, **(refine_criteria or {}))
+    gas = get_mechanism(mech).new_solution()
+    gas.TP = T0, p0
+    gas.set_equivalence_ratio(eq_ratio, fuel, oxidizer)
+
+    if cache is not None:
+        parameters = cache.parameters(mech, fuel, oxidizer, eq_ratio, T0, p0, width, refine_criteria)
+        cached = cache.load(gas, parameters, width, refine_criteria, scratch_only)
+        if cached is not None:
+            return cached, 'cache'
+
+    start = None
+    if flame is not None:
+        try:
+            flame.P = p0
+            flame.inlet.T = T0
+            flame.inlet.Y = gas.Y
+            flame.solve(loglevel=0, refine_grid=True, auto=False)
+            start = 'neighbour'
+        except ct.CanteraError:
+            pass
+
+    if start is None:
+        flame = new_free_flame(gas, width, refine_criteria)
+        flame.solve(loglevel=0, auto=True)
+        start = 'scratch'
+
+    if cache is not None:
+        cache.store(flame, parameters, mech, *flame_properties(flame), start=start)
+    return flame, start
+
+def continuation_order(phi, T0, p0):
+    """
+    Order the ``(phi, T0, p0)`` grid so consecutive points are neighbours.
+
+    The grid is walked as a serpentine: equivalence ratio fastest, then
+    temperature, then pressure, reversing the direction of the faster axes
+    on every step of a slower one, so each point differs from the previous
+    one in a single parameter by one grid step.
+    """
+    order = []
+    for i, p in enumerate(sorted(p0)):
+        temperatures = sorted(T0) if i % 2 == 0 else sorted(T0, reverse=True)
+        for j, T in enumerate(temperatures):
+            forward = (i * len(T0) + j) % 2 == 0
+            for eq_ratio in (sorted(phi) if forward else sorted(phi, reverse=True)):
+                order.append((eq_ratio, T, p))
+    return order
+
+def _solve_chain(chain, mech, fuel, oxidizer, width, refine_criteria, cache, output_dir):
+    records = []
+    flame = None
+    for index, (eq_ratio, T0, p0) in chain:
+        record = {'index': index, 'eq_ratio': eq_ratio, 'T0': T0, 'p0': p0}
+        start = time.perf_counter()
+        try:
+            flame, start_from = solve_free_flame(
+                mech, fuel, oxidizer, eq_ratio, T0, p0, flame, width, refine_criteria, cache,
+            )
+        except ct.CanteraError as e:
+            # Restart the rest of the chain from scratch
+            flame = None
+            record.update(converged=False, start='scratch', error=str(e).strip().splitlines()[-1])
+        else:
+            flame_speed, flame_thickness = flame_properties(flame)
+            record.update(
+                converged=True,
+                start=start_from,
+                flame_speed=float(flame_speed),
+                flame_thickness=float(flame_thickness),
+                n_points=len(flame.grid),
+                grid=flame.grid.copy(),
+                states=np.column_stack((flame.T, np.full(len(flame.grid), flame.P), flame.Y.T)),
+            )
+            if output_dir is not None:
+                record['path'] = str(Path(output_dir) / f'flame_{index:04d}.yaml')
+                flame.save(record['path'], name='solution', overwrite=True)
+        record['solve_time'] = time.perf_counter() - start
+        records.append(record)
+    return records
+
+def flame_sweep(
+    mech,
+    phi,
+    T0,
+    p0=(101325.0,),
+    fuel='H2',
+    oxidizer='O2:1, N2:3.76',
+    n_workers=None,
+    width=FLAME_WIDTH,
+    refine_criteria=None,
+    cache=None,
+    output_dir=None,
+):
+    """
+    Solve laminar premixed flames on a parameter grid in a process pool.
+
+    The grid points are put in `continuation_order` and the path is cut into
+    one contiguous chain per worker. Each chain starts with a solve from
+    scratch and continues every further point from its neighbour's
+    converged solution (`solve_free_flame`); a point that fails both ways is
+    reported and the chain restarts from scratch at the next point. Points
+    found in the `cache` are restored rather than solved, and the chain
+    continues from them.
+
+    Parameters
+    ----------
+    mech : str
+        Path to the YAML mechanism file.
+    phi, T0, p0 : sequence of float
+        Equivalence ratios, inlet temperatures [K] and pressures [Pa]; every
+        combination is solved.
+    fuel, oxidizer : str, optional
+        Compositions as accepted by Cantera. Defaults are 'H2' and air.
+    n_workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    width : float, optional
+        Domain width [m]. Default is 0.1.
+    refine_criteria : dict, optional
+        Grid refinement criteria. Defaults to `REFINE_CRITERIA`.
+    cache : FlameCache, optional
+        Flame cache shared by the workers.
+    output_dir : str, optional
+        Directory for one Cantera YAML file per converged flame, readable
+        with ``ct.FreeFlame.restore(path, 'solution')``, and
+        ``flame_sweep.json`` with the per-point summary.
+
+    Returns
+    -------
+    list of dict
+        One record per grid point, in ``itertools.product(phi, T0, p0)``
+        order, with the conditions, ``converged``, ``start`` (see
+        `solve_free_flame`), ``solve_time`` and, for converged points, ``flame_speed``,
+        ``flame_thickness``, ``n_points``, ``grid`` and the ``[T, p, Y...]``
+        ``states`` along the flame; failed points carry ``error``.
+    """
+    refine_criteria = dict(REFINE_CRITERIA, **(refine_criteria or {}))
+    if output_dir is not None:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    grid = {point: i for i, point in enumerate(itertools.product(phi, T0, p0))}
+    path = [(grid[point], point) for point in continuation_order(phi, T0, p0)]
+    n_chains = min(n_workers or os.cpu_count() or 1, len(path))
+    chains = [[path[i] for i in chain] for chain in np.array_split(np.arange(len(path)), n_chains)]
+
+    worker = partial(
+        _solve_chain,
+        mech=str(mech), fuel=fuel, oxidizer=oxidizer, width=width,
+        refine_criteria=refine_criteria, cache=cache, output_dir=output_dir,
+    )
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_chains) as executor:
+        records = sorted(itertools.chain.from_iterable(executor.map(worker, chains)), key=lambda r: r['index'])
+    wall_time = time.perf_counter() - start
+
+    if output_dir is not None:
+        summary = [{k: v for k, v in r.items() if k not in ('grid', 'states')} for r in records]
+        with open(Path(output_dir) / 'flame_sweep.json', 'w') as f:
+            json.dump({'wall_time': wall_time, 'n_workers': n_chains, 'flames': summary}, f, indent=2)
+    return records
+
+def print_sweep_summary(records):
+    """Print the flame properties, solve times and failures of a sweep."""
+    print(f"{'phi':>6} {'T0 [K]':>8} {'p0 [Pa]':>10} {'S_L [m/s]':>10} {'delta [m]':>11} {'time [s]':>9} {'start':>9}")
+    for r in records:
+        if r['converged']:
+            print(
+                f"{r['eq_ratio']:6.2f} {r['T0']:8.1f} {r['p0']:10.0f} {r['flame_speed']:10.4f} "
+                f"{r['flame_thickness']:11.4e} {r['solve_time']:9.2f} {r['start']:>9}"
+            )
+        else:
+            print(f"{r['eq_ratio']:6.2f} {r['T0']:8.1f} {r['p0']:10.0f} {'failed':>10} {'':>11} {r['solve_time']:9.2f}  {r['error']}")
+    failed = sum(not r['converged'] for r in records)
+    cached = sum(r['start'] == 'cache' for r in records)
+    print(f"Converged flames: {len(records) - failed}/{len(records)} ({cached} from cache), failures: {failed}")
+    print(f"Total solve time: {sum(r['solve_time'] for r in records):.2f} s")
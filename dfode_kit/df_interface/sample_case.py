@@ -2,9 +2,9 @@ from pathlib import Path
 
 import h5py
 import numpy as np
-import cantera as ct
 
-from dfode_kit.utils import is_number, read_openfoam_scalar
+from dfode_kit.utils import is_number, read_openfoam_scalar, storage_dtype
+from dfode_kit.mechanism import get_mechanism
 
 def gather_species_arrays(species_names, directory_path) -> np.ndarray:
     """
@@ -88,7 +88,7 @@ def gather_species_arrays(species_names, directory_path) -> np.ndarray:
     else:
         raise ValueError("No valid species arrays found to concatenate.")
 
-def df_to_h5(root_dir, mechanism, hdf5_file_path, include_mesh=True):
+def df_to_h5(root_dir, mechanism, hdf5_file_path, include_mesh=True, dtype='float64'):
     """
     Iterate through directories in root_dir, concatenate arrays, and save to an HDF5 file.
 
@@ -102,6 +102,9 @@ def df_to_h5(root_dir, mechanism, hdf5_file_path, include_mesh=True):
         The path where the HDF5 file will be saved.
     include_mesh : bool, optional
         Whether to include mesh data in the HDF5 file (default is True).
+    dtype : {'float64', 'float32'}, optional
+        Storage dtype of the scalar fields (default is 'float64'). The mesh
+        is always stored in float64.
 
     Returns
     -------
@@ -129,8 +132,8 @@ def df_to_h5(root_dir, mechanism, hdf5_file_path, include_mesh=True):
     root_path = Path(root_dir).resolve()
     mechanism = Path(mechanism).resolve()
     hdf5_file_path = Path(hdf5_file_path)
-    gas = ct.Solution(mechanism)
-    species_names = ['T', 'p'] + gas.species_names
+    dtype = storage_dtype(dtype)
+    species_names = ['T', 'p'] + get_mechanism(mechanism).species_names
     print(f"Species names: {species_names}")
     
     
@@ -155,7 +158,7 @@ def df_to_h5(root_dir, mechanism, hdf5_file_path, include_mesh=True):
                 concatenated_array = gather_species_arrays(species_names, dir_path)
                 
                 # Create a dataset in HDF5 with the directory path as the key
-                scalar_group.create_dataset(str(dir_path.name), data=concatenated_array)
+                scalar_group.create_dataset(str(dir_path.name), data=concatenated_array.astype(dtype, copy=False))
             except ValueError as e:
                 print(f"Error processing directory {dir_path}: {e}")
         
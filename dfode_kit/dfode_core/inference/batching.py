@@ -0,0 +1,104 @@
+import time
+
+import torch
+
+DEFAULT_BATCH_CANDIDATES = tuple(2**k for k in range(8, 18))
+
+def set_threads(intra_op_threads=None, inter_op_threads=None):
+    """
+    Set the PyTorch intra-op and inter-op CPU thread pools.
+
+    `None` leaves a setting unchanged. The inter-op pool can only be resized
+    before the first parallel operation of the process; later requests are
+    ignored with a message instead of raising.
+    """
+    if intra_op_threads is not None:
+        torch.set_num_threads(int(intra_op_threads))
+    if inter_op_threads is not None and torch.get_num_interop_threads() != int(inter_op_threads):
+        try:
+            torch.set_num_interop_threads(int(inter_op_threads))
+        except RuntimeError as e:
+            print(f"Could not set inter-op threads to {inter_op_threads}: {e}")
+
+@torch.no_grad()
+def batched_forward(fn, inputs, batch_size=None, out=None):
+    """
+    Apply `fn` to `inputs` in row chunks of at most `batch_size`.
+
+    Peak memory is bounded by the intermediate tensors of one micro-batch
+    instead of the whole array. Results are written into `out`, which is
+    allocated from the first chunk when not given.
+
+    Parameters
+    ----------
+    fn : callable
+        Row-wise function, e.g. a network or `ReactionRateModule`.
+    inputs : torch.Tensor
+        2D input tensor.
+    batch_size : int, optional
+        Micro-batch size. If None, `fn` is applied to all rows at once.
+    out : torch.Tensor, optional
+        Output tensor with one row per input row.
+
+    Returns
+    -------
+    torch.Tensor
+        The outputs.
+    """
+    n_rows = inputs.shape[0]
+    if batch_size is None or batch_size >= n_rows:
+        result = fn(inputs)
+        if out is None:
+            return result
+        out.copy_(result)
+        return out
+
+    for start in range(0, n_rows, batch_size):
+        stop = min(start + batch_size, n_rows)
+        result = fn(inputs[start:stop])
+        if out is None:
+            out = torch.empty((n_rows,) + tuple(result.shape[1:]), dtype=result.dtype, device=result.device)
+        out[start:stop] = result
+    return out
+
+def tune_batch_size(fn, inputs, candidates=DEFAULT_BATCH_CANDIDATES, n_repeats=3):
+    """
+    Pick the micro-batch size with the highest throughput on this host.
+
+    Each candidate no larger than the number of sample rows is timed with
+    `batched_forward` on `inputs`; the best of `n_repeats` runs is kept.
+
+    Parameters
+    ----------
+    fn : callable
+        Row-wise function to tune for.
+    inputs : torch.Tensor
+        Representative sample of inputs.
+    candidates : sequence of int, optional
+        Batch sizes to try. Default is powers of two from 256 to 131072.
+    n_repeats : int, optional
+        Number of timed runs per candidate. Default is 3.
+
+    Returns
+    -------
+    best : int
+        The fastest batch size.
+    throughput : dict
+        Rows per second for each candidate tried.
+    """
+    n_rows = inputs.shape[0]
+    candidates = [c for c in candidates if c <= n_rows] or [n_rows]
+
+    throughput = {}
+    out = None
+    for batch_size in candidates:
+        out = batched_forward(fn, inputs, batch_size, out)
+        timings = []
+        for _ in range(n_repeats):
+            start = time.perf_counter()
+            batched_forward(fn, inputs, batch_size, out)
+            timings.append(time.perf_counter() - start)
+        throughput[batch_size] = n_rows / min(timings)
+
+    best = max(throughput, key=throughput.get)
+    return best, throughput
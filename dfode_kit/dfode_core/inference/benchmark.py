@@ -0,0 +1,221 @@
+import time
+import json
+import resource
+import platform
+import itertools
+import multiprocessing
+
+import torch
+import numpy as np
+import cantera as ct
+
+from dfode_kit.utils import BCT, load_checkpoint
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.dfode_core.model.build import build_model, model_from_checkpoint, checkpoint_architecture
+from dfode_kit.dfode_core.inference.export import ReactionRateModule
+from dfode_kit.dfode_core.inference.quantize import quantize_model
+from dfode_kit.dfode_core.inference.batching import set_threads
+from dfode_kit.data_operations.rollout import initial_states, cvode_rollout
+
+MODES = ('eager', 'scripted', 'quantized')
+DTYPES = ('fp32', 'bf16')
+
+def synthetic_states(mech, n_cells, seed=0):
+    """
+    Draw solver states ``[T, p, Y..., rho]`` from 0D ignition trajectories.
+
+    Premixed reactors with equivalence ratios 0.5 to 2 and initial
+    temperatures 1000 to 1400 K are integrated through ignition; `n_cells`
+    rows are sampled from the visited states.
+    """
+    _, states = initial_states(mech, [0.5, 1.0, 2.0], [1000.0, 1200.0, 1400.0], [ct.one_atm])
+    visited = cvode_rollout(mech, states, 1e-5, 100, n_workers=1).reshape(-1, states.shape[1])
+
+    rng = np.random.default_rng(seed)
+    rows = visited[rng.integers(0, visited.shape[0], size=n_cells)]
+    molecular_weights = get_mechanism(mech).molecular_weights
+    rho = rows[:, 1] / (ct.gas_constant * rows[:, 0] * (rows[:, 2:] / molecular_weights).sum(axis=1))
+    return np.hstack((rows, rho[:, None]))
+
+def _synthetic_checkpoint(layers, states, seed=0, architecture='mlp'):
+    """A checkpoint with random weights and input statistics taken from `states`."""
+    torch.manual_seed(seed)
+    architecture = {'type': architecture, 'layers': list(layers), 'activation': 'gelu'}
+    features = states[:, :-1].copy()
+    features[:, 2:] = BCT(features[:, 2:])
+    return {
+        'net': build_model(architecture).state_dict(),
+        'data_in_mean': features.mean(axis=0),
+        'data_in_std': features.std(axis=0) + 1e-12,
+        'data_target_mean': np.zeros(layers[-1]),
+        'data_target_std': np.full(layers[-1], 1e-3),
+        'architecture': architecture,
+    }
+
+def build_benchmark_module(checkpoint, mode='eager', dtype='fp32', device='cpu'):
+    """
+    Wrap a checkpoint into a `ReactionRateModule` in the requested execution mode.
+
+    'scripted' freezes the TorchScript module like `export_model`;
+    'quantized' applies dynamic int8 quantization (CPU, float32 only).
+    """
+    model = model_from_checkpoint(checkpoint)
+    if mode == 'quantized':
+        if dtype != 'fp32':
+            raise ValueError("The quantized mode only runs with dtype 'fp32'.")
+        model = quantize_model(model, 'int8')
+    elif dtype != 'fp32':
+        model = quantize_model(model, dtype)
+    elif mode not in ('eager', 'scripted'):
+        raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}.")
+
+    module = ReactionRateModule(model, checkpoint, time_step=1e-6).eval().to(device=device)
+    if mode == 'scripted':
+        with torch.no_grad():
+            module = torch.jit.freeze(torch.jit.script(module))
+    return module
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+@torch.no_grad()
+def _run_config(task):
+    checkpoint, states, config, n_warmup, n_repeats, device = task
+    set_threads(config['threads'])
+    baseline_mb = _peak_rss_mb()
+
+    module = build_benchmark_module(checkpoint, config['mode'], config['dtype'], device)
+    inputs = torch.from_numpy(states[:config['batch_size']]).to(device=device)
+    synchronize = torch.cuda.synchronize if torch.device(device).type == 'cuda' else (lambda: None)
+    if torch.device(device).type == 'cuda':
+        torch.cuda.reset_peak_memory_stats()
+
+    for _ in range(n_warmup):
+        module(inputs)
+    synchronize()
+
+    latencies = np.empty(n_repeats)
+    for i in range(n_repeats):
+        start = time.perf_counter()
+        module(inputs)
+        synchronize()
+        latencies[i] = time.perf_counter() - start
+
+    result = dict(config)
+    result.update({
+        'cells_per_second': config['batch_size'] / float(np.median(latencies)),
+        'latency_p50': float(np.percentile(latencies, 50)),
+        'latency_p99': float(np.percentile(latencies, 99)),
+        'peak_rss_mb': _peak_rss_mb(),
+        'peak_rss_delta_mb': _peak_rss_mb() - baseline_mb,
+    })
+    if torch.device(device).type == 'cuda':
+        result['peak_device_mb'] = torch.cuda.max_memory_allocated() / 2**20
+    return result
+
+def benchmark_inference(
+    mech,
+    model_path=None,
+    layers=None,
+    architecture='mlp',
+    batch_sizes=(1024, 16384, 131072),
+    threads=(1, torch.get_num_threads()),
+    dtypes=DTYPES,
+    modes=MODES,
+    device='cpu',
+    n_warmup=3,
+    n_repeats=50,
+    seed=0,
+):
+    """
+    Time the reaction-rate module of a network over a grid of settings.
+
+    Every combination of batch size, thread count, dtype and mode runs in a
+    fresh process, so thread pools start clean and the peak resident memory
+    belongs to that configuration alone. Inputs are synthetic solver states
+    from `synthetic_states`. Combinations the modes do not support
+    (quantized with bf16 or for networks without linear layers, or
+    quantized/bf16 on GPUs) are skipped.
+
+    Parameters
+    ----------
+    mech : str
+        Path to the YAML mechanism file.
+    model_path : str, optional
+        Checkpoint written by `train`.
+    layers : list of int, optional
+        Hidden layer widths of a randomly initialised network, used when no
+        `model_path` is given, e.g. ``[400, 400, 400, 400]``.
+    architecture : {'mlp', 'residual', 'ensemble'}, optional
+        Network type of the randomly initialised network. Default is 'mlp'.
+    batch_sizes, threads : sequence of int, optional
+        Cells per call and intra-op thread counts to try.
+    dtypes : sequence of {'fp32', 'bf16'}, optional
+        Network dtypes to try.
+    modes : sequence of {'eager', 'scripted', 'quantized'}, optional
+        Execution modes to try.
+    device : str, optional
+        Inference device. Default is 'cpu'.
+    n_warmup, n_repeats : int, optional
+        Untimed and timed calls per configuration. Defaults are 3 and 50.
+    seed : int, optional
+        Seed for the synthetic states and random weights.
+
+    Returns
+    -------
+    dict
+        Host and model description plus one record per configuration with
+        ``cells_per_second``, ``latency_p50``, ``latency_p99`` (seconds) and
+        ``peak_rss_mb``.
+    """
+    n_species = get_mechanism(mech).n_species
+    states = synthetic_states(mech, max(batch_sizes), seed)
+    if model_path is not None:
+        checkpoint = load_checkpoint(model_path)
+    elif layers is not None:
+        checkpoint = _synthetic_checkpoint([2 + n_species] + list(layers) + [n_species - 1], states, seed, architecture)
+    else:
+        raise ValueError("Either model_path or layers is required.")
+
+    on_cpu = torch.device(device).type == 'cpu'
+    # Dynamic int8 quantization only covers torch.nn.Linear layers
+    quantizable = any(isinstance(module, torch.nn.Linear) for module in model_from_checkpoint(checkpoint).modules())
+    configs = [
+        {'batch_size': batch_size, 'threads': n_threads, 'dtype': dtype, 'mode': mode}
+        for batch_size, n_threads, dtype, mode in itertools.product(batch_sizes, threads, dtypes, modes)
+        if not (mode == 'quantized' and (dtype != 'fp32' or not quantizable))
+        and (on_cpu or (mode != 'quantized' and dtype == 'fp32'))
+    ]
+
+    tasks = [(checkpoint, states, config, n_warmup, n_repeats, device) for config in configs]
+    results = []
+    with multiprocessing.get_context('spawn').Pool(1, maxtasksperchild=1) as pool:
+        for result in pool.imap(_run_config, tasks):
+            print(
+                f"batch {result['batch_size']:>7} threads {result['threads']:>3} {result['dtype']:>5} "
+                f"{result['mode']:>9}: {result['cells_per_second']:12.4e} cells/s, "
+                f"p50 {result['latency_p50'] * 1e3:8.3f} ms, p99 {result['latency_p99'] * 1e3:8.3f} ms, "
+                f"peak {result['peak_rss_mb']:8.1f} MB"
+            )
+            results.append(result)
+
+    return {
+        'host': {
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': multiprocessing.cpu_count(),
+            'python': platform.python_version(),
+            'torch': torch.__version__,
+            'device': str(device),
+        },
+        'mechanism': str(mech),
+        'model': model_path,
+        'architecture': checkpoint_architecture(checkpoint),
+        'results': results,
+    }
+
+def save_benchmark(report, output_path):
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved benchmark results to {output_path}")
@@ -0,0 +1,105 @@
+import torch
+import numpy as np
+
+from dfode_kit.mechanism import Mechanism, get_mechanism
+
+class ElementProjection:
+    """
+    Minimal-norm projection of mass-fraction increments onto element conservation.
+
+    With ``E`` the element mass fraction of each species (n_species x
+    n_elements), an increment ``dY`` conserves every element when
+    ``dY @ E = 0``. The smallest correction achieving this, measured in the
+    norm weighted by ``1 / w`` over the species allowed to change, is the
+    linear map ``dY @ P`` with
+
+        ``P = I - E (E^T W E)^+ E^T W``,  ``W = diag(w)``.
+
+    `P` is precomputed once, so correcting a whole batch is one matrix
+    multiply. Since each row of ``E`` sums to one, conserving the elements
+    also conserves the total mass. Rates are increments scaled by
+    ``rho / dt``, so the same projection applies to them unchanged.
+
+    Elements contained in none of the weighted species (e.g. Ar when only
+    N2, H2 and O2 absorb the correction) are left out of the constraint.
+
+    Parameters
+    ----------
+    element_matrix : np.ndarray
+        Element mass fraction of each species, shape (n_species, n_elements).
+    weights : np.ndarray, optional
+        Non-negative per-species weights. Species with zero weight are left
+        untouched. Default is uniform weights.
+
+    Raises
+    ------
+    ValueError
+        If the species with a non-zero weight cannot balance the elements
+        they contain independently.
+    """
+    def __init__(self, element_matrix, weights=None):
+        E = np.asarray(element_matrix, dtype=np.float64)
+        n_species = E.shape[0]
+        weights = np.ones(n_species) if weights is None else np.asarray(weights, dtype=np.float64)
+        if weights.shape != (n_species,) or (weights < 0).any():
+            raise ValueError("weights must hold one non-negative value per species.")
+
+        self.element_matrix = E
+        E = E[:, (E[weights > 0] > 0).any(axis=0)]
+        if np.linalg.matrix_rank(E[weights > 0]) < np.linalg.matrix_rank(E):
+            raise ValueError("The weighted species cannot balance the elements they contain.")
+
+        WE = weights[:, None] * E
+        self.matrix = np.eye(n_species) - E @ np.linalg.pinv(E.T @ WE) @ WE.T
+        self._tensors = {}
+
+    @classmethod
+    def from_mechanism(cls, mech, species=None, element_matrix=None):
+        """
+        Build the projection from a mechanism file or `Mechanism`.
+
+        Parameters
+        ----------
+        mech : str or Mechanism
+            The mechanism.
+        species : list of str, optional
+            Species allowed to absorb the correction, e.g. ``['N2', 'H2', 'O2']``.
+            If None, all species share it.
+        element_matrix : np.ndarray, optional
+            Element mass fractions to use instead of the mechanism's
+            `element_mass_matrix`.
+        """
+        mechanism = mech if isinstance(mech, Mechanism) else get_mechanism(mech)
+        weights = None
+        if species is not None:
+            weights = np.zeros(mechanism.n_species)
+            weights[[mechanism.species_names.index(name) for name in species]] = 1.0
+        if element_matrix is None:
+            element_matrix = mechanism.element_mass_matrix
+        return cls(element_matrix, weights)
+
+    def as_tensor(self, device='cpu', dtype=torch.float64):
+        """Return `matrix` as a tensor, cached per device and dtype."""
+        key = (torch.device(device), dtype)
+        if key not in self._tensors:
+            self._tensors[key] = torch.as_tensor(self.matrix, dtype=dtype, device=device)
+        return self._tensors[key]
+
+    def __call__(self, increments):
+        """
+        Project a batch of increments or rates, shape (n_rows, n_species).
+
+        NumPy arrays and tensors are both accepted; tensors are multiplied on
+        their own device.
+        """
+        if isinstance(increments, torch.Tensor):
+            return increments @ self.as_tensor(increments.device, increments.dtype)
+        return increments @ self.matrix
+
+    def apply(self, Y_in, Y_out):
+        """Return `Y_out` corrected so that the step from `Y_in` conserves elements."""
+        return Y_in + self(Y_out - Y_in)
+
+    def imbalance(self, Y_in, Y_out):
+        """Element mass fraction change of each row, shape (n_rows, n_elements)."""
+        return (Y_out - Y_in) @ self.element_matrix
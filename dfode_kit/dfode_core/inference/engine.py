@@ -0,0 +1,308 @@
+from pathlib import Path
+
+import torch
+import numpy as np
+
+from dfode_kit.utils import read_openfoam_dict, openfoam_switch, load_checkpoint
+from dfode_kit.data_operations.h5_kit import cvode_next_Y
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.dfode_core.inference.export import build_reaction_rate_module
+from dfode_kit.dfode_core.inference.batching import batched_forward, set_threads, tune_batch_size
+from dfode_kit.dfode_core.inference.router import OODRouter
+from dfode_kit.dfode_core.inference.conservation import ElementProjection
+
+class InferenceEngine:
+    """
+    Solver-side chemistry inference configured once per process.
+
+    The engine owns everything the posteriori `inference.py` scripts used to
+    rebuild on every call: the network, the normalisation constants and the
+    optional element-conservation projection all live on the inference device, and
+    the input/output tensors are reused across calls. Buffers grow to the
+    largest batch seen so far; on GPUs the host-side staging buffers are
+    pinned so transfers can run asynchronously.
+
+    Parameters
+    ----------
+    model_path : str
+        Path to the checkpoint written by `train`.
+    mech_path : str
+        Path to the YAML mechanism file.
+    time_step : float
+        Inference time step used to convert mass-fraction increments to rates.
+    frozen_temperature : float, optional
+        Cells at or below this temperature are skipped and get zero rates. If
+        None, every cell is passed through the network. Default is None.
+    device : str, optional
+        Inference device. Default is 'cpu'.
+    pressure : float, optional
+        Pressure imposed on the network input, see `ReactionRateModule`.
+        Default is 101325.
+    conserve_elements : bool, optional
+        Project the rates onto element conservation with the
+        `ElementProjection` built from the mechanism. Default is False.
+    element_matrix : str or np.ndarray, optional
+        Element mass fraction of each species, shape (n_species, n_elements),
+        or the path of a `.npy` file holding it. Replaces the matrix built
+        from the mechanism and implies `conserve_elements`.
+    correction_species : list of str, optional
+        Species absorbing the element imbalance. If None, the minimal-norm
+        correction is shared by all species.
+    verbose : bool, optional
+        Print the number of inferred cells on each call. Default is False.
+    precision : {'fp32', 'bf16', 'int8'}, optional
+        Network precision on CPU. Reduced precisions are only enabled if they
+        pass the `check_precision` accuracy gate on `gate_data`; otherwise the
+        engine keeps float32. Default is 'fp32'.
+    gate_data : str or np.ndarray, optional
+        Held-out labeled data for the accuracy gate. Required with a reduced
+        `precision`.
+    max_degradation : float, optional
+        Accuracy gate threshold, see `check_precision`. Default is 0.1.
+    batch_size : int or 'auto', optional
+        Micro-batch size bounding the memory of one network evaluation. 'auto'
+        picks the fastest size for this host and model at construction. If
+        None, all cells are evaluated at once. Default is None.
+    intra_op_threads, inter_op_threads : int, optional
+        PyTorch CPU thread pool sizes, see `set_threads`.
+    hybrid : bool, optional
+        Send cells outside the training envelope stored in the checkpoint to
+        CVODE instead of the network. The `router` attribute keeps the
+        per-call fraction of routed cells. Default is False.
+
+    Examples
+    --------
+    >>> engine = InferenceEngine.from_properties('constant/CanteraTorchProperties')
+    >>> def inference(vec0):
+    ...     return engine.inference(vec0)
+    """
+    def __init__(
+        self,
+        model_path,
+        mech_path,
+        time_step,
+        frozen_temperature=None,
+        device='cpu',
+        pressure=101325.0,
+        conserve_elements=False,
+        element_matrix=None,
+        correction_species=None,
+        verbose=False,
+        precision='fp32',
+        gate_data=None,
+        max_degradation=0.1,
+        batch_size=None,
+        intra_op_threads=None,
+        inter_op_threads=None,
+        hybrid=False,
+    ):
+        self.device = torch.device(device)
+        self.mech = get_mechanism(mech_path)
+        self.n_species = self.mech.n_species
+        self.n_cols = 3 + self.n_species
+        self.frozen_temperature = frozen_temperature
+        self.verbose = verbose
+
+        set_threads(intra_op_threads, inter_op_threads)
+
+        self.module = build_reaction_rate_module(
+            model_path, mech_path, time_step,
+            frozen_temperature=frozen_temperature or 0.0,
+            pressure=pressure,
+            device=self.device,
+            precision=precision,
+            gate_data=gate_data,
+            max_degradation=max_degradation,
+        )
+        self.precision = self.module.precision
+
+        self.mech_path = mech_path
+        self.time_step = float(time_step)
+        self.router = None
+        if hybrid:
+            self.router = OODRouter.from_checkpoint(load_checkpoint(model_path))
+
+        self.projection = None
+        self.correction = None
+        if conserve_elements or element_matrix is not None:
+            if isinstance(element_matrix, (str, Path)):
+                element_matrix = np.load(element_matrix)
+            self.projection = ElementProjection.from_mechanism(self.mech, correction_species, element_matrix)
+            self.correction = self.projection.as_tensor(self.device)
+
+        self._staged = self.device.type != 'cpu'
+        self._pin = self.device.type == 'cuda'
+        self._capacity = 0
+
+        if batch_size == 'auto':
+            sample = torch.rand(2**14, self.n_cols, dtype=torch.float64, device=self.device)
+            sample[:, 0] = sample[:, 0] * 2000 + 300
+            batch_size, _ = tune_batch_size(self._rates, sample)
+            print(f"Using inference batch size {batch_size}")
+        self.batch_size = batch_size
+
+    def _reserve(self, n_rows):
+        """Grow the reusable buffers so they hold at least `n_rows` cells."""
+        if n_rows <= self._capacity:
+            return
+
+        self._out = torch.empty((n_rows, self.n_species), dtype=torch.float64, device=self.device)
+        if self._staged:
+            self._in = torch.empty((n_rows, self.n_cols), dtype=torch.float64, device=self.device)
+            self._host_in = torch.empty((n_rows, self.n_cols), dtype=torch.float64, pin_memory=self._pin)
+            self._host_out = torch.empty((n_rows, self.n_species), dtype=torch.float64, pin_memory=self._pin)
+        self._capacity = n_rows
+
+    def _route_to_cvode(self, states, rows, out):
+        """Overwrite the rates of out-of-distribution `rows` with CVODE results."""
+        module = self.module
+        candidates = states[rows].abs()
+        features, _ = module.features(candidates)
+
+        ood = self.router.route(features)
+        if self.verbose:
+            print(f'cells routed to CVODE: {int(ood.sum())}')
+        if not ood.any():
+            return
+
+        rows = rows[ood]
+        cvode_states = candidates[ood].cpu().numpy()
+        Y = cvode_states[:, 2:-1]
+        next_Y = cvode_next_Y(cvode_states[:, :-1], self.mech_path, self.time_step)
+        rates = (next_Y - Y) * cvode_states[:, -1:] / self.time_step
+        out[rows] = torch.from_numpy(rates).to(device=out.device)
+
+    def _rates(self, states):
+        rates = self.module(states)
+        if self.correction is not None:
+            rates = rates @ self.correction
+        return rates
+
+    @torch.no_grad()
+    def _infer(self, states, host_out=None):
+        """
+        Run the engine on a CPU tensor of states, writing into `host_out` if given.
+
+        On CPU the rates are written straight into `host_out`; on other
+        devices the states go through the staging buffers.
+        """
+        n_rows = states.shape[0]
+        if self._staged or host_out is None:
+            self._reserve(n_rows)
+
+        if self._staged:
+            self._host_in[:n_rows].copy_(states)
+            states = self._in[:n_rows]
+            states.copy_(self._host_in[:n_rows], non_blocking=self._pin)
+
+        out = self._out[:n_rows] if self._staged or host_out is None else host_out
+        if self.frozen_temperature is None:
+            if self.verbose:
+                print(f'real inference points number: {n_rows}')
+            batched_forward(self._rates, states, self.batch_size, out)
+            if self.router is not None:
+                self._route_to_cvode(states, torch.arange(n_rows, device=states.device), out)
+        else:
+            mask = states[:, 0].abs() > self.frozen_temperature
+            active = states[mask]
+            if self.verbose:
+                print(f'real inference points number: {active.shape[0]}')
+            out.zero_()
+            out[mask] = batched_forward(self._rates, active, self.batch_size)
+            if self.router is not None:
+                self._route_to_cvode(states, mask.nonzero().flatten(), out)
+
+        if self._staged:
+            if host_out is None:
+                host_out = self._host_out[:n_rows]
+            host_out.copy_(out)
+            return host_out
+        return out
+
+    def inference(self, vec0, out=None):
+        """
+        Compute net production rates for the flattened solver state.
+
+        Parameters
+        ----------
+        vec0 : np.ndarray
+            Flattened cell states, ``n_cells * (3 + n_species)`` values laid
+            out as ``[T, p, Y_1 ... Y_n, rho]`` per cell.
+        out : np.ndarray, optional
+            Contiguous float64 array with ``n_cells * n_species`` values that
+            receives the rates.
+
+        Returns
+        -------
+        np.ndarray
+            Net production rates of shape (n_cells, n_species) in kg/m^3/s.
+            Without `out` the array is a view of an internal buffer and is
+            overwritten by the next call.
+        """
+        states = torch.from_numpy(np.ascontiguousarray(vec0, dtype=np.float64)).view(-1, self.n_cols)
+        if out is not None:
+            out = torch.from_numpy(out).view(-1, self.n_species)
+        return self._infer(states, out).numpy()
+
+    def register_buffers(self, states, rates):
+        """
+        Register caller-owned state and rate buffers for `inference_inplace`.
+
+        Both arguments may be any writable object exposing the buffer
+        protocol with float64 data -- NumPy arrays, `memoryview` objects or
+        the `buf` of a `multiprocessing.shared_memory.SharedMemory` block
+        (see `SharedStateBuffers`). The engine keeps views, never copies.
+
+        Parameters
+        ----------
+        states : buffer
+            Room for ``max_cells * (3 + n_species)`` values laid out as in
+            `inference`.
+        rates : buffer
+            Room for ``max_cells * n_species`` values.
+        """
+        self._states_view = torch.frombuffer(states, dtype=torch.float64).view(-1, self.n_cols)
+        self._rates_view = torch.frombuffer(rates, dtype=torch.float64).view(-1, self.n_species)
+        if self._states_view.shape[0] != self._rates_view.shape[0]:
+            raise ValueError("The state and rate buffers must hold the same number of cells.")
+
+    def inference_inplace(self, n_cells=None):
+        """
+        Read the first `n_cells` states from the registered buffer and write
+        their rates into the registered rate buffer.
+
+        No array is created for the inputs or outputs; on CPU the rates are
+        written directly into the caller's memory.
+        """
+        if n_cells is None:
+            n_cells = self._states_view.shape[0]
+        self._infer(self._states_view[:n_cells], self._rates_view[:n_cells])
+
+    @classmethod
+    def from_properties(cls, properties_path='constant/CanteraTorchProperties', use_frozen_temperature=True, **kwargs):
+        """
+        Build an engine from a DeepFlame `CanteraTorchProperties` dictionary.
+
+        Relative model and mechanism paths are resolved against the case
+        directory (the parent of `constant/`). `GPU on` selects `cuda:0` when
+        available and `log on` enables the per-call cell count. Further
+        keyword arguments are passed to the constructor and take precedence.
+        """
+        properties_path = Path(properties_path).resolve()
+        case_path = properties_path.parent.parent
+        properties = read_openfoam_dict(properties_path)
+        torch_settings = properties['TorchSettings']
+
+        use_gpu = openfoam_switch(torch_settings.get('GPU', 'off'))
+        settings = {
+            'model_path': case_path / torch_settings['torchModel'],
+            'mech_path': case_path / properties['CanteraMechanismFile'],
+            'time_step': float(torch_settings['inferenceDeltaTime']),
+            'device': 'cuda:0' if use_gpu and torch.cuda.is_available() else 'cpu',
+            'verbose': openfoam_switch(torch_settings.get('log', 'off')),
+        }
+        if use_frozen_temperature:
+            settings['frozen_temperature'] = float(torch_settings['frozenTemperature'])
+        settings.update(kwargs)
+
+        return cls(**settings)
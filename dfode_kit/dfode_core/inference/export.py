@@ -0,0 +1,204 @@
+from pathlib import Path
+
+import torch
+
+from dfode_kit.utils import load_checkpoint
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.dfode_core.model.build import model_from_checkpoint, checkpoint_architecture
+from dfode_kit.dfode_core.inference.quantize import quantize_model, gate_precision
+from dfode_kit.dfode_core.preprocess import checkpoint_pipelines, BoxCox
+
+class ReactionRateModule(torch.nn.Module):
+    """
+    Map raw solver states to net production rates in a single graph.
+
+    The input rows are ``[T, p, Y_1 ... Y_n, rho]`` as handed over by DeepFlame
+    (float64). The module performs the same steps as the posteriori
+    `inference.py` scripts -- Box-Cox transform, z-score normalisation, network
+    evaluation, inverse transform, mass renormalisation and conversion to a
+    rate -- with the normalisation taken from the checkpoint's
+    `TransformPipeline` (see `checkpoint_pipelines`) and every constant
+    stored as a buffer, and returns
+    rates of shape ``(N, n_species)`` in kg/m^3/s. Cells at or below
+    `frozen_temperature` get zero rates.
+
+    Parameters
+    ----------
+    model : torch.nn.Module
+        Trained network mapping normalised inputs to normalised BCT increments.
+    checkpoint : dict
+        Checkpoint written by `train`.
+    time_step : float
+        Inference time step used to turn mass-fraction increments into rates.
+    frozen_temperature : float, optional
+        Temperature below which chemistry is frozen. Default is 0.
+    pressure : float, optional
+        If positive, the input pressure is replaced by this value before
+        normalisation, matching the constant-pressure training data. If zero
+        or negative the solver pressure is used. Default is 101325.
+    """
+    def __init__(self, model, checkpoint, time_step, frozen_temperature=0.0, pressure=101325.0):
+        super().__init__()
+        self.model = model
+        self.time_step = float(time_step)
+        self.frozen_temperature = float(frozen_temperature)
+        self.pressure = float(pressure)
+
+        features_pipeline, targets_pipeline = checkpoint_pipelines(checkpoint)
+        self.n_species = features_pipeline.n_columns - 2
+        box_cox = next(step for step in features_pipeline.steps if isinstance(step, BoxCox))
+        # The Box-Cox step is folded into forward, which reuses Y**lam for the output
+        self.register_buffer('lam', torch.as_tensor(box_cox.lam, dtype=torch.float64).reshape(1, -1).clone())
+        self.normalize = features_pipeline[2:].to_torch()
+        self.denormalize = targets_pipeline.to_torch(inverse=True)
+
+    @torch.jit.export
+    def features(self, state):
+        """Normalised network inputs of ``[T, p, Y..., rho]`` rows, and ``Y**lam``."""
+        state = state.abs()
+        T = state[:, 0:1]
+        Y = state[:, 2:-1]
+        if self.pressure > 0:
+            p = torch.full_like(T, self.pressure)
+        else:
+            p = state[:, 1:2]
+
+        Y_lam = Y.pow(self.lam)
+        Y_bct = (Y_lam - 1) / self.lam
+        return self.normalize(torch.cat((T, p, Y_bct), dim=1)), Y_lam
+
+    def forward(self, state):
+        T = state[:, 0:1].abs()
+        Y = state[:, 2:-1].abs()
+        rho = state[:, -1:].abs()
+        features, Y_lam = self.features(state)
+
+        output = self.model(features.float()).double()
+
+        # lam * (BCT(Y) + dBCT) + 1 == Y**lam + lam * dBCT
+        lam = self.lam[:, :-1]
+        next_Y = (Y_lam[:, :-1] + lam * self.denormalize(output)).clamp_min(0).pow(1 / lam)
+        next_Y = next_Y / next_Y.sum(dim=1, keepdim=True) * (1 - Y[:, -1:])
+
+        rates = torch.zeros_like(Y)
+        rates[:, :-1] = (next_Y - Y[:, :-1]) * rho / self.time_step
+        return torch.where(T > self.frozen_temperature, rates, torch.zeros_like(rates))
+
+def build_reaction_rate_module(
+    model_path,
+    mech_path,
+    time_step,
+    frozen_temperature=0.0,
+    pressure=101325.0,
+    device='cpu',
+    precision='fp32',
+    gate_data=None,
+    max_degradation=0.1,
+):
+    """
+    Load a `train` checkpoint and wrap it into an eager `ReactionRateModule`.
+
+    The network is rebuilt from the checkpoint architecture and its shape checked
+    against the number of species in the mechanism. A `precision` other than
+    'fp32' must pass the `check_precision` accuracy gate on the held-out
+    `gate_data` within `max_degradation` (see `gate_precision`); it then swaps
+    in the CPU network returned by `quantize_model`, otherwise the module
+    keeps float32. The precision in effect is stored in ``module.precision``.
+    """
+    if precision != 'fp32' and torch.device(device).type != 'cpu':
+        raise ValueError(f"Precision '{precision}' is only supported on CPU.")
+    precision = gate_precision(model_path, mech_path, precision, gate_data, max_degradation)
+
+    checkpoint = load_checkpoint(model_path)
+    model = model_from_checkpoint(checkpoint)
+    if precision != 'fp32':
+        model = quantize_model(model, precision)
+
+    n_species = get_mechanism(mech_path).n_species
+    layer_info = checkpoint_architecture(checkpoint)['layers']
+    if layer_info[0] != 2 + n_species or layer_info[-1] != n_species - 1:
+        raise ValueError(
+            f"Model shape {layer_info} does not match a mechanism with {n_species} species."
+        )
+
+    module = ReactionRateModule(model, checkpoint, time_step, frozen_temperature, pressure)
+    module.precision = precision
+    module.eval()
+    return module.to(device=device)
+
+def export_model(
+    model_path,
+    mech_path,
+    output_path,
+    time_step,
+    frozen_temperature=0.0,
+    pressure=101325.0,
+    device='cpu',
+    method='script',
+    precision='fp32',
+    gate_data=None,
+    max_degradation=0.1,
+):
+    """
+    Export a `train` checkpoint as a single TorchScript reaction-rate module.
+
+    Parameters
+    ----------
+    model_path : str
+        Path to the checkpoint written by `train`.
+    mech_path : str
+        Path to the YAML mechanism file used for training.
+    output_path : str
+        Path of the TorchScript file to write.
+    time_step : float
+        Inference time step (``inferenceDeltaTime`` in DeepFlame).
+    frozen_temperature : float, optional
+        Temperature below which rates are set to zero. Default is 0.
+    pressure : float, optional
+        Pressure imposed on the network input; non-positive values keep the
+        solver pressure. Default is 101325.
+    device : str, optional
+        Device the exported module is placed on. Default is 'cpu'.
+    method : {'script', 'trace'}, optional
+        Use `torch.jit.script` or `torch.jit.trace`. Default is 'script'.
+    precision : {'fp32', 'bf16', 'int8'}, optional
+        Network precision, see `quantize_model`. A reduced precision is only
+        exported if it passes the `check_precision` accuracy gate on
+        `gate_data`; otherwise the module is exported in float32.
+        Default is 'fp32'.
+    gate_data : str or np.ndarray, optional
+        Held-out labeled data for the accuracy gate. Required with a reduced
+        `precision`.
+    max_degradation : float, optional
+        Accuracy gate threshold, see `check_precision`. Default is 0.1.
+
+    Returns
+    -------
+    torch.jit.ScriptModule
+        The exported module.
+
+    Examples
+    --------
+    >>> rates_fn = export_model('demo_model.pt', 'Burke2012_s9r23.yaml', 'demo_model.ts', 1e-6)
+    >>> rates = rates_fn(torch.from_numpy(vec0).view(-1, 3 + 9))
+    """
+    module = build_reaction_rate_module(
+        model_path, mech_path, time_step, frozen_temperature, pressure, device,
+        precision, gate_data, max_degradation,
+    )
+
+    with torch.no_grad():
+        if method == 'script':
+            exported = torch.jit.script(module)
+            # Keep n_species readable so hooks can reshape the flat solver vector
+            exported = torch.jit.freeze(exported.eval(), preserved_attrs=['n_species'])
+        elif method == 'trace':
+            example = torch.rand(8, 3 + module.n_species, dtype=torch.float64, device=device)
+            exported = torch.jit.freeze(torch.jit.trace(module, example).eval())
+        else:
+            raise ValueError(f"Unknown export method '{method}', expected 'script' or 'trace'.")
+
+    torch.jit.save(exported, str(Path(output_path)))
+    print(f"Exported {module.precision} reaction-rate module to {output_path}")
+
+    return exported
@@ -0,0 +1,197 @@
+import copy
+import time
+import warnings
+
+import torch
+import numpy as np
+
+from dfode_kit.utils import load_checkpoint
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.data_operations.h5_kit import predict_Y
+from dfode_kit.dfode_core.inference.router import normalize_states
+from dfode_kit.dfode_core.model.build import model_from_checkpoint
+
+PRECISIONS = ('fp32', 'bf16', 'int8')
+
+class CastModel(torch.nn.Module):
+    """Run a network in `dtype` while keeping a float32 interface."""
+    def __init__(self, model, dtype):
+        super().__init__()
+        self.model = model.to(dtype)
+        self.dtype = dtype
+
+    def forward(self, x):
+        return self.model(x.to(self.dtype)).float()
+
+def quantize_model(model, precision):
+    """
+    Return a reduced-precision copy of a network for CPU inference.
+
+    Parameters
+    ----------
+    model : torch.nn.Module
+        The float32 network. It is not modified.
+    precision : {'fp32', 'bf16', 'int8'}
+        'bf16' casts the weights to bfloat16, 'int8' applies dynamic int8
+        quantization to every `torch.nn.Linear` layer.
+
+    Returns
+    -------
+    torch.nn.Module
+        A network taking and returning float32 tensors.
+
+    Raises
+    ------
+    ValueError
+        For 'int8' on a network without `torch.nn.Linear` layers, such as
+        the batched-matmul `SpeciesEnsemble`, which dynamic quantization
+        would leave in float32.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}.")
+    if precision == 'int8' and not any(isinstance(module, torch.nn.Linear) for module in model.modules()):
+        raise ValueError(
+            f"int8 quantization needs torch.nn.Linear layers, {type(model).__name__} has none; use 'bf16' or 'fp32'."
+        )
+
+    model = copy.deepcopy(model).cpu().eval()
+    if precision == 'bf16':
+        return CastModel(model, torch.bfloat16)
+    if precision == 'int8':
+        with warnings.catch_warnings():
+            # Eager-mode quantization is deprecated upstream but still the only
+            # built-in int8 path that does not need an extra dependency
+            warnings.simplefilter('ignore')
+            return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+def _best_time(model, inputs, n_repeats):
+    with torch.no_grad():
+        model(inputs)
+        timings = []
+        for _ in range(n_repeats):
+            start = time.perf_counter()
+            model(inputs)
+            timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def check_precision(
+    model_path,
+    mech_path,
+    labeled_data,
+    precision,
+    max_degradation=0.1,
+    n_samples=10000,
+    n_repeats=10,
+    seed=0,
+):
+    """
+    Accuracy gate and speed-up measurement for a reduced-precision model.
+
+    The float32 and reduced-precision networks both predict the CVODE labels
+    of a held-out labeled dataset through `predict_Y`. The mode passes when,
+    for every species, the RMSE against the labels grows by at most
+    `max_degradation` relative to the float32 model.
+
+    Parameters
+    ----------
+    model_path : str
+        Path to the checkpoint written by `train`.
+    mech_path : str
+        Path to the YAML mechanism file.
+    labeled_data : str or np.ndarray
+        Held-out data in the `label` output layout, or the path of a `.npy`
+        file holding it. It should not have been used for training.
+    precision : {'bf16', 'int8'}
+        Reduced precision to check.
+    max_degradation : float, optional
+        Allowed relative increase of the per-species RMSE. Default is 0.1.
+    n_samples : int, optional
+        Maximum number of held-out rows to evaluate. Default is 10000.
+    n_repeats : int, optional
+        Number of timed network evaluations; the fastest is kept. Default is 10.
+    seed : int, optional
+        Seed for sub-sampling the held-out rows. Default is 0.
+
+    Returns
+    -------
+    dict
+        Report with the per-species RMSE of both models against the labels
+        and against each other, the network timings, the speed-up and a
+        ``passed`` flag.
+    """
+    if isinstance(labeled_data, str):
+        labeled_data = np.load(labeled_data)
+
+    mech = get_mechanism(mech_path)
+    n_species = mech.n_species
+
+    rng = np.random.default_rng(seed)
+    if labeled_data.shape[0] > n_samples:
+        labeled_data = labeled_data[rng.choice(labeled_data.shape[0], size=n_samples, replace=False)]
+    states = labeled_data[:, :2 + n_species]
+    targets = labeled_data[:, 4 + n_species:4 + 2 * n_species]
+
+    checkpoint = load_checkpoint(model_path)
+    model = model_from_checkpoint(checkpoint).eval()
+    reduced_model = quantize_model(model, precision)
+
+    Y_fp32 = predict_Y(model, model_path, states.copy(), mech_path, 'cpu')
+    Y_reduced = predict_Y(reduced_model, model_path, states.copy(), mech_path, 'cpu')
+
+    rmse_fp32 = np.sqrt(np.mean((Y_fp32 - targets)**2, axis=0))
+    rmse_reduced = np.sqrt(np.mean((Y_reduced - targets)**2, axis=0))
+    rmse_vs_fp32 = np.sqrt(np.mean((Y_reduced - Y_fp32)**2, axis=0))
+    passed = bool(np.all(rmse_reduced <= rmse_fp32 * (1 + max_degradation) + 1e-12))
+
+    inputs = torch.from_numpy(normalize_states(states, checkpoint, pressure=None)).float()
+    time_fp32 = _best_time(model, inputs, n_repeats)
+    time_reduced = _best_time(reduced_model, inputs, n_repeats)
+
+    return {
+        'precision': precision,
+        'passed': passed,
+        'max_degradation': max_degradation,
+        'n_samples': int(states.shape[0]),
+        'species_names': mech.species_names,
+        'rmse_fp32': rmse_fp32.tolist(),
+        'rmse_reduced': rmse_reduced.tolist(),
+        'rmse_vs_fp32': rmse_vs_fp32.tolist(),
+        'time_fp32': time_fp32,
+        'time_reduced': time_reduced,
+        'speedup': time_fp32 / time_reduced,
+    }
+
+def gate_precision(model_path, mech_path, precision, gate_data=None, max_degradation=0.1):
+    """
+    The precision to run a model in after the `check_precision` accuracy gate.
+
+    'fp32' is returned unchanged. A reduced precision is checked on the
+    held-out `gate_data` and returned only if it passes; otherwise the report
+    is printed with a refusal and 'fp32' is returned.
+
+    Raises
+    ------
+    ValueError
+        If a reduced precision is requested without `gate_data`.
+    """
+    if precision == 'fp32':
+        return precision
+    if gate_data is None:
+        raise ValueError(f"gate_data is required to enable precision '{precision}'.")
+    report = check_precision(model_path, mech_path, gate_data, precision, max_degradation)
+    print_precision_report(report)
+    if not report['passed']:
+        print(f"Refusing to enable precision '{precision}', falling back to fp32.")
+        return 'fp32'
+    return precision
+
+def print_precision_report(report):
+    """Print a `check_precision` report as a per-species table."""
+    print(f"Precision {report['precision']} on {report['n_samples']} held-out states")
+    print(f'{"Species":<10}{"RMSE fp32":>14}{"RMSE reduced":>14}{"RMSE vs fp32":>14}')
+    for name, e0, e1, e2 in zip(report['species_names'], report['rmse_fp32'], report['rmse_reduced'], report['rmse_vs_fp32']):
+        print(f'{name:<10}{e0:>14.6e}{e1:>14.6e}{e2:>14.6e}')
+    print(f"Network time fp32: {report['time_fp32']*1e3:.3f} ms, {report['precision']}: {report['time_reduced']*1e3:.3f} ms, speed-up: {report['speedup']:.2f}x")
+    status = 'passed' if report['passed'] else 'FAILED'
+    print(f"Accuracy gate (max degradation {report['max_degradation']:.0%}): {status}")
@@ -0,0 +1,169 @@
+import itertools
+
+import torch
+import numpy as np
+
+from dfode_kit.dfode_core.preprocess import checkpoint_pipelines
+
+def build_envelope(features, n_components=4, n_bins=16, margin=0.05, max_rows=200000, seed=0, bounds=None):
+    """
+    Describe the region of normalised BCT space covered by the training data.
+
+    The envelope has two parts: per-feature bounds widened by `margin` of
+    their range, and an occupancy grid over the leading principal components
+    of the data with `n_bins` bins per component. Every occupied bin also
+    marks its direct neighbours, so states just beside the training manifold
+    are accepted. With the defaults the grid takes 64 KiB.
+
+    Parameters
+    ----------
+    features : np.ndarray
+        Normalised training inputs, shape (n_samples, n_features).
+    n_components : int, optional
+        Number of principal components spanned by the grid. Default is 4.
+    n_bins : int, optional
+        Number of bins per component. Default is 16.
+    margin : float, optional
+        Relative widening of the bounds. Default is 0.05.
+    max_rows : int, optional
+        Rows used to fit the principal components. Default is 200000.
+    seed : int, optional
+        Seed for sub-sampling the rows. Default is 0.
+    bounds : tuple of np.ndarray, optional
+        Per-feature ``(lower, upper)`` over the full data, for when
+        `features` is only a sample of it.
+
+    Returns
+    -------
+    dict
+        NumPy arrays that can be stored in a checkpoint under ``'envelope'``.
+    """
+    features = np.asarray(features, dtype=np.float64)
+    if bounds is None:
+        lower = features.min(axis=0)
+        upper = features.max(axis=0)
+    else:
+        lower, upper = (np.asarray(bound, dtype=np.float64) for bound in bounds)
+    width = upper - lower
+
+    sample = features
+    if features.shape[0] > max_rows:
+        rng = np.random.default_rng(seed)
+        sample = features[rng.choice(features.shape[0], size=max_rows, replace=False)]
+    n_components = min(n_components, features.shape[1])
+    _, _, vt = np.linalg.svd(sample - sample.mean(axis=0), full_matrices=False)
+    components = vt[:n_components]
+
+    projected = features @ components.T
+    pc_lower = projected.min(axis=0)
+    pc_upper = projected.max(axis=0)
+
+    envelope = {
+        'lower': lower - margin * width,
+        'upper': upper + margin * width,
+        'components': components,
+        'pc_lower': pc_lower,
+        'pc_upper': pc_upper,
+        'occupancy': np.zeros((n_bins,) * n_components, dtype=bool),
+    }
+
+    occupied = np.zeros((n_bins + 2,) * n_components, dtype=bool)
+    occupied[tuple(_bin_indices(projected, envelope).T + 1)] = True
+    for shift in itertools.product((0, 1, 2), repeat=n_components):
+        envelope['occupancy'] |= occupied[tuple(slice(s, s + n_bins) for s in shift)]
+    return envelope
+
+def _bin_indices(projected, envelope):
+    n_bins = envelope['occupancy'].shape[0]
+    scale = n_bins / np.maximum(envelope['pc_upper'] - envelope['pc_lower'], 1e-12)
+    indices = np.floor((projected - envelope['pc_lower']) * scale).astype(np.int64)
+    return np.clip(indices, 0, n_bins - 1)
+
+def normalize_states(d_arr, checkpoint, pressure=101325.0):
+    """Apply the `predict_Y` input transform to ``[T, p, Y...]`` rows."""
+    features_pipeline, _ = checkpoint_pipelines(checkpoint)
+    in_bct = np.clip(d_arr[:, :features_pipeline.n_columns], 0, None)
+    if pressure is not None:
+        in_bct[:, 1] = pressure
+    return features_pipeline.transform(in_bct, out=in_bct)
+
+class OODRouter:
+    """
+    Decide per cell whether a state lies inside the training envelope.
+
+    States outside the widened per-feature bounds or falling into an empty
+    bin of the principal-component occupancy grid are flagged for CVODE.
+    Every call to `route` updates the counters, and `history` keeps the
+    fraction of cells routed to CVODE at each call.
+
+    Parameters
+    ----------
+    envelope : dict
+        Envelope from `build_envelope`, as stored in a `train` checkpoint.
+    """
+    def __init__(self, envelope):
+        self.envelope = {key: np.asarray(value) for key, value in envelope.items()}
+        self._tensors = {}
+
+        self.n_calls = 0
+        self.n_cells = 0
+        self.n_routed = 0
+        self.history = []
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint):
+        if 'envelope' not in checkpoint:
+            raise KeyError("The checkpoint has no training envelope; retrain it with the current train().")
+        return cls(checkpoint['envelope'])
+
+    def _as_tensors(self, device):
+        if device not in self._tensors:
+            self._tensors[device] = {
+                key: torch.as_tensor(value, device=device)
+                for key, value in self.envelope.items()
+            }
+        return self._tensors[device]
+
+    def route(self, features):
+        """
+        Return a boolean mask that is True for states to send to CVODE.
+
+        Parameters
+        ----------
+        features : np.ndarray or torch.Tensor
+            Normalised network inputs, shape (n_cells, n_features).
+        """
+        if isinstance(features, torch.Tensor):
+            env = self._as_tensors(features.device)
+            features = features.double()
+            inside = ((features >= env['lower']) & (features <= env['upper'])).all(dim=1)
+            n_bins = env['occupancy'].shape[0]
+            scale = n_bins / (env['pc_upper'] - env['pc_lower']).clamp_min(1e-12)
+            indices = ((features @ env['components'].T - env['pc_lower']) * scale).floor().long().clamp(0, n_bins - 1)
+            inside &= env['occupancy'][tuple(indices.T)]
+            ood = ~inside
+            n_ood = int(ood.sum())
+        else:
+            env = self.envelope
+            inside = ((features >= env['lower']) & (features <= env['upper'])).all(axis=1)
+            inside &= env['occupancy'][tuple(_bin_indices(features @ env['components'].T, env).T)]
+            ood = ~inside
+            n_ood = int(ood.sum())
+
+        n_cells = features.shape[0]
+        self.n_calls += 1
+        self.n_cells += n_cells
+        self.n_routed += n_ood
+        self.history.append(n_ood / n_cells if n_cells else 0.0)
+        return ood
+
+    @property
+    def routed_fraction(self):
+        """Fraction of all cells seen so far that were sent to CVODE."""
+        return self.n_routed / self.n_cells if self.n_cells else 0.0
+
+    def summary(self):
+        return (
+            f"OOD router: {self.n_routed}/{self.n_cells} cells ({self.routed_fraction:.2%}) "
+            f"sent to CVODE over {self.n_calls} calls"
+        )
@@ -0,0 +1,272 @@
+import os
+import stat
+import time
+import queue
+import socket
+import struct
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+# Every message is a uint64 value count followed by that many float64 values.
+# A count of _ERROR signals that the server failed to process the request.
+_HEADER = struct.Struct('<Q')
+_HANDSHAKE = struct.Struct('<II')
+_ERROR = 2**64 - 1
+
+def _recv_into(sock, buffer):
+    view = memoryview(buffer).cast('B')
+    received = 0
+    while received < len(view):
+        n_bytes = sock.recv_into(view[received:])
+        if n_bytes == 0:
+            raise ConnectionError("Socket closed by peer.")
+        received += n_bytes
+
+def _recv_header(sock, header):
+    buffer = bytearray(header.size)
+    _recv_into(sock, buffer)
+    return header.unpack(buffer)
+
+def _recv_array(sock, max_values=None):
+    (n_values,) = _recv_header(sock, _HEADER)
+    if n_values == _ERROR:
+        raise RuntimeError("The inference server failed to process the request.")
+    if max_values is not None and n_values > max_values:
+        # Refuse before allocating, the count comes straight from the peer
+        raise ValueError(f"Request of {n_values} values exceeds the limit of {max_values}.")
+    array = np.empty(n_values, dtype=np.float64)
+    _recv_into(sock, array)
+    return array
+
+def _remove_stale_socket(path):
+    """Unlink a socket file left behind by a server that is gone; refuse to touch anything else."""
+    if not os.path.exists(path):
+        return
+    if not stat.S_ISSOCK(os.stat(path).st_mode):
+        raise FileExistsError(f"{path} exists and is not a socket.")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"Another inference server is already listening on {path}.")
+
+def _send_array(sock, array):
+    array = np.ascontiguousarray(array, dtype=np.float64)
+    sock.sendall(_HEADER.pack(array.size))
+    sock.sendall(memoryview(array).cast('B'))
+
+class InferenceServer:
+    """
+    Serve one `InferenceEngine` to many local solver processes.
+
+    Clients connect over a Unix domain socket and send flattened cell states.
+    A single worker thread coalesces the requests that arrive within
+    `max_latency` seconds of the first one (up to `max_batch_cells` cells)
+    into one engine call and sends each client its slice of the rates, so the
+    model is loaded once per node and evaluated on larger batches.
+
+    Parameters
+    ----------
+    engine : InferenceEngine
+        The configured engine.
+    socket_path : str
+        Path of the Unix domain socket to listen on.
+    max_latency : float, optional
+        Longest time a request waits for others to join its batch, in
+        seconds. Default is 2e-3.
+    max_batch_cells : int, optional
+        Batches are dispatched as soon as they reach this many cells.
+        Default is 2**20.
+    max_request_cells : int, optional
+        Largest request a client may send; larger ones are answered with an
+        error and the connection is closed. Default is 2**22.
+    """
+    def __init__(self, engine, socket_path, max_latency=2e-3, max_batch_cells=2**20, max_request_cells=2**22):
+        self.engine = engine
+        self.socket_path = str(socket_path)
+        self.max_latency = max_latency
+        self.max_batch_cells = max_batch_cells
+        self.max_request_cells = max_request_cells
+
+        self.n_batches = 0
+        self.n_requests = 0
+        self.n_cells = 0
+
+        self._requests = queue.Queue()
+        self._stopped = threading.Event()
+        self._sock = None
+
+    def serve_forever(self):
+        """
+        Listen on the socket and serve clients until `shutdown` is called.
+
+        A socket file left by a server that is gone is replaced; if another
+        server still accepts connections on it, RuntimeError is raised.
+        """
+        _remove_stale_socket(self.socket_path)
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        self._sock.listen()
+        # Wake up regularly so shutdown() from another thread is noticed
+        self._sock.settimeout(0.5)
+        print(f"Serving inference on {self.socket_path}")
+
+        worker = threading.Thread(target=self._batch_loop, daemon=True)
+        worker.start()
+
+        try:
+            while not self._stopped.is_set():
+                try:
+                    conn, _ = self._sock.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+        finally:
+            self.shutdown()
+            worker.join()
+
+    def shutdown(self):
+        """Stop accepting clients, stop the batching worker and remove the socket."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._requests.put(None)
+        if self._sock is not None:
+            self._sock.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        if self.n_batches:
+            print(
+                f"Served {self.n_requests} requests ({self.n_cells} cells) in {self.n_batches} batches, "
+                f"{self.n_cells / self.n_batches:.1f} cells per batch"
+            )
+
+    def _handle_client(self, conn):
+        with conn:
+            try:
+                conn.sendall(_HANDSHAKE.pack(self.engine.n_cols, self.engine.n_species))
+                while True:
+                    try:
+                        states = _recv_array(conn, self.max_request_cells * self.engine.n_cols)
+                    except ValueError as e:
+                        print(f"Rejected a request: {e}")
+                        conn.sendall(_HEADER.pack(_ERROR))
+                        return
+                    if states.size % self.engine.n_cols != 0:
+                        print(f"Rejected a request of {states.size} values, not a multiple of {self.engine.n_cols} columns")
+                        conn.sendall(_HEADER.pack(_ERROR))
+                        continue
+                    result = Future()
+                    self._requests.put((states, result))
+                    try:
+                        rates = result.result()
+                    except Exception as e:
+                        print(f"Inference request failed: {e}")
+                        conn.sendall(_HEADER.pack(_ERROR))
+                        continue
+                    _send_array(conn, rates)
+            except (ConnectionError, OSError):
+                return
+
+    def _batch_loop(self):
+        n_cols = self.engine.n_cols
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+
+            batch = [request]
+            n_cells = request[0].size // n_cols
+            deadline = time.monotonic() + self.max_latency
+            while n_cells < self.max_batch_cells:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._requests.put(None)
+                    break
+                batch.append(request)
+                n_cells += request[0].size // n_cols
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        try:
+            rates = self.engine.inference(np.concatenate([states for states, _ in batch]))
+        except Exception as e:
+            for _, result in batch:
+                result.set_exception(e)
+            return
+
+        start = 0
+        for states, result in batch:
+            stop = start + states.size // self.engine.n_cols
+            # The engine reuses its output buffer, so every client gets a copy
+            result.set_result(rates[start:stop].copy())
+            start = stop
+
+        self.n_batches += 1
+        self.n_requests += len(batch)
+        self.n_cells += start
+
+class InferenceClient:
+    """
+    Thin client for `InferenceServer` with the DeepFlame `inference` signature.
+
+    Parameters
+    ----------
+    socket_path : str
+        Path of the server's Unix domain socket.
+    connect_timeout : float, optional
+        Seconds to keep retrying while the server is starting. Default is 60.
+
+    Examples
+    --------
+    In the case's `inference.py`, with `dfode-kit serve` running on the node:
+
+    >>> client = InferenceClient('/tmp/dfode-kit.sock')
+    >>> def inference(vec0):
+    ...     return client.inference(vec0)
+    """
+    def __init__(self, socket_path, connect_timeout=60.0):
+        self.socket_path = str(socket_path)
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                self._sock.connect(self.socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                self._sock.close()
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+        self.n_cols, self.n_species = _recv_header(self._sock, _HANDSHAKE)
+
+    def inference(self, vec0):
+        """Return net production rates of shape (n_cells, n_species) for `vec0`."""
+        _send_array(self._sock, np.ravel(vec0))
+        return _recv_array(self._sock).reshape(-1, self.n_species)
+
+    def close(self):
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,163 @@
+import sys
+import time
+import queue
+import signal
+import subprocess
+import multiprocessing
+
+import numpy as np
+
+from dfode_kit.dfode_core.inference.engine import InferenceEngine
+from dfode_kit.dfode_core.inference.server import InferenceClient
+from dfode_kit.dfode_core.inference.benchmark import synthetic_states
+
+def _client_worker(socket_path, requests, results, index):
+    """Send `requests` in turn from a fresh `InferenceClient` and report the rates."""
+    with InferenceClient(socket_path) as client:
+        start = time.perf_counter()
+        rates = [client.inference(states.ravel()) for states in requests]
+        elapsed = time.perf_counter() - start
+    results.put((index, rates, elapsed))
+
+def check_server(
+    properties_path,
+    n_clients=4,
+    socket_path='/tmp/dfode-kit-check.sock',
+    n_requests=20,
+    max_cells=512,
+    max_latency=2e-3,
+    use_frozen_temperature=True,
+    rtol=1e-5,
+    seed=0,
+    timeout=300.0,
+):
+    """
+    End-to-end check of `serve` against direct `InferenceEngine` calls.
+
+    A `dfode-kit serve` process is started on `socket_path` and `n_clients`
+    processes each send `n_requests` requests of 1 to `max_cells` cells
+    drawn with `synthetic_states`, as concurrent solver ranks would. Every
+    returned rate array is compared with the rates of an engine built from
+    the same `CanteraTorchProperties` in this process.
+
+    Parameters
+    ----------
+    properties_path : str
+        Path to the `CanteraTorchProperties` file of the case.
+    n_clients : int, optional
+        Number of client processes. Default is 4.
+    socket_path : str, optional
+        Socket the server listens on during the check.
+    n_requests : int, optional
+        Requests sent by each client. Default is 20.
+    max_cells : int, optional
+        Largest number of cells in one request. Default is 512.
+    max_latency : float, optional
+        Batching latency passed to the server. Default is 2e-3.
+    use_frozen_temperature : bool, optional
+        Apply ``frozenTemperature`` on both sides. Default is True.
+    rtol : float, optional
+        Largest allowed deviation, relative to the largest rate magnitude of
+        each request; coalesced batches may round differently in float32.
+        Default is 1e-5.
+    seed : int, optional
+        Seed for the request sizes and states. Default is 0.
+    timeout : float, optional
+        Seconds to wait for the clients before the check fails. Default is 300.
+
+    Returns
+    -------
+    dict
+        Report with the number of requests and cells, the largest relative
+        deviation, the client wall times and a ``passed`` flag. If a client
+        fails or times out, ``error`` describes it and the check fails.
+    """
+    engine = InferenceEngine.from_properties(
+        properties_path, use_frozen_temperature=use_frozen_temperature, verbose=False
+    )
+
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, max_cells + 1, size=(n_clients, n_requests))
+    states = synthetic_states(str(engine.mech.path), int(sizes.sum()), seed=seed)
+    offsets = np.cumsum(sizes.ravel())[:-1]
+    requests = np.split(states, offsets)
+    requests = [requests[i * n_requests:(i + 1) * n_requests] for i in range(n_clients)]
+
+    command = [
+        sys.executable, '-m', 'dfode_kit.cli_tools.main', 'serve',
+        '--properties', str(properties_path),
+        '--socket', str(socket_path),
+        '--max_latency', str(max_latency),
+    ]
+    if not use_frozen_temperature:
+        command.append('--no_frozen_temperature')
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+    # Spawn rather than fork, the parent already runs torch threads
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    clients = [
+        context.Process(target=_client_worker, args=(str(socket_path), requests[i], results, i))
+        for i in range(n_clients)
+    ]
+    outputs = {}
+    error = None
+    try:
+        for client in clients:
+            client.start()
+        deadline = time.monotonic() + timeout
+        while len(outputs) < n_clients and error is None:
+            try:
+                index, rates, elapsed = results.get(timeout=1.0)
+                outputs[index] = (rates, elapsed)
+                continue
+            except queue.Empty:
+                pass
+            # A client that died before reporting never will
+            failed = [i for i, client in enumerate(clients) if i not in outputs and client.exitcode not in (None, 0)]
+            if failed:
+                error = f"Client {failed[0]} exited with code {clients[failed[0]].exitcode}"
+            elif time.monotonic() > deadline:
+                error = f"Clients did not finish within {timeout:.0f} s"
+        for client in clients:
+            client.join(timeout=10)
+    finally:
+        for client in clients:
+            if client.is_alive():
+                client.terminate()
+        server.send_signal(signal.SIGINT)
+        try:
+            server_log = server.communicate(timeout=60)[0]
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server_log = server.communicate()[0]
+
+    max_error = 0.0
+    for i in outputs:
+        for request, served in zip(requests[i], outputs[i][0]):
+            direct = engine.inference(request.ravel())
+            scale = max(np.abs(direct).max(), np.finfo(np.float64).tiny)
+            max_error = max(max_error, np.abs(served - direct).max() / scale)
+
+    return {
+        'n_clients': n_clients,
+        'n_requests': n_clients * n_requests,
+        'n_cells': int(sizes.sum()),
+        'max_rel_error': float(max_error),
+        'rtol': rtol,
+        'client_times': [outputs[i][1] for i in sorted(outputs)],
+        'server_log': server_log,
+        'error': error,
+        'passed': error is None and bool(max_error <= rtol),
+    }
+
+def print_server_check(report):
+    """Print a `check_server` report."""
+    print(report['server_log'].rstrip())
+    print(f"{report['n_clients']} clients sent {report['n_requests']} requests ({report['n_cells']} cells)")
+    for i, elapsed in enumerate(report['client_times']):
+        print(f"Client {i}: {elapsed:.3f} s")
+    if report['error'] is not None:
+        print(f"Check failed: {report['error']}")
+    status = 'passed' if report['passed'] else 'FAILED'
+    print(f"Largest deviation from direct engine calls: {report['max_rel_error']:.3e} (rtol {report['rtol']:.0e}), {status}")
@@ -0,0 +1,66 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+class SharedStateBuffers:
+    """
+    State and rate arrays living in one named shared-memory block.
+
+    The block holds ``max_cells * (3 + n_species)`` input values followed by
+    ``max_cells * n_species`` output values, all float64. The solver maps the
+    block by name (``/dev/shm/<name>`` on Linux) and writes its cell states
+    in place; the Python side registers the two views with
+    `InferenceEngine.register_buffers` and calls `inference_inplace`, so no
+    state or rate data is copied between the two.
+
+    Parameters
+    ----------
+    max_cells : int
+        Number of cells the buffers can hold.
+    n_species : int
+        Number of species in the mechanism.
+    name : str, optional
+        Name of the shared-memory block. A unique name is generated when
+        creating a block without one.
+    create : bool, optional
+        Create a new block (True) or attach to an existing one. Default is True.
+
+    Examples
+    --------
+    >>> buffers = SharedStateBuffers(max_cells, engine.n_species, name='dfode_rank0')
+    >>> engine.register_buffers(buffers.states, buffers.rates)
+    >>> def inference_inplace(n_cells):
+    ...     engine.inference_inplace(n_cells)
+    """
+    def __init__(self, max_cells, n_species, name=None, create=True):
+        self.max_cells = int(max_cells)
+        self.n_species = int(n_species)
+        self.n_cols = 3 + self.n_species
+
+        n_values = self.max_cells * (self.n_cols + self.n_species)
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=n_values * 8)
+
+        values = np.ndarray((n_values,), dtype=np.float64, buffer=self.shm.buf)
+        n_states = self.max_cells * self.n_cols
+        self.states = values[:n_states].reshape(self.max_cells, self.n_cols)
+        self.rates = values[n_states:].reshape(self.max_cells, self.n_species)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        """Release this process's mapping of the block."""
+        self.states = None
+        self.rates = None
+        self.shm.close()
+
+    def unlink(self):
+        """Destroy the block; call once, from the process that created it."""
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,39 @@
+from dfode_kit.dfode_core.model.mlp import MLP, ACTIVATIONS
+from dfode_kit.dfode_core.model.residual import ResidualMLP
+from dfode_kit.dfode_core.model.ensemble import SpeciesEnsemble
+
+ARCHITECTURES = {
+    'mlp': MLP,
+    'residual': ResidualMLP,
+    'ensemble': SpeciesEnsemble,
+}
+
+def build_model(architecture):
+    """
+    Instantiate a network from an architecture description.
+
+    Parameters
+    ----------
+    architecture : dict
+        ``{'type': 'mlp' | 'residual' | 'ensemble', 'layers': [n_in, ..., n_out],
+        'activation': 'gelu'}`` as stored in `train` checkpoints.
+    """
+    kind = architecture.get('type', 'mlp')
+    if kind not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture '{kind}', expected one of {list(ARCHITECTURES)}.")
+    activation = architecture.get('activation', 'gelu')
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Unknown activation '{activation}', expected one of {list(ACTIVATIONS)}.")
+    return ARCHITECTURES[kind](list(architecture['layers']), activation)
+
+def checkpoint_architecture(checkpoint):
+    """Architecture of a checkpoint; older checkpoints without one hold a GELU `MLP`."""
+    if 'architecture' in checkpoint:
+        return checkpoint['architecture']
+    return {'type': 'mlp', 'layers': MLP.layer_info_from_state_dict(checkpoint['net']), 'activation': 'gelu'}
+
+def model_from_checkpoint(checkpoint):
+    """Build the network of a `train` checkpoint and load its weights."""
+    model = build_model(checkpoint_architecture(checkpoint))
+    model.load_state_dict(checkpoint['net'])
+    return model
@@ -0,0 +1,49 @@
+import math
+
+import torch
+
+from dfode_kit.dfode_core.model.mlp import ACTIVATIONS
+
+class SpeciesEnsemble(torch.nn.Module):
+    """
+    One small MLP per output species, evaluated as grouped matrix products.
+
+    ``layer_info = [n_in, h_1, ..., h_k, n_out]`` defines `n_out` independent
+    networks ``[n_in, h_1, ..., h_k, 1]``. Their weights are stacked along a
+    leading group dimension, so each layer of all networks is a single
+    batched matmul (`torch.baddbmm`) instead of a Python loop over species,
+    and the whole ensemble costs about one forward pass.
+
+    Parameters
+    ----------
+    layer_info : list of int
+        Input size, hidden widths of every member and number of outputs.
+    activation : str, optional
+        Key of `ACTIVATIONS`. Default is 'gelu'.
+    """
+    def __init__(self, layer_info, activation='gelu'):
+        super().__init__()
+        n_groups = layer_info[-1]
+        sizes = list(layer_info[:-1]) + [1]
+
+        def parameter(n_in, *shape):
+            # Same initialisation as torch.nn.Linear, separately for each member
+            bound = 1 / math.sqrt(n_in)
+            return torch.nn.Parameter(torch.empty(n_groups, *shape).uniform_(-bound, bound))
+
+        self.input_weight = parameter(sizes[0], sizes[0], sizes[1])
+        self.input_bias = parameter(sizes[0], 1, sizes[1])
+        self.weights = torch.nn.ParameterList(
+            parameter(n_in, n_in, n_out) for n_in, n_out in zip(sizes[1:-1], sizes[2:])
+        )
+        self.biases = torch.nn.ParameterList(
+            parameter(n_in, 1, n_out) for n_in, n_out in zip(sizes[1:-1], sizes[2:])
+        )
+        self.activation = ACTIVATIONS[activation]()
+
+    def forward(self, x):
+        # (N, n_in) @ (G, n_in, h) -> (G, N, h): the input is shared by all members
+        h = torch.matmul(x, self.input_weight) + self.input_bias
+        for weight, bias in zip(self.weights, self.biases):
+            h = torch.baddbmm(bias, self.activation(h), weight)
+        return h.squeeze(-1).transpose(0, 1)
@@ -1,15 +1,40 @@
 import torch
 
+ACTIVATIONS = {
+    'gelu': torch.nn.GELU,
+    'silu': torch.nn.SiLU,
+    'relu': torch.nn.ReLU,
+    'elu': torch.nn.ELU,
+    'tanh': torch.nn.Tanh,
+}
+
 class MLP(torch.nn.Module):
-    def __init__(self, layer_info):
+    def __init__(self, layer_info, activation='gelu'):
         super(MLP, self).__init__()
         
         self.net = torch.nn.Sequential()
         n = len(layer_info) - 1
         for i in range(n - 1):
             self.net.add_module('linear_layer_%d' %(i), torch.nn.Linear(layer_info[i], layer_info[i + 1]))
-            self.net.add_module('gelu_layer_%d' %(i), torch.nn.GELU())
+            self.net.add_module('%s_layer_%d' %(activation, i), ACTIVATIONS[activation]())
         self.net.add_module('linear_layer_%d' %(n - 1), torch.nn.Linear(layer_info[n - 1], layer_info[n]))
 
     def forward(self, x):
-        return self.net(x)
\ No newline at end of file
+        return self.net(x)
+
+    @staticmethod
+    def layer_info_from_state_dict(state_dict):
+        """Recover the `layer_info` list from the weights of a saved `MLP`."""
+        weights = [
+            state_dict[f'net.linear_layer_{i}.weight']
+            for i in range(len(state_dict))
+            if f'net.linear_layer_{i}.weight' in state_dict
+        ]
+        return [weights[0].shape[1]] + [w.shape[0] for w in weights]
+
+    @classmethod
+    def from_state_dict(cls, state_dict, activation='gelu'):
+        """Build an `MLP` whose shape matches `state_dict` and load its weights."""
+        model = cls(cls.layer_info_from_state_dict(state_dict), activation)
+        model.load_state_dict(state_dict)
+        return model
@@ -0,0 +1,35 @@
+import torch
+
+from dfode_kit.dfode_core.model.mlp import ACTIVATIONS
+
+class ResidualMLP(torch.nn.Module):
+    """
+    MLP whose hidden layers after the first are residual blocks.
+
+    With ``layer_info = [n_in, width, ..., width, n_out]`` the input is
+    projected to `width`, every further hidden layer computes
+    ``h + act(linear(h))``, and a final linear layer maps to `n_out`.
+
+    Parameters
+    ----------
+    layer_info : list of int
+        Input size, hidden widths (all equal) and output size.
+    activation : str, optional
+        Key of `ACTIVATIONS`. Default is 'gelu'.
+    """
+    def __init__(self, layer_info, activation='gelu'):
+        super().__init__()
+        hidden = layer_info[1:-1]
+        if len(set(hidden)) != 1:
+            raise ValueError(f"Residual blocks need equal hidden widths, got {hidden}.")
+
+        self.input_layer = torch.nn.Linear(layer_info[0], hidden[0])
+        self.blocks = torch.nn.ModuleList(torch.nn.Linear(width, width) for width in hidden[1:])
+        self.output_layer = torch.nn.Linear(hidden[-1], layer_info[-1])
+        self.activation = ACTIVATIONS[activation]()
+
+    def forward(self, x):
+        h = self.activation(self.input_layer(x))
+        for block in self.blocks:
+            h = h + self.activation(block(h))
+        return self.output_layer(h)
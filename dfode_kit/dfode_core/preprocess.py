@@ -1,4 +1,414 @@
 import numpy as np
+import torch
+
+def merge_moments(first, second):
+    """
+    Combine the ``(count, mean, m2)`` moments of two disjoint row sets.
+
+    ``m2`` is the sum of squared deviations from the mean. The update is the
+    pairwise form of Welford's algorithm (Chan et al.), which, unlike
+    ``sum(x**2) - n * mean**2``, does not lose precision when the variance
+    is small compared to the mean, however many rows are merged.
+    """
+    count_a, mean_a, m2_a = first
+    count_b, mean_b, m2_b = second
+    if count_b == 0:
+        return first
+    if count_a == 0:
+        return second
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    m2 = m2_a + m2_b + delta**2 * (count_a * count_b / count)
+    return count, mean, m2
+
+def chunk_moments(values):
+    """The ``(count, mean, m2)`` moments of the rows of one chunk, in float64."""
+    mean = values.mean(axis=0, dtype=np.float64)
+    return values.shape[0], mean, ((values - mean)**2).sum(axis=0)
+
+def _column_index(columns):
+    """A slice for contiguous columns, so blocks are views updated in place; an index array otherwise."""
+    columns = np.asarray(columns, dtype=np.int64)
+    if columns.size and np.array_equal(columns, np.arange(columns[0], columns[0] + columns.size)):
+        return slice(int(columns[0]), int(columns[0] + columns.size))
+    return columns
+
+def _full_width(values, columns, n_columns, fill):
+    vector = np.full(n_columns, fill, dtype=np.float64)
+    vector[columns] = values
+    return torch.from_numpy(vector).reshape(1, -1)
+
+class Transform:
+    """
+    One step of a `TransformPipeline`, acting on a block of columns.
+
+    Steps modify a 2D block in place (`forward`, `inverse`) and describe
+    themselves by `kind` and `params`, so a pipeline can be stored in a
+    checkpoint and rebuilt with `TransformPipeline.from_state_dict`.
+    Stateful steps are fitted by streaming chunks through `partial_fit`.
+    """
+    kind = None
+    stateful = False
+
+    def __init__(self, columns):
+        self.columns = [int(column) for column in columns]
+        self.index = _column_index(self.columns)
+
+    def reset(self):
+        pass
+
+    def partial_fit(self, block):
+        pass
+
+    def forward(self, block):
+        raise NotImplementedError
+
+    def inverse(self, block):
+        raise NotImplementedError
+
+    def params(self):
+        return {}
+
+    def state_dict(self):
+        return {'kind': self.kind, 'columns': list(self.columns), **self.params()}
+
+    def to_torch(self, n_columns, inverse=False):
+        raise NotImplementedError
+
+class Clip(Transform):
+    """Clip columns to ``[lower, upper]``; the inverse leaves values unchanged."""
+    kind = 'clip'
+
+    def __init__(self, columns, lower=-np.inf, upper=np.inf):
+        super().__init__(columns)
+        self.lower = float(lower)
+        self.upper = float(upper)
+
+    def forward(self, block):
+        np.clip(block, self.lower, self.upper, out=block)
+
+    def inverse(self, block):
+        pass
+
+    def params(self):
+        return {'lower': self.lower, 'upper': self.upper}
+
+    def to_torch(self, n_columns, inverse=False):
+        if inverse:
+            return torch.nn.Identity()
+        return ClipModule(
+            _full_width(self.lower, self.columns, n_columns, -np.inf),
+            _full_width(self.upper, self.columns, n_columns, np.inf),
+        )
+
+class BoxCox(Transform):
+    """
+    Box-Cox transform ``(x**lam - 1) / lam`` with one lambda per column.
+
+    `lam` is a scalar or one positive value per column. The inverse clamps
+    ``lam * y + 1`` at zero, so out-of-range network outputs map to zero
+    mass fractions instead of NaN.
+    """
+    kind = 'boxcox'
+
+    def __init__(self, columns, lam=0.1):
+        super().__init__(columns)
+        self.lam = np.broadcast_to(np.asarray(lam, dtype=np.float64), (len(self.columns),)).copy()
+        if np.any(self.lam <= 0):
+            raise ValueError("Box-Cox lambdas must be positive.")
+        self._scalar = bool(np.all(self.lam == self.lam[0]))
+
+    def _lam(self):
+        return self.lam[0] if self._scalar else self.lam
+
+    def forward(self, block):
+        lam = self._lam()
+        np.power(block, lam, out=block)
+        block -= 1
+        block /= lam
+
+    def inverse(self, block):
+        lam = self._lam()
+        block *= lam
+        block += 1
+        np.maximum(block, 0, out=block)
+        np.power(block, 1 / lam, out=block)
+
+    def params(self):
+        return {'lam': self.lam.tolist()}
+
+    def to_torch(self, n_columns, inverse=False):
+        mask = np.zeros(n_columns, dtype=bool)
+        mask[self.columns] = True
+        return BoxCoxModule(
+            torch.from_numpy(mask).reshape(1, -1),
+            _full_width(self.lam, self.columns, n_columns, 1.0),
+            inverse,
+        )
+
+class ZScore(Transform):
+    """Standardise columns with their mean and (unbiased) standard deviation."""
+    kind = 'zscore'
+    stateful = True
+
+    def __init__(self, columns, mean=None, std=None):
+        super().__init__(columns)
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.std = None if std is None else np.asarray(std, dtype=np.float64)
+        self._moments = (0, 0.0, 0.0)
+
+    def reset(self):
+        self.mean, self.std = None, None
+        self._moments = (0, 0.0, 0.0)
+
+    def partial_fit(self, block):
+        self._moments = merge_moments(self._moments, chunk_moments(block))
+        count, mean, m2 = self._moments
+        self.mean, self.std = mean, np.sqrt(m2 / max(count - 1, 1))
+
+    def forward(self, block):
+        block -= self.mean
+        block /= self.std
+
+    def inverse(self, block):
+        block *= self.std
+        block += self.mean
+
+    def params(self):
+        return {'mean': self.mean, 'std': self.std}
+
+    def to_torch(self, n_columns, inverse=False):
+        return AffineModule(
+            _full_width(self.mean, self.columns, n_columns, 0.0),
+            _full_width(self.std, self.columns, n_columns, 1.0),
+            inverse,
+        )
+
+class MinMax(Transform):
+    """Scale columns linearly to [0, 1] with their minimum and maximum."""
+    kind = 'minmax'
+    stateful = True
+
+    def __init__(self, columns, lower=None, upper=None):
+        super().__init__(columns)
+        self.lower = None if lower is None else np.asarray(lower, dtype=np.float64)
+        self.upper = None if upper is None else np.asarray(upper, dtype=np.float64)
+
+    def reset(self):
+        self.lower, self.upper = None, None
+
+    def partial_fit(self, block):
+        lower, upper = block.min(axis=0), block.max(axis=0)
+        self.lower = lower if self.lower is None else np.minimum(self.lower, lower)
+        self.upper = upper if self.upper is None else np.maximum(self.upper, upper)
+
+    def _scale(self):
+        return np.where(self.upper > self.lower, self.upper - self.lower, 1.0)
+
+    def forward(self, block):
+        block -= self.lower
+        block /= self._scale()
+
+    def inverse(self, block):
+        block *= self._scale()
+        block += self.lower
+
+    def params(self):
+        return {'lower': self.lower, 'upper': self.upper}
+
+    def to_torch(self, n_columns, inverse=False):
+        return AffineModule(
+            _full_width(self.lower, self.columns, n_columns, 0.0),
+            _full_width(self._scale(), self.columns, n_columns, 1.0),
+            inverse,
+        )
+
+TRANSFORMS = {step.kind: step for step in (Clip, BoxCox, ZScore, MinMax)}
+
+class ClipModule(torch.nn.Module):
+    def __init__(self, lower, upper):
+        super().__init__()
+        self.register_buffer('lower', lower)
+        self.register_buffer('upper', upper)
+
+    def forward(self, x):
+        return torch.clamp(x, self.lower.to(x.dtype), self.upper.to(x.dtype))
+
+class BoxCoxModule(torch.nn.Module):
+    def __init__(self, mask, lam, inverse: bool = False):
+        super().__init__()
+        self.register_buffer('mask', mask)
+        self.register_buffer('lam', lam)
+        self.inverse = inverse
+
+    def forward(self, x):
+        lam = self.lam.to(x.dtype)
+        if self.inverse:
+            y = (lam * x + 1).clamp_min(0).pow(1 / lam)
+        else:
+            y = (x.pow(lam) - 1) / lam
+        return torch.where(self.mask, y, x)
+
+class AffineModule(torch.nn.Module):
+    def __init__(self, shift, scale, inverse: bool = False):
+        super().__init__()
+        self.register_buffer('shift', shift)
+        self.register_buffer('scale', scale)
+        self.inverse = inverse
+
+    def forward(self, x):
+        if self.inverse:
+            return x * self.scale.to(x.dtype) + self.shift.to(x.dtype)
+        return (x - self.shift.to(x.dtype)) / self.scale.to(x.dtype)
+
+class TransformPipeline:
+    """
+    A sequence of column-block transforms with fit, transform and inverse.
+
+    Every step acts on its whole block of columns at once; contiguous blocks
+    are updated in place through views. Data is processed in chunks of rows
+    written into one output buffer (`out`), so arrays larger than memory --
+    memory-mapped `.npy` files or HDF5 datasets -- can be fitted and
+    transformed with constant working memory. A pipeline is stored with
+    `state_dict` (plain lists and arrays, e.g. inside a `train` checkpoint)
+    and `to_torch` returns the equivalent module for TorchScript export.
+
+    Parameters
+    ----------
+    steps : list of Transform
+        `Clip`, `BoxCox`, `ZScore` and `MinMax` steps, applied in order.
+    n_columns : int
+        Number of columns of the data.
+
+    Examples
+    --------
+    >>> pipeline = TransformPipeline([Clip(range(2, 11), 0, 1), BoxCox(range(2, 11), 0.1), ZScore(range(11))], 11)
+    >>> features = pipeline.fit(states).transform(states)
+    >>> states_back = pipeline.inverse_transform(features)
+    """
+    def __init__(self, steps, n_columns):
+        self.steps = list(steps)
+        self.n_columns = int(n_columns)
+
+    def __getitem__(self, index):
+        steps = self.steps[index]
+        return TransformPipeline(steps if isinstance(index, slice) else [steps], self.n_columns)
+
+    def __len__(self):
+        return len(self.steps)
+
+    @staticmethod
+    def _apply(step, block, inverse=False):
+        method = step.inverse if inverse else step.forward
+        if isinstance(step.index, slice):
+            method(block[:, step.index])
+        else:
+            sub_block = block[:, step.index]
+            method(sub_block)
+            block[:, step.index] = sub_block
+
+    def fit(self, data, chunk_size=2**16):
+        """
+        Fit the stateful steps on `data` in streaming passes.
+
+        Each stateful step sees the data transformed by the steps before it,
+        so a pipeline with k stateful steps reads the data k times.
+        """
+        buffer = np.empty((min(chunk_size, data.shape[0]), self.n_columns))
+        for position, step in enumerate(self.steps):
+            if not step.stateful:
+                continue
+            step.reset()
+            for start in range(0, data.shape[0], chunk_size):
+                block = buffer[:min(chunk_size, data.shape[0] - start)]
+                block[...] = data[start:start + block.shape[0]]
+                for previous in self.steps[:position]:
+                    self._apply(previous, block)
+                step.partial_fit(block[:, step.index])
+        return self
+
+    def _run(self, data, out, chunk_size, inverse, dtype):
+        if out is None:
+            out = np.empty(data.shape, dtype=dtype or np.result_type(data.dtype, np.float32))
+        steps = self.steps[::-1] if inverse else self.steps
+        for start in range(0, data.shape[0], chunk_size):
+            block = out[start:start + chunk_size]
+            block[...] = data[start:start + block.shape[0]]
+            for step in steps:
+                self._apply(step, block, inverse)
+        return out
+
+    def transform(self, data, out=None, chunk_size=2**16, dtype=None):
+        """
+        Transform `data` chunk by chunk into `out`.
+
+        `out` may be `data` itself for an in-place transform. If it is None,
+        a new array of `dtype` is allocated (by default float64, or float32
+        for float32 data).
+        """
+        return self._run(data, out, chunk_size, False, dtype)
+
+    def inverse_transform(self, data, out=None, chunk_size=2**16, dtype=None):
+        """Undo `transform`, applying the inverse steps in reverse order."""
+        return self._run(data, out, chunk_size, True, dtype)
+
+    def state_dict(self):
+        return {'n_columns': self.n_columns, 'steps': [step.state_dict() for step in self.steps]}
+
+    @classmethod
+    def from_state_dict(cls, state):
+        steps = []
+        for params in state['steps']:
+            params = dict(params)
+            steps.append(TRANSFORMS[params.pop('kind')](**params))
+        return cls(steps, state['n_columns'])
+
+    def to_torch(self, inverse=False):
+        """An equivalent `torch.nn.Sequential`, scriptable, with every constant as a buffer."""
+        steps = self.steps[::-1] if inverse else self.steps
+        return torch.nn.Sequential(*(step.to_torch(self.n_columns, inverse) for step in steps))
+
+def feature_pipeline(n_species, mean=None, std=None, lam=0.1):
+    """The network-input pipeline of ``[T, p, Y...]`` states: clip and Box-Cox Y, then z-score."""
+    species = range(2, 2 + n_species)
+    return TransformPipeline(
+        [Clip(species, 0, 1), BoxCox(species, lam), ZScore(range(2 + n_species), mean, std)],
+        2 + n_species,
+    )
+
+def target_pipeline(n_targets, mean=None, std=None):
+    """The z-score of the network targets, the BCT increments of the first n_species - 1 species."""
+    return TransformPipeline([ZScore(range(n_targets), mean, std)], n_targets)
+
+def species_box_cox(features, n_species):
+    """
+    The Box-Cox step of a `feature_pipeline` for the first `n_species` species alone.
+
+    Network outputs cover only n_species - 1 species, so their inverse
+    transform needs the species lambdas re-indexed from column 0.
+    """
+    step = next(step for step in features.steps if isinstance(step, BoxCox))
+    return TransformPipeline([BoxCox(range(n_species), step.lam[:n_species])], n_species)
+
+def checkpoint_pipelines(checkpoint):
+    """
+    The feature and target pipelines of a `train` checkpoint.
+
+    Checkpoints written before the pipelines were stored get them rebuilt
+    from ``data_in_mean``/``data_in_std`` and ``data_target_mean``/``data_target_std``
+    with lambda 0.1.
+    """
+    if 'preprocess' in checkpoint:
+        return (
+            TransformPipeline.from_state_dict(checkpoint['preprocess']['features']),
+            TransformPipeline.from_state_dict(checkpoint['preprocess']['targets']),
+        )
+    n_features = len(checkpoint['data_in_mean'])
+    return (
+        feature_pipeline(n_features - 2, checkpoint['data_in_mean'], checkpoint['data_in_std']),
+        target_pipeline(n_features - 3, checkpoint['data_target_mean'], checkpoint['data_target_std']),
+    )
 
 class DataPreprocessor:
     def __init__(self, data):
@@ -8,9 +418,9 @@ class DataPreprocessor:
         """
         self.data = data
         self.final_data = data.copy()
-        
+
         self.num_rows, self.num_cols = data.shape
-        
+
         # assuming the dataset cols are structured as follows:
         # 0: temperature, 1: pressure, [2 - n_species+2]: species concentrations
         # n_species+2: time step
@@ -20,21 +430,25 @@ class DataPreprocessor:
 
         if (self.num_cols - 5) % 2 != 0:
             raise ValueError("The number of columns does not match the expected structure.")
-        
+
         self.TP_cols = [0, 1, self.n_species + 3, self.n_species + 4]  # Temperature and Pressure columns
         self.Y_cols = list(range(2, 2 + self.n_species)) + list(range(self.n_species + 5, 2 * self.n_species + 5))  # Species concentration columns
         self.delta_t_col = [2 + self.n_species]  # Time step column
-        
+
         self.TP0_cols = [0, 1]  # Initial Temperature and Pressure columns
         self.TP1_cols = [self.n_species + 3, self.n_species + 4]  # Final Temperature and Pressure columns
         self.Y1_cols = list(range(2, 2 + self.n_species))  # Initial species concentration columns
         self.Y2_cols = list(range(self.n_species + 5, 2 * self.n_species + 5))
-                
+
 
     def op(self, columns, operation, *args, **kwargs):
         """
         Apply an operation to specified columns.
-        
+
+        The operation is called once per column with that column as a 1D
+        array. For vectorized, fitted, invertible and serializable transforms
+        use a `TransformPipeline` with `apply` instead.
+
         Args:
             columns (list or str): List of column indices to operate on or 'all' to operate on all columns.
             operation (callable): Function to apply to the specified columns.
@@ -43,79 +457,14 @@ class DataPreprocessor:
         """
         if columns == "all":
             columns = range(self.num_cols)  # Operate on all columns
-        
+
         for col in columns:
             self.final_data[:, col] = operation(self.final_data[:, col], *args, **kwargs)
-        
+
         print(f"Applied {operation.__name__} to columns: {columns}")
-        
-#     def clip_values(self, columns, min_value, max_value):
-#         """
-#         Clip values in specified columns to a given range.
-        
-#         Args:
-#             columns (list or str): List of column indices to clip or 'all' to clip all columns.
-#             min_value (float): Minimum value for clipping.
-#             max_value (float): Maximum value for clipping.
-#         """
-#         if columns == "all":
-#             columns = range(self.data.shape[1])  # Clip all columns
-        
-#         for col in columns:
-#             self.data[:, col] = np.clip(self.data[:, col], min_value, max_value)
-
-#     def normalize_z_score(self, columns):
-#         """
-#         Normalize specified columns using Z-score normalization.
-        
-#         Args:
-#             columns (list or str): List of column indices to normalize or 'all' to normalize all columns.
-#         """
-#         if columns == "all":
-#             columns = range(self.data.shape[1])  # Normalize all columns
-        
-#         for col in columns:
-#             self.data[:, col] = (self.data[:, col] - np.mean(self.data[:, col])) / np.std(self.data[:, col])
-
-#     def normalize_min_max(self, columns):
-#         """
-#         Normalize specified columns using Min-Max normalization.
-        
-#         Args:
-#             columns (list or str): List of column indices to normalize or 'all' to normalize all columns.
-#         """
-#         if columns == "all":
-#             columns = range(self.data.shape[1])  # Normalize all columns
-        
-#         for col in columns:
-#             min_val = np.min(self.data[:, col])
-#             max_val = np.max(self.data[:, col])
-#             self.data[:, col] = (self.data[:, col] - min_val) / (max_val - min_val)
-
-#     def box_cox_transform(self, columns):
-#         """
-#         Apply Box-Cox transformation to specified columns.
-        
-#         Args:
-#             columns (list or str): List of column indices to transform or 'all' to transform all columns.
-#         """
-#         if columns == "all":
-#             columns = range(self.data.shape[1])  # Transform all columns
-        
-#         for col in columns:
-#             transformed_data, _ = stats.boxcox(self.data[:, col] + 1e-5)  # Add small value to avoid zero issues
-#             self.data[:, col] = transformed_data
-
-# # Example usage
-# data = np.random.rand(100, 10)  # Example data with 10 columns
-# preprocessor = DataPreprocessor(data)
-
-# # Apply various transformations
-# preprocessor.clip_values(columns="all", min_value=0.2, max_value=0.8)  # Clip all columns
-# preprocessor.normalize_z_score(columns=[4, 5])  # Z-score normalization on specific columns
-# preprocessor.normalize_min_max(columns="all")  # Min-Max normalization on all columns
-# preprocessor.box_cox_transform(columns=[8, 9])  # Box-Cox transformation on specific columns
-
-# # Compute targets
-# target = preprocessor.compute_target(y1_cols=[2, 3], y2_cols=[7, 8])
-# print("Computed Target:", target)
\ No newline at end of file
+
+    def apply(self, pipeline, chunk_size=2**16):
+        """Fit `pipeline` on the current data and transform it in place."""
+        pipeline.fit(self.final_data, chunk_size)
+        pipeline.transform(self.final_data, out=self.final_data, chunk_size=chunk_size)
+        return pipeline
@@ -0,0 +1,178 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from dfode_kit.utils import BCT
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.data_operations.h5_kit import load_model, predict_Y
+from dfode_kit.data_operations.label_data import label_states
+from dfode_kit.dfode_core.train.train import train
+
+def ensemble_predictions(model_paths, states, mech_path, device='cpu', chunk_size=2**16):
+    """
+    Predicted next mass fractions of every ensemble member.
+
+    Returns an array of shape (n_members, N, n_species); the states are
+    processed in chunks of `chunk_size` rows.
+    """
+    models = [load_model(path, device) for path in model_paths]
+    n_species = get_mechanism(mech_path).n_species
+    predictions = np.empty((len(models), states.shape[0], n_species))
+    for start in range(0, states.shape[0], chunk_size):
+        chunk = np.asarray(states[start:start + chunk_size], dtype=np.float64)
+        for member, (model, path) in enumerate(zip(models, model_paths)):
+            predictions[member, start:start + chunk.shape[0]] = predict_Y(model, path, chunk.copy(), mech_path, device)
+    return predictions
+
+def ensemble_disagreement(model_paths, states, mech_path, device='cpu', chunk_size=2**16):
+    """
+    Uncertainty score of each state from the spread of an ensemble.
+
+    The score is the standard deviation of the members' predicted
+    ``BCT(Y)`` averaged over the species, so minor species count as much as
+    major ones, as in the training loss.
+    """
+    predictions = ensemble_predictions(model_paths, states, mech_path, device, chunk_size)
+    return BCT(np.clip(predictions, 0, 1)).std(axis=0).mean(axis=1)
+
+def ensemble_error(model_paths, labeled_data, mech_path, device='cpu'):
+    """RMSE of the ensemble-mean prediction against CVODE labels, averaged over species."""
+    n_species = get_mechanism(mech_path).n_species
+    predictions = ensemble_predictions(model_paths, labeled_data[:, :2 + n_species], mech_path, device)
+    targets = labeled_data[:, 4 + n_species:4 + 2 * n_species]
+    return float(np.sqrt(np.mean((predictions.mean(axis=0) - targets)**2, axis=0)).mean())
+
+def active_learning(
+    mech_path,
+    pool_file,
+    output_dir,
+    time_step=1e-6,
+    n_members=3,
+    initial_size=1000,
+    query_size=1000,
+    n_rounds=5,
+    initial_epochs=100,
+    round_epochs=20,
+    test_file=None,
+    target_error=None,
+    device='cpu',
+    seed=0,
+    **train_kwargs,
+):
+    """
+    Grow a labeled dataset where an ensemble of models disagrees most.
+
+    A random subset of the unlabeled pool is labeled with CVODE and an
+    ensemble of `n_members` networks, differing in their initial weights and
+    batch order, is trained on it. Each round then scores the remaining
+    pool states with `ensemble_disagreement`, labels the `query_size` most
+    uncertain ones, and continues training every member from its previous
+    weights, and with its previous normalisation, on the extended set. The loop stops after `n_rounds` rounds or
+    once the a-priori error on `test_file` falls to `target_error`.
+
+    Parameters
+    ----------
+    mech_path : str
+        Path to the YAML mechanism file.
+    pool_file : str
+        NUMPY file of unlabeled ``[T, p, Y...]`` states, e.g. written by
+        `augment` or `reduce`.
+    output_dir : str
+        Directory for the labeled set, the member checkpoints of every round
+        and ``active_learning.json``.
+    time_step : float, optional
+        CVODE labeling and model time step. Default is 1e-6.
+    n_members : int, optional
+        Ensemble size. Default is 3.
+    initial_size, query_size : int, optional
+        States labeled before the first round and in every round.
+        Defaults are 1000 and 1000.
+    n_rounds : int, optional
+        Maximum number of query rounds. Default is 5.
+    initial_epochs, round_epochs : int, optional
+        Epochs of the initial training and of each warm-started retraining.
+        Defaults are 100 and 20.
+    test_file : str, optional
+        Labeled NUMPY file for the a-priori error reported every round.
+    target_error : float, optional
+        Stop once the test error is at or below this value. Requires
+        `test_file`.
+    device : str, optional
+        Device used for scoring. Default is 'cpu'.
+    seed : int, optional
+        Seed of the initial draw and of the members. Default is 0.
+    **train_kwargs
+        Further arguments of `train`, e.g. `hidden_layers` or `batch_size`.
+
+    Returns
+    -------
+    list of dict
+        One record per round with the number of labeled states, the mean
+        score of the queried states and the test error when available.
+    """
+    if target_error is not None and test_file is None:
+        raise ValueError("target_error requires a test_file.")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    train_kwargs = dict({'compile': False, 'in_memory': True, 'distributed': False}, **train_kwargs)
+
+    pool = np.load(pool_file)
+    test_data = np.load(test_file) if test_file is not None else None
+    rng = np.random.default_rng(seed)
+    unlabeled = np.ones(pool.shape[0], dtype=bool)
+
+    queried = rng.choice(pool.shape[0], size=min(initial_size, pool.shape[0]), replace=False)
+    labeled = label_states(mech_path, time_step, pool[queried])
+    unlabeled[queried] = False
+    labeled_path = output_dir / 'labeled.npy'
+
+    history = []
+    previous = [None] * n_members
+    query_score = None
+    for round_index in range(n_rounds + 1):
+        round_start = time.perf_counter()
+        np.save(labeled_path, labeled)
+        checkpoints = []
+        for member in range(n_members):
+            checkpoint = output_dir / f'round_{round_index:02d}_member_{member}.pt'
+            train(
+                mech_path, str(labeled_path), str(checkpoint), time_step,
+                epochs=initial_epochs if previous[member] is None else round_epochs,
+                seed=seed + member, init_from=previous[member], **train_kwargs,
+            )
+            checkpoints.append(str(checkpoint))
+        previous = checkpoints
+
+        record = {
+            'round': round_index,
+            'n_labeled': int(labeled.shape[0]),
+            'query_score': query_score,
+            'checkpoints': checkpoints,
+        }
+        if test_data is not None:
+            record['test_error'] = ensemble_error(checkpoints, test_data, mech_path, device)
+        record['time'] = time.perf_counter() - round_start
+        history.append(record)
+        print(
+            f"Round {round_index}: {record['n_labeled']} labeled states"
+            + (f", test RMSE {record['test_error']:.4e}" if 'test_error' in record else '')
+        )
+
+        done = target_error is not None and record['test_error'] <= target_error
+        if done or round_index == n_rounds or not unlabeled.any():
+            break
+
+        candidates = np.flatnonzero(unlabeled)
+        scores = ensemble_disagreement(checkpoints, pool[candidates], mech_path, device)
+        k = min(query_size, candidates.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        query_score = float(scores[top].mean())
+        queried = candidates[top]
+        labeled = np.concatenate((labeled, label_states(mech_path, time_step, pool[queried])))
+        unlabeled[queried] = False
+
+    with open(output_dir / 'active_learning.json', 'w') as f:
+        json.dump({'pool_size': int(pool.shape[0]), 'rounds': history}, f, indent=2)
+    return history
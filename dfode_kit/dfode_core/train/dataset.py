@@ -0,0 +1,250 @@
+from pathlib import Path
+
+import h5py
+import torch
+import numpy as np
+
+from dfode_kit.utils import storage_dtype
+from dfode_kit.dfode_core.train.loss import loss_invariants
+from dfode_kit.dfode_core.train.distributed import all_gather_array
+from dfode_kit.dfode_core.preprocess import merge_moments, chunk_moments, feature_pipeline, target_pipeline, ZScore
+
+class LabeledDataset(torch.utils.data.Dataset):
+    """
+    Out-of-core view of a labeled dataset for mini-batch training.
+
+    The labeled rows ``[T, p, Y_1..Y_n, T', p', Y'_1..Y'_n]`` written by the
+    `label` command are read lazily from a memory-mapped `.npy` file or an
+    HDF5 dataset, so only the rows of the current batch are held in memory.
+    Each row becomes the network input ``[T, p, BCT(Y)]`` and the target
+    ``BCT(Y'_{1..n-1}) - BCT(Y_{1..n-1})``, both normalised with the
+    statistics from `compute_statistics`. Both steps run through the
+    `TransformPipeline` of `feature_pipeline` and `target_pipeline`, the
+    same implementation `predict_Y` and the exported module use.
+
+    Indexing takes a list of row indices and returns the whole batch, so the
+    dataset is meant to be used with a `BatchSampler` and ``batch_size=None``
+    in the `DataLoader` (see `make_loader`). With `formation_enthalpies`
+    given, each batch also carries the `loss_invariants` of its rows, which
+    are then computed by the loader (and its workers) instead of the
+    training step. `cache` computes every tensor once when the dataset fits
+    in memory.
+
+    Parameters
+    ----------
+    source_file : str
+        Path to a `.npy` file, or an HDF5 file holding the rows in `h5_dataset`.
+    n_species : int
+        Number of species in the mechanism.
+    h5_dataset : str, optional
+        Dataset name inside an HDF5 file. Default is 'labeled_data'.
+    formation_enthalpies : np.ndarray, optional
+        Species formation enthalpies [J/kg] for the physics-loss invariants.
+    dtype : {'float64', 'float32'}, optional
+        Dtype in which rows are read and transformed. 'float32' halves the
+        memory of every chunk and of the `cache`; the statistics are still
+        accumulated in float64. Default is 'float64'.
+    """
+    def __init__(self, source_file, n_species, h5_dataset='labeled_data', formation_enthalpies=None, dtype='float64'):
+        self.source_file = str(source_file)
+        self.dtype = storage_dtype(dtype)
+        self.n_species = n_species
+        self.h5_dataset = h5_dataset
+        self.formation_enthalpies = formation_enthalpies
+        self._cache = None
+        self.is_hdf5 = Path(self.source_file).suffix in ('.h5', '.hdf5')
+        self._data = None
+
+        n_rows, n_cols = self.data.shape
+        if n_cols != 4 + 2 * n_species:
+            raise ValueError(
+                f"Expected {4 + 2 * n_species} columns for {n_species} species, got {n_cols}."
+            )
+        self.n_rows = n_rows
+        self.statistics = None
+        self.feature_pipeline = feature_pipeline(n_species)
+        self.target_pipeline = None
+
+    @property
+    def data(self):
+        # Opened lazily so that every DataLoader worker gets its own handle
+        if self._data is None:
+            if self.is_hdf5:
+                self._data = h5py.File(self.source_file, 'r')[self.h5_dataset]
+            else:
+                self._data = np.load(self.source_file, mmap_mode='r')
+        return self._data
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_data'] = None
+        return state
+
+    def __len__(self):
+        return self.n_rows
+
+    def rows(self, indices):
+        """Read rows in ascending index order, as HDF5 fancy indexing requires."""
+        return np.asarray(self.data[np.sort(np.asarray(indices))], dtype=self.dtype)
+
+    def transform(self, rows):
+        """Return the unnormalised features and targets of raw labeled rows."""
+        n = self.n_species
+        box_cox = self.feature_pipeline[:2]
+        states1 = box_cox.transform(rows[:, :2 + n], dtype=rows.dtype)
+        states2 = box_cox.transform(rows[:, 2 + n:], dtype=rows.dtype)
+        targets = states2[:, 2:-1] - states1[:, 2:-1]
+        return states1, targets
+
+    def chunks(self, chunk_size=2**16, start=0, stop=None, indices=None):
+        """
+        Yield the unnormalised features and targets of consecutive row chunks,
+        or of consecutive chunks of `indices` when given.
+        """
+        if indices is not None:
+            for chunk_start in range(0, len(indices), chunk_size):
+                yield self.transform(self.rows(indices[chunk_start:chunk_start + chunk_size]))
+            return
+        stop = self.n_rows if stop is None else stop
+        for chunk_start in range(start, stop, chunk_size):
+            rows = np.asarray(self.data[chunk_start:min(chunk_start + chunk_size, stop)], dtype=self.dtype)
+            yield self.transform(rows)
+
+    def partial_statistics(self, start=0, stop=None, chunk_size=2**16, indices=None):
+        """
+        Accumulate streaming moments over rows ``start:stop``, or over the
+        rows in `indices`, in float64.
+
+        Each chunk's mean and sum of squared deviations are folded into the
+        running ``(count, mean, m2)`` of the features and targets with
+        `merge_moments`, so memory stays constant in the number of rows.
+        Results of other row ranges, e.g. of distributed ranks, merge the
+        same way, with the element-wise minimum/maximum of
+        ``lower``/``upper``.
+        """
+        n_features, n_targets = 2 + self.n_species, self.n_species - 1
+        moments = {
+            'features': (0, np.zeros(n_features), np.zeros(n_features)),
+            'targets': (0, np.zeros(n_targets), np.zeros(n_targets)),
+        }
+        lower, upper = np.full(n_features, np.inf), np.full(n_features, -np.inf)
+        for features, targets in self.chunks(chunk_size, start, stop, indices):
+            for key, values in (('features', features), ('targets', targets)):
+                moments[key] = merge_moments(moments[key], chunk_moments(values))
+            lower = np.minimum(lower, features.min(axis=0))
+            upper = np.maximum(upper, features.max(axis=0))
+        return {'moments': moments, 'lower': lower, 'upper': upper}
+
+    def compute_statistics(self, chunk_size=2**16, rank=0, world_size=1, pipelines=None, indices=None):
+        """
+        Compute the normalisation statistics in one streaming pass.
+
+        Means and (unbiased) standard deviations are accumulated chunk by
+        chunk with Welford updates (see `partial_statistics`), so only one
+        chunk of rows is held in memory at a time; the feature minima and
+        maxima are kept for the training envelope. With `world_size` above
+        one, every rank reads a contiguous share of the rows, the per-rank
+        moments are gathered and merged in rank order, and all ranks end up
+        with the statistics of the full dataset.
+
+        With `pipelines`, the ``(features, targets)`` pipelines of an
+        existing checkpoint (see `checkpoint_pipelines`), the data is
+        transformed and normalised exactly as that model was trained, so its
+        weights can be trained further; only the feature bounds come from
+        this dataset.
+
+        With `indices`, only those rows are used, e.g. the training rows of a
+        train/validation split, so held-out rows do not leak into the
+        normalisation.
+        """
+        if pipelines is not None:
+            self.feature_pipeline = pipelines[0]
+        if indices is not None:
+            indices = np.sort(np.asarray(indices))
+        n_rows = self.n_rows if indices is None else len(indices)
+        start, stop = 0, n_rows
+        if world_size > 1:
+            start = n_rows * rank // world_size
+            stop = n_rows * (rank + 1) // world_size
+        if indices is None:
+            partial = self.partial_statistics(start, stop, chunk_size)
+        else:
+            partial = self.partial_statistics(chunk_size=chunk_size, indices=indices[start:stop])
+
+        statistics = {}
+        for key, (count, mean, m2) in partial['moments'].items():
+            if world_size > 1:
+                gathered = all_gather_array(np.concatenate(([count], mean, m2)))
+                n_columns = mean.shape[0]
+                count, mean, m2 = 0, np.zeros(n_columns), np.zeros(n_columns)
+                for row in gathered:
+                    count, mean, m2 = merge_moments(
+                        (count, mean, m2), (row[0], row[1:1 + n_columns], row[1 + n_columns:]),
+                    )
+            statistics[f'{key}_mean'] = mean
+            statistics[f'{key}_std'] = np.sqrt(m2 / (count - 1))
+        lower, upper = all_gather_array(partial['lower']), all_gather_array(partial['upper'])
+        statistics['features_lower'] = lower.min(axis=0)
+        statistics['features_upper'] = upper.max(axis=0)
+        if pipelines is not None:
+            self.target_pipeline = pipelines[1]
+            for key, pipeline in zip(('features', 'targets'), pipelines):
+                step = next(step for step in pipeline.steps if isinstance(step, ZScore))
+                statistics[f'{key}_mean'], statistics[f'{key}_std'] = step.mean, step.std
+        else:
+            self.feature_pipeline = feature_pipeline(self.n_species, statistics['features_mean'], statistics['features_std'])
+            self.target_pipeline = target_pipeline(self.n_species - 1, statistics['targets_mean'], statistics['targets_std'])
+        self.statistics = statistics
+        return statistics
+
+    def normalize(self, features, targets):
+        return (
+            self.feature_pipeline[2:].transform(features),
+            self.target_pipeline.transform(targets),
+        )
+
+    def batch(self, rows):
+        """Turn raw labeled rows into the float32 tensors of one training batch."""
+        features, targets = self.transform(rows)
+        tensors = list(self.normalize(features, targets))
+        if self.formation_enthalpies is not None:
+            tensors += loss_invariants(features, targets, self.statistics['targets_mean'], self.formation_enthalpies)
+        return tuple(torch.from_numpy(np.asarray(tensor, dtype=np.float32)) for tensor in tensors)
+
+    def cache(self):
+        """Compute the tensors of all rows once and serve batches from memory."""
+        self._cache = self.batch(np.asarray(self.data[:], dtype=self.dtype))
+
+    def __getitem__(self, indices):
+        if self._cache is not None:
+            indices = torch.as_tensor(np.asarray(indices))
+            return tuple(tensor[indices] for tensor in self._cache)
+        return self.batch(self.rows(indices))
+
+def make_loader(dataset, batch_size, shuffle=True, num_workers=0, pin_memory=False, seed=0, rank=0, world_size=1):
+    """
+    Build a `DataLoader` yielding whole mini-batches of `dataset`.
+
+    Rows of a batch are drawn at random over the full dataset when
+    `shuffle` is True, and read in one indexed access. With `world_size`
+    above one, each rank only sees its own shard of the rows; call
+    ``loader.sampler.sampler.set_epoch(epoch)`` to reshuffle the shards.
+    """
+    if world_size > 1:
+        sampler = torch.utils.data.distributed.DistributedSampler(
+            dataset, num_replicas=world_size, rank=rank, shuffle=shuffle, seed=seed,
+        )
+    elif shuffle:
+        generator = torch.Generator().manual_seed(seed)
+        sampler = torch.utils.data.RandomSampler(dataset, generator=generator)
+    else:
+        sampler = torch.utils.data.SequentialSampler(dataset)
+    batch_sampler = torch.utils.data.BatchSampler(sampler, batch_size, drop_last=False)
+    return torch.utils.data.DataLoader(
+        dataset,
+        sampler=batch_sampler,
+        batch_size=None,
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        persistent_workers=num_workers > 0,
+    )
@@ -0,0 +1,41 @@
+import os
+
+import torch
+import numpy as np
+import torch.distributed as dist
+
+def init_distributed(backend='gloo'):
+    """
+    Join the process group described by the `torchrun` environment.
+
+    Returns
+    -------
+    rank : int
+        Rank of this process, 0 when not running distributed.
+    world_size : int
+        Number of processes, 1 when not running distributed.
+    """
+    world_size = int(os.environ.get('WORLD_SIZE', 1))
+    if world_size == 1:
+        return 0, 1
+    if not dist.is_initialized():
+        dist.init_process_group(backend)
+    return dist.get_rank(), dist.get_world_size()
+
+def all_reduce_sum(array):
+    """Sum a float64 NumPy array over all ranks in place; a no-op without a process group."""
+    if dist.is_initialized():
+        dist.all_reduce(torch.from_numpy(array), op=dist.ReduceOp.SUM)
+    return array
+
+def all_gather_array(array):
+    """Stack a float64 NumPy array from every rank in rank order; shape (world_size, ...)."""
+    if not dist.is_initialized():
+        return array[None]
+    gathered = [torch.empty_like(torch.from_numpy(array)) for _ in range(dist.get_world_size())]
+    dist.all_gather(gathered, torch.from_numpy(np.ascontiguousarray(array)))
+    return torch.stack(gathered).numpy()
+
+def cleanup_distributed():
+    if dist.is_initialized():
+        dist.destroy_process_group()
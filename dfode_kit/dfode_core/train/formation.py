@@ -1,9 +1,5 @@
-import cantera as ct
-import numpy as np
+from dfode_kit.mechanism import get_mechanism
 
 def formation_calculate(mechanism):
-    gas = ct.Solution(mechanism) 
-    gas.TPY = 298.15, ct.one_atm,'O2:1' 
-    partial_molar_enthalpy = gas.partial_molar_enthalpies/gas.molecular_weights
-    print(partial_molar_enthalpy)
-    return partial_molar_enthalpy
\ No newline at end of file
+    """Return the species enthalpies of formation [J/kg] cached for `mechanism`."""
+    return get_mechanism(mechanism).formation_enthalpies
@@ -0,0 +1,161 @@
+import time
+
+import torch
+import numpy as np
+
+from dfode_kit.dfode_core.train.telemetry import NullTimer
+
+def loss_invariants(features, targets, targets_mean, formation_enthalpies, lam=0.1):
+    """
+    Per-sample tensors of the physics losses that do not depend on the network.
+
+    Parameters
+    ----------
+    features : np.ndarray
+        Unnormalised inputs ``[T, p, BCT(Y)]``, shape (N, 2 + n_species).
+    targets : np.ndarray
+        Unnormalised BCT increments of the first n_species - 1 species.
+    targets_mean : np.ndarray
+        Mean of the targets used for normalisation.
+    formation_enthalpies : np.ndarray
+        Species formation enthalpies [J/kg], shape (n_species,).
+    lam : float, optional
+        Box-Cox lambda. Default is 0.1.
+
+    Returns
+    -------
+    base : np.ndarray
+        ``lam * (BCT(Y_in) + targets_mean) + 1`` so that the predicted mass
+        fractions are ``(lam * targets_std * preds + base) ** (1 / lam)``.
+    Y_in_sum : np.ndarray
+        Sum of the input mass fractions of the first n_species - 1 species.
+    h_target : np.ndarray
+        Formation enthalpy of the labeled mixture, the inert species closing
+        the mass balance.
+    """
+    bct_in = features[:, 2:-1]
+    Y_in = (lam * bct_in + 1)**(1 / lam)
+    Y_target = (lam * (bct_in + targets) + 1)**(1 / lam)
+    h_target = Y_target @ (formation_enthalpies[:-1] - formation_enthalpies[-1]) + formation_enthalpies[-1]
+    base = lam * (bct_in + targets_mean) + 1
+    return base, Y_in.sum(axis=1), h_target
+
+class PhysicsLoss(torch.nn.Module):
+    """
+    The three-term training loss with its constants held as buffers.
+
+    ``loss1`` is the L1 error of the normalised BCT increments, ``loss2`` the
+    L1 error of the mass-fraction sum and ``loss3`` the L1 error of the
+    mixture formation enthalpy divided by the time step. The total is
+    ``loss1 + loss2 * mass_weight + loss3 * enthalpy_weight``. Everything
+    that depends only on the data comes precomputed from `loss_invariants`,
+    so a step only evaluates the terms that involve the prediction.
+
+    Parameters
+    ----------
+    formation_enthalpies : np.ndarray
+        Species formation enthalpies [J/kg].
+    targets_std : np.ndarray
+        Standard deviation of the targets used for normalisation.
+    time_step : float
+        Time step of the labels.
+    mass_weight : float, optional
+        Weight of the mass-sum term. Default is 1.
+    enthalpy_weight : float, optional
+        Weight of the enthalpy term. Default is 1e-13.
+    lam : float, optional
+        Box-Cox lambda. Default is 0.1.
+    """
+    def __init__(self, formation_enthalpies, targets_std, time_step, mass_weight=1.0, enthalpy_weight=1e-13, lam=0.1):
+        super().__init__()
+        formation_enthalpies = np.asarray(formation_enthalpies, dtype=np.float64)
+        self.register_buffer('scale', torch.tensor(lam * np.asarray(targets_std), dtype=torch.float32))
+        self.register_buffer('h_delta', torch.tensor(formation_enthalpies[:-1] - formation_enthalpies[-1], dtype=torch.float32))
+        self.h_inert = float(formation_enthalpies[-1])
+        self.exponent = 1 / lam
+        self.time_step = float(time_step)
+        self.mass_weight = float(mass_weight)
+        self.enthalpy_weight = float(enthalpy_weight)
+
+    def forward(self, preds, labels, base, Y_in_sum, h_target):
+        loss1 = torch.nn.functional.l1_loss(preds, labels)
+
+        Y_out = (self.scale * preds + base)**self.exponent
+        loss2 = torch.nn.functional.l1_loss(Y_out.sum(dim=1), Y_in_sum)
+        loss3 = torch.nn.functional.l1_loss(Y_out @ self.h_delta + self.h_inert, h_target) / self.time_step
+
+        loss = loss1 + loss2 * self.mass_weight + loss3 * self.enthalpy_weight
+        return loss, torch.stack((loss1, loss2, loss3, loss)).detach()
+
+def make_loss_step(model, loss_module, compile=True, timer=None):
+    """
+    Return a function running forward, loss and backward for one batch.
+
+    With `compile` the forward and loss are compiled with `torch.compile`,
+    which also compiles the matching backward graph. If compilation is not
+    available or fails on the first batch, the eager step is used instead.
+    The returned function has a `compiled` attribute telling which one runs.
+
+    With a `PhaseTimer` as `timer`, the eager step records the 'forward',
+    'loss' and 'backward' phases, and the compiled step, whose forward and
+    loss are fused, 'forward_loss' and 'backward'.
+    """
+    timer = timer if timer is not None else NullTimer()
+
+    def forward_loss(features, labels, *invariants):
+        return loss_module(model(features), labels, *invariants)
+
+    def eager_step(features, labels, *invariants):
+        with timer.phase('forward'):
+            preds = model(features)
+        with timer.phase('loss'):
+            loss, terms = loss_module(preds, labels, *invariants)
+        with timer.phase('backward'):
+            loss.backward()
+        return terms
+
+    if not compile or not hasattr(torch, 'compile'):
+        eager_step.compiled = False
+        eager_step.eager = eager_step
+        return eager_step
+
+    compiled_forward_loss = torch.compile(forward_loss)
+
+    def step(*batch):
+        if step.compiled:
+            try:
+                with timer.phase('forward_loss'):
+                    loss, terms = compiled_forward_loss(*batch)
+                with timer.phase('backward'):
+                    loss.backward()
+                return terms
+            except Exception as e:
+                print(f"torch.compile failed, falling back to the eager training step: {e}")
+                step.compiled = False
+                model.zero_grad(set_to_none=True)
+        return eager_step(*batch)
+
+    step.compiled = True
+    step.eager = eager_step
+    return step
+
+def measure_step_speedup(step, model, batch, n_repeats=5):
+    """
+    Time the compiled and eager loss steps on one batch.
+
+    Gradients are cleared after every call, so the weights are unchanged.
+    Returns ``(compiled_seconds, eager_seconds)`` per step, best of
+    `n_repeats`.
+    """
+    timings = []
+    for fn in (step, step.eager):
+        fn(*batch)
+        model.zero_grad(set_to_none=True)
+        best = np.inf
+        for _ in range(n_repeats):
+            start = time.perf_counter()
+            fn(*batch)
+            best = min(best, time.perf_counter() - start)
+            model.zero_grad(set_to_none=True)
+        timings.append(best)
+    return tuple(timings)
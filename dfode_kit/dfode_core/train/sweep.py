@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import itertools
+from pathlib import Path
+
+import torch
+import numpy as np
+import torch.multiprocessing as mp
+
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.dfode_core.model.build import build_model
+from dfode_kit.dfode_core.train.formation import formation_calculate
+from dfode_kit.dfode_core.train.dataset import LabeledDataset
+from dfode_kit.dfode_core.train.loss import PhysicsLoss, make_loss_step
+from dfode_kit.dfode_core.train.train import training_envelope, make_checkpoint
+
+TRIAL_DEFAULTS = {
+    'architecture': 'mlp',
+    'activation': 'gelu',
+    'hidden_layers': [400, 400, 400, 400],
+    'lr': 1e-3,
+    'mass_weight': 1.0,
+    'enthalpy_weight': 1e-13,
+    'batch_size': 4096,
+    'epochs': 100,
+}
+METRICS = ('loss1', 'loss2', 'loss3', 'loss')
+
+def _sample(rng, values):
+    if isinstance(values, dict):
+        if 'log_uniform' in values:
+            low, high = np.log(values['log_uniform'])
+            return float(np.exp(rng.uniform(low, high)))
+        if 'uniform' in values:
+            return float(rng.uniform(*values['uniform']))
+        if 'int_uniform' in values:
+            low, high = values['int_uniform']
+            return int(rng.integers(low, high + 1))
+        raise ValueError(f"Unknown distribution {values}.")
+    return values[rng.integers(len(values))]
+
+def expand_spec(spec, seed=0):
+    """
+    Turn a sweep specification into the list of trial settings.
+
+    The specification has a ``method`` ('grid' or 'random'), the swept
+    ``parameters`` and optional ``fixed`` settings. A grid takes every
+    combination of the listed values. Random search draws ``n_trials``
+    settings, where a parameter is either a list to choose from or one of
+    ``{"log_uniform": [low, high]}``, ``{"uniform": [low, high]}`` and
+    ``{"int_uniform": [low, high]}``. Settings that are not given keep the
+    `train` defaults.
+
+    Examples
+    --------
+    >>> expand_spec({
+    ...     'method': 'grid',
+    ...     'parameters': {'lr': [1e-3, 3e-4], 'hidden_layers': [[400] * 4, [800] * 4]},
+    ...     'fixed': {'epochs': 20},
+    ... })
+    """
+    unknown = set(spec.get('parameters', {})) | set(spec.get('fixed', {}))
+    unknown -= set(TRIAL_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters {sorted(unknown)}, expected some of {list(TRIAL_DEFAULTS)}.")
+
+    base = dict(TRIAL_DEFAULTS, **spec.get('fixed', {}))
+    parameters = spec.get('parameters', {})
+    method = spec.get('method', 'grid')
+    if method == 'grid':
+        names = list(parameters)
+        return [dict(base, **dict(zip(names, values))) for values in itertools.product(*parameters.values())]
+    if method == 'random':
+        rng = np.random.default_rng(seed)
+        return [
+            dict(base, **{name: _sample(rng, values) for name, values in parameters.items()})
+            for _ in range(spec['n_trials'])
+        ]
+    raise ValueError(f"Unknown sweep method '{method}', expected 'grid' or 'random'.")
+
+# Set in every worker by _init_worker
+_shared = {}
+
+def _init_worker(shared):
+    _shared.update(shared)
+
+@torch.no_grad()
+def _evaluate(model, loss_module, tensors, chunk_size=2**16):
+    totals = torch.zeros(4, dtype=torch.float64)
+    n_rows = tensors[0].shape[0]
+    for start in range(0, n_rows, chunk_size):
+        chunk = [tensor[start:start + chunk_size] for tensor in tensors]
+        _, terms = loss_module(model(chunk[0]), *chunk[1:])
+        totals += chunk[0].shape[0] * terms
+    return dict(zip(METRICS, (totals / n_rows).tolist()))
+
+def _run_trial(task):
+    index, settings, output_dir, n_threads, seed = task
+    torch.set_num_threads(n_threads)
+    torch.manual_seed(seed + index)
+
+    stats = _shared['stats']
+    n_species = _shared['n_species']
+    train_tensors, val_tensors = _shared['train'], _shared['val']
+
+    architecture = {
+        'type': settings['architecture'],
+        'layers': [2 + n_species] + list(settings['hidden_layers']) + [n_species - 1],
+        'activation': settings['activation'],
+    }
+    model = build_model(architecture)
+    loss_module = PhysicsLoss(
+        _shared['formation_enthalpies'], stats['targets_std'], _shared['time_step'],
+        settings['mass_weight'], settings['enthalpy_weight'],
+    )
+    optimizer = torch.optim.Adam(model.parameters(), lr=settings['lr'])
+    loss_step = make_loss_step(model, loss_module, compile=False)
+
+    start = time.perf_counter()
+    generator = torch.Generator().manual_seed(seed + index)
+    n_train = train_tensors[0].shape[0]
+    model.train()
+    for _ in range(settings['epochs']):
+        for indices in torch.randperm(n_train, generator=generator).split(settings['batch_size']):
+            optimizer.zero_grad()
+            loss_step(*(tensor[indices] for tensor in train_tensors))
+            optimizer.step()
+    train_time = time.perf_counter() - start
+
+    model.eval()
+    checkpoint_path = Path(output_dir) / f'trial_{index:03d}.pt'
+    torch.save(make_checkpoint(model, stats, _shared['envelope'], architecture), checkpoint_path)
+    return {
+        'trial': index,
+        'settings': settings,
+        'validation': _evaluate(model, loss_module, val_tensors),
+        'train_time': train_time,
+        'checkpoint': str(checkpoint_path),
+    }
+
+def run_sweep(
+    mech_path,
+    source_file,
+    spec,
+    output_dir,
+    time_step=1e-6,
+    n_workers=None,
+    threads_per_trial=None,
+    val_fraction=0.1,
+    metric='loss1',
+    h5_dataset='labeled_data',
+    seed=0,
+):
+    """
+    Train one model per trial setting in parallel and rank them on held-out data.
+
+    The labeled data is read and preprocessed once -- normalisation, targets
+    and physics-loss invariants -- into tensors placed in shared memory, so
+    every worker process trains on the same copy without reloading it. Each
+    worker runs its trials with `threads_per_trial` intra-op threads, and
+    each trial writes a checkpoint in the `train` format to `output_dir`.
+    The normalisation statistics and the envelope are fitted on the training
+    rows only, so the validation rows stay held out.
+
+    Parameters
+    ----------
+    mech_path : str
+        Path to the YAML mechanism file.
+    source_file : str
+        Labeled `.npy` or HDF5 file, see `LabeledDataset`.
+    spec : dict or str
+        Sweep specification (or the path of a JSON file holding it), see
+        `expand_spec`.
+    output_dir : str
+        Directory for the trial checkpoints and ``sweep_results.json``.
+    time_step : float, optional
+        Time step of the labels. Default is 1e-6.
+    n_workers : int, optional
+        Number of trials trained at once. Default is the number of CPUs
+        divided by `threads_per_trial`.
+    threads_per_trial : int, optional
+        Intra-op threads per trial. Default is 1.
+    val_fraction : float, optional
+        Fraction of rows held out for validation. Default is 0.1.
+    metric : {'loss1', 'loss2', 'loss3', 'loss'}, optional
+        Validation metric used for the ranking. 'loss1', the error of the
+        normalised predictions, stays comparable across loss weights.
+        Default is 'loss1'.
+    h5_dataset : str, optional
+        Dataset name in an HDF5 source file.
+    seed : int, optional
+        Seed of the split, the random search and the trials. Default is 0.
+
+    Returns
+    -------
+    list of dict
+        Trial records sorted from best to worst.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}.")
+    if isinstance(spec, (str, Path)):
+        with open(spec) as f:
+            spec = json.load(f)
+    trials = expand_spec(spec, seed)
+    threads_per_trial = threads_per_trial or 1
+    n_workers = n_workers or max(1, (os.cpu_count() or 1) // threads_per_trial)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    n_species = get_mechanism(mech_path).n_species
+    formation_enthalpies = formation_calculate(mech_path)
+    dataset = LabeledDataset(source_file, n_species, h5_dataset, formation_enthalpies)
+
+    # Split first, the normalisation and envelope only see the training rows
+    permutation = torch.randperm(len(dataset), generator=torch.Generator().manual_seed(seed))
+    n_val = max(1, int(round(len(dataset) * val_fraction)))
+    train_rows = permutation[n_val:].numpy()
+    stats = dataset.compute_statistics(indices=train_rows)
+    tensors = dataset.batch(np.asarray(dataset.data[:], dtype=dataset.dtype))
+
+    shared = {
+        'train': [tensor[permutation[n_val:]].share_memory_() for tensor in tensors],
+        'val': [tensor[permutation[:n_val]].share_memory_() for tensor in tensors],
+        'stats': stats,
+        'n_species': n_species,
+        'formation_enthalpies': formation_enthalpies,
+        'time_step': time_step,
+        'envelope': training_envelope(dataset, stats, seed, indices=train_rows),
+    }
+    del tensors
+    print(
+        f"Running {len(trials)} trials on {len(dataset) - n_val} training and {n_val} validation states, "
+        f"{n_workers} at a time with {threads_per_trial} thread(s) each"
+    )
+
+    tasks = [(index, settings, str(output_dir), threads_per_trial, seed) for index, settings in enumerate(trials)]
+    results = []
+    with mp.get_context('spawn').Pool(n_workers, initializer=_init_worker, initargs=(shared,)) as pool:
+        for result in pool.imap_unordered(_run_trial, tasks):
+            print(
+                f"Trial {result['trial']:3d}: {metric} {result['validation'][metric]:.4e} "
+                f"({result['train_time']:.1f} s) {result['settings']}"
+            )
+            results.append(result)
+
+    results.sort(key=lambda result: result['validation'][metric])
+    with open(output_dir / 'sweep_results.json', 'w') as f:
+        json.dump({'metric': metric, 'spec': spec, 'results': results}, f, indent=2)
+    print_sweep_ranking(results, metric)
+    return results
+
+def print_sweep_ranking(results, metric):
+    print(f"{'rank':>4} {'trial':>5} {metric:>12}  checkpoint")
+    for rank, result in enumerate(results, start=1):
+        print(f"{rank:4d} {result['trial']:5d} {result['validation'][metric]:12.4e}  {result['checkpoint']}")
@@ -0,0 +1,129 @@
+import json
+import time
+import resource
+import contextlib
+from collections import defaultdict
+
+import torch
+
+class PhaseTimer:
+    """
+    Accumulate wall time per named phase of the training step.
+
+    On CUDA devices every phase ends with a synchronisation, so the time of
+    asynchronous kernels is charged to the phase that launched them.
+    """
+    def __init__(self, device='cpu'):
+        self.synchronize = torch.cuda.synchronize if torch.device(device).type == 'cuda' else None
+        self.totals = defaultdict(float)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.synchronize is not None:
+                self.synchronize()
+            self.totals[name] += time.perf_counter() - start
+
+    def reset(self):
+        """Return the accumulated times and start from zero."""
+        totals, self.totals = dict(self.totals), defaultdict(float)
+        return totals
+
+    @contextlib.contextmanager
+    def suspended(self):
+        """Discard the phases recorded inside the block, e.g. during a side measurement."""
+        saved = self.totals
+        self.totals = defaultdict(float)
+        try:
+            yield
+        finally:
+            self.totals = saved
+
+class NullTimer:
+    """A `PhaseTimer` stand-in that measures nothing."""
+    _context = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self._context
+
+    def suspended(self):
+        return self._context
+
+    def reset(self):
+        return {}
+
+def memory_usage(device='cpu'):
+    """Peak resident memory of the process and, on CUDA, the allocated tensor memory in MB."""
+    # ru_maxrss is reported in KiB on Linux
+    usage = {'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    if torch.device(device).type == 'cuda':
+        usage['allocated_mb'] = torch.cuda.memory_allocated() / 2**20
+        usage['peak_allocated_mb'] = torch.cuda.max_memory_allocated() / 2**20
+        torch.cuda.reset_peak_memory_stats()
+    return usage
+
+class TrainingTelemetry:
+    """
+    Write one JSON record per epoch describing where the training time went.
+
+    Each line of the JSONL file holds the epoch, the number of samples and
+    steps, the wall time and samples per second, the time of every phase
+    recorded with `phase` (data loading, host-to-device transfer, forward,
+    physics losses, backward, optimizer), the memory from `memory_usage` and
+    the mean of every loss term.
+
+    Parameters
+    ----------
+    path : str
+        Output JSONL file, overwritten.
+    device : torch.device or str
+        Training device.
+    """
+    def __init__(self, path, device='cpu'):
+        self.path = str(path)
+        self.device = device
+        self.timer = PhaseTimer(device)
+        self._file = open(self.path, 'w')
+
+    def phase(self, name):
+        return self.timer.phase(name)
+
+    def log_epoch(self, epoch, n_samples, n_steps, wall_time, losses):
+        record = {
+            'epoch': epoch,
+            'samples': int(n_samples),
+            'steps': int(n_steps),
+            'wall_time': wall_time,
+            'samples_per_second': n_samples / wall_time if wall_time > 0 else None,
+            'phases': self.timer.reset(),
+            'memory': memory_usage(self.device),
+            'losses': {name: float(value) for name, value in losses.items()},
+        }
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        return record
+
+    def close(self):
+        self._file.close()
+
+def make_profiler(trace_path, start_step, stop_step):
+    """
+    A `torch.profiler.profile` recording steps ``start_step:stop_step``.
+
+    Call ``step()`` after every optimizer step; the Chrome trace of the
+    window is written to `trace_path` (open it in chrome://tracing or
+    Perfetto) once the window ends.
+    """
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+    return torch.profiler.profile(
+        activities=activities,
+        schedule=torch.profiler.schedule(wait=start_step, warmup=0, active=stop_step - start_step, repeat=1),
+        on_trace_ready=lambda profiler: profiler.export_chrome_trace(str(trace_path)),
+        record_shapes=True,
+        profile_memory=True,
+    )
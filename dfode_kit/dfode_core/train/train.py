@@ -1,17 +1,44 @@
+import time
 import torch
 import numpy as np
 import os
-import cantera as ct
-from dfode_kit.dfode_core.model.mlp import MLP
+import contextlib
+from pathlib import Path
+from dfode_kit.dfode_core.model.build import build_model
 from dfode_kit.dfode_core.train.formation import formation_calculate
-from dfode_kit.utils import BCT
-from dfode_kit.data_operations import label_npy
+from dfode_kit.utils import load_checkpoint
+from dfode_kit.mechanism import get_mechanism
+from dfode_kit.dfode_core.inference.router import build_envelope
+from dfode_kit.dfode_core.train.dataset import LabeledDataset, make_loader
+from dfode_kit.dfode_core.preprocess import feature_pipeline, target_pipeline, checkpoint_pipelines
+from dfode_kit.dfode_core.train.distributed import init_distributed, all_reduce_sum, cleanup_distributed
+from dfode_kit.dfode_core.train.loss import PhysicsLoss, make_loss_step, measure_step_speedup
+from dfode_kit.dfode_core.train.telemetry import TrainingTelemetry, NullTimer, make_profiler
 DFODE_ROOT = os.environ['DFODE_ROOT']
 def train(
     mech_path: str,
     source_file: str,
     output_path: str,
     time_step: float = 1e-6,
+    batch_size: int = 4096,
+    epochs: int = 100,
+    num_workers: int = 0,
+    shuffle: bool = True,
+    h5_dataset: str = 'labeled_data',
+    seed: int = 0,
+    distributed: bool = None,
+    compile: bool = True,
+    in_memory: bool = False,
+    hidden_layers: tuple = (400, 400, 400, 400),
+    lr: float = 1e-3,
+    mass_weight: float = 1.0,
+    enthalpy_weight: float = 1e-13,
+    architecture: str = 'mlp',
+    activation: str = 'gelu',
+    init_from: str = None,
+    telemetry: bool = True,
+    profile_steps: tuple = None,
+    dtype: str = 'float64',
 ) -> np.ndarray:
     
     """
@@ -19,93 +46,278 @@ def train(
 
     Trains a neural network model to predict changes in thermochemical states based on input data.
 
-    This function loads labeled data from a specified source file, initializes a chemical reaction model,
+    This function reads labeled data from a specified source file, initializes a chemical reaction model,
     and constructs a multi-layer perceptron (MLP) for training. The model learns to predict the changes 
     in species concentrations over time based on the input features. The training process includes 
     normalization of input and output data, computation of multiple loss functions, and optimization of 
     the model parameters.
 
+    Unless `in_memory` is set, the labeled data is never loaded as a whole:
+    normalisation statistics are computed in one streaming pass, and each epoch visits the rows in
+    shuffled mini-batches read from a memory-mapped `.npy` file or an HDF5
+    dataset (see `LabeledDataset`). The loss is evaluated by `PhysicsLoss`
+    from invariant per-sample tensors prepared by the data loader.
+
+    Launched with `torchrun`, the function trains data-parallel on CPU with
+    the gloo backend: every rank reads its own shard of the batches, the
+    gradients are averaged by `DistributedDataParallel`, and the
+    normalisation statistics are reduced over all ranks so the checkpoint
+    written by rank 0 matches a single-process run. For example
+
+        torchrun --nproc_per_node 4 --no-python dfode-kit train ...
+
+    `batch_size` is then the batch of each rank.
+
     Parameters
     ----------
     mech_path : str
         Path to the mechanism file for the chemical model.
     source_file : str
-        Path to the input data file containing labeled data.
+        Path to the input data file containing labeled data, either a `.npy`
+        file or an HDF5 file.
     output_path : str
-        Path to save the trained model and normalization parameters.
+        Path to save the trained model, normalization parameters and the
+        training-data envelope used for hybrid NN/CVODE inference.
     time_step : float, optional
         Time step for the simulation, default is 1e-06 second.
+    batch_size : int, optional
+        Number of samples per optimizer step. Default is 4096.
+    epochs : int, optional
+        Number of passes over the data. Default is 100.
+    num_workers : int, optional
+        Number of `DataLoader` worker processes reading batches. Default is 0.
+    shuffle : bool, optional
+        Draw the batches in random order. Default is True.
+    h5_dataset : str, optional
+        Name of the dataset holding the labeled rows in an HDF5 source file.
+        Default is 'labeled_data'.
+    seed : int, optional
+        Seed for the weight initialisation and the shuffling. Default is 0.
+    distributed : bool, optional
+        Train data-parallel over the `torchrun` process group. If None, this
+        is enabled when the environment describes more than one process.
+    compile : bool, optional
+        Compile the forward, loss and backward pass with `torch.compile`,
+        falling back to eager execution where that fails. The speed-up over
+        the eager step is measured and printed on the first batch. Default is
+        True.
+    in_memory : bool, optional
+        Compute the network inputs, targets and physics-loss invariants of
+        all rows once and keep them in memory instead of reading every batch
+        from disk. Default is False.
+    hidden_layers : sequence of int, optional
+        Widths of the hidden layers. Default is four layers of 400.
+    lr : float, optional
+        Adam learning rate. Default is 1e-3.
+    mass_weight, enthalpy_weight : float, optional
+        Weights of the mass-sum and formation-enthalpy loss terms, see
+        `PhysicsLoss`. Defaults are 1 and 1e-13.
+    architecture : {'mlp', 'residual', 'ensemble'}, optional
+        Network type, see `build_model`: a plain `MLP`, a `ResidualMLP` with
+        skip connections between equal-width hidden layers, or a
+        `SpeciesEnsemble` of one small network per output species evaluated
+        as batched matrix products. The choice is stored in the checkpoint.
+        Default is 'mlp'.
+    activation : {'gelu', 'silu', 'relu', 'elu', 'tanh'}, optional
+        Hidden-layer activation. Default is 'gelu'.
+    init_from : str, optional
+        Checkpoint of the same architecture whose weights initialise the
+        network, to continue training on new or extended data. Its
+        preprocessing pipelines (Box-Cox lambdas and normalisation
+        statistics) are reused instead of refitting them on `source_file`,
+        so the inherited weights see the inputs and targets they were
+        trained on.
+    telemetry : bool, optional
+        Write one JSON line per epoch to ``<output_path stem>.telemetry.jsonl``
+        with the wall time of each phase (data, transfer, forward, loss,
+        backward, optimizer), samples per second, peak memory and every loss
+        term, see `TrainingTelemetry`. Default is True.
+    profile_steps : tuple of int, optional
+        ``(start, stop)`` optimizer steps, counted over all epochs, to record
+        with `torch.profiler`; the Chrome trace is written to
+        ``<output_path stem>.trace.json``. Requires ``0 <= start < stop``.
+    dtype : {'float64', 'float32'}, optional
+        Dtype in which the labeled rows are read and preprocessed, see
+        `LabeledDataset`. The network always trains in float32. Default is
+        'float64'.
 
     Returns
     -------
     np.ndarray
         Returns the trained model's output as a numpy array (if applicable).
     """
+    if profile_steps is not None:
+        profile_start, profile_stop = profile_steps
+        if not 0 <= profile_start < profile_stop:
+            raise ValueError(
+                f"profile_steps must satisfy 0 <= start < stop, got start={profile_start}, stop={profile_stop}."
+            )
 
-    labeled_data = np.load(source_file)
-
-    gas = ct.Solution(mech_path)
-    n_species = gas.n_species
+    n_species = get_mechanism(mech_path).n_species
     formation_enthalpies = formation_calculate(mech_path)
 
-    device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+    rank, world_size = 0, 1
+    if distributed is None or distributed:
+        rank, world_size = init_distributed()
+    if distributed and world_size == 1:
+        raise RuntimeError("Distributed training requested, but no torchrun environment was found.")
+    is_main = rank == 0
+
+    if world_size > 1:
+        device = torch.device("cpu")
+    else:
+        device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+    torch.manual_seed(seed)
 
     # Model instantiation
-    demo_model = MLP([2+n_species, 400, 400, 400, 400, n_species-1]).to(device)
+    model_architecture = {
+        'type': architecture,
+        'layers': [2 + n_species] + list(hidden_layers) + [n_species - 1],
+        'activation': activation,
+    }
+    demo_model = build_model(model_architecture)
+    init_pipelines = None
+    if init_from is not None:
+        init_checkpoint = load_checkpoint(init_from)
+        demo_model.load_state_dict(init_checkpoint['net'])
+        # Keep the normalisation the inherited weights were trained with
+        init_pipelines = checkpoint_pipelines(init_checkpoint)
+    demo_model = demo_model.to(device)
+    model = demo_model
+    if world_size > 1:
+        model = torch.nn.parallel.DistributedDataParallel(demo_model)
 
     # Data loading
-    thermochem_states1 = labeled_data[:, 0:2+n_species]
-    thermochem_states2 = labeled_data[:, 2+n_species:]
-
-    print(thermochem_states1.shape, thermochem_states2.shape)
-    thermochem_states1[:, 2:] = np.clip(thermochem_states1[:, 2:], 0, 1)
-    thermochem_states2[:, 2:] = np.clip(thermochem_states2[:, 2:], 0, 1)
+    dataset = LabeledDataset(source_file, n_species, h5_dataset, formation_enthalpies, dtype)
+    if is_main:
+        print(f"Training on {len(dataset)} labeled states with {world_size} process(es)")
+    stats = dataset.compute_statistics(rank=rank, world_size=world_size, pipelines=init_pipelines)
+    if in_memory:
+        dataset.cache()
+    loader = make_loader(
+        dataset, batch_size, shuffle, num_workers,
+        pin_memory=device.type == 'cuda', seed=seed, rank=rank, world_size=world_size,
+    )
 
-    features = torch.tensor(BCT(thermochem_states1), dtype=torch.float32).to(device)
-    labels = torch.tensor(BCT(thermochem_states2[:, 2:-1]) - BCT(thermochem_states1[:, 2:-1]), dtype=torch.float32).to(device)
+    # Training
+    loss_module = PhysicsLoss(
+        formation_enthalpies, stats['targets_std'], time_step, mass_weight, enthalpy_weight,
+    ).to(device)
+    optimizer = torch.optim.Adam(demo_model.parameters(), lr=lr)
+    recorder = None
+    if is_main and telemetry:
+        recorder = TrainingTelemetry(Path(output_path).with_suffix('.telemetry.jsonl'), device)
+    timer = recorder.timer if recorder is not None else NullTimer()
+    loss_step = make_loss_step(model, loss_module, compile, timer)
+    profiler = contextlib.nullcontext()
+    if is_main and profile_steps is not None:
+        profiler = make_profiler(Path(output_path).with_suffix('.trace.json'), *profile_steps)
 
-    features_mean = torch.mean(features, dim=0)
-    features_std = torch.std(features, dim=0)
-    features = (features - features_mean) / features_std
+    # Measuring runs extra backward passes, which would stall the other ranks
+    measure_speedup = loss_step.compiled and world_size == 1
+    model.train()  
+    with profiler:
+        for epoch in range(epochs):
+            if world_size > 1:
+                loader.sampler.sampler.set_epoch(epoch)
+            epoch_start = time.perf_counter()
+            totals = torch.zeros(5, dtype=torch.float64, device=device)
+            n_steps = 0
+            batches = iter(loader)
+            while True:
+                with timer.phase('data'):
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                with timer.phase('transfer'):
+                    batch = [tensor.to(device, non_blocking=True) for tensor in batch]
 
-    labels_mean = torch.mean(labels, dim=0)
-    labels_std = torch.std(labels, dim=0)
-    labels = (labels - labels_mean) / labels_std
+                optimizer.zero_grad()
+                terms = loss_step(*batch)
+                with timer.phase('optimizer'):
+                    optimizer.step()
+                if profile_steps is not None and is_main:
+                    profiler.step()
+                n_steps += 1
 
-    formation_enthalpies = torch.tensor(formation_enthalpies, dtype=torch.float32).to(device)
+                totals[:4] += batch[0].shape[0] * terms
+                totals[4] += batch[0].shape[0]
 
-    # Training
-    loss_fn = torch.nn.L1Loss()
-    optimizer = torch.optim.Adam(demo_model.parameters(), lr=1e-3)
-
-    demo_model.train()  
-    for epoch in range(100):
-        optimizer.zero_grad()
-        preds = demo_model(features)
-        loss1 = loss_fn(preds, labels)   ## LOSS  
-
-        Y_in = ((features[:,2:-1]*features_std[2:-1] + features_mean[2:-1])*0.1 + 1)**10
-        Y_out = (((preds*labels_std + labels_mean) + (features[:,2:-1]*features_std[2:-1] + features_mean[2:-1]))*0.1 + 1)**10
-        Y_target = (((labels*labels_std + labels_mean) + (features[:,2:-1]*features_std[2:-1] + features_mean[2:-1]))*0.1 + 1)**10
-        loss2 = loss_fn(Y_out.sum(axis=1), Y_in.sum(axis=1))
-
-        Y_out_total = torch.cat((Y_out, (1-Y_out.sum(axis=1)).reshape(Y_out.shape[0],1)), axis = 1)
-        Y_target_total = torch.cat((Y_target, (1-Y_target.sum(axis=1)).reshape(Y_target.shape[0],1)), axis = 1)
-        loss3 = loss_fn((formation_enthalpies*Y_out_total).sum(axis=1), (formation_enthalpies*Y_target_total).sum(axis=1))/time_step
-
-        loss = loss1 + loss2 + loss3/1e+13
-        loss.backward()
-        optimizer.step()
+                if measure_speedup and loss_step.compiled:
+                    measure_speedup = False
+                    with timer.suspended():
+                        compiled_time, eager_time = measure_step_speedup(loss_step, model, batch)
+                    print(
+                        f"Compiled step {compiled_time * 1e3:.2f} ms, eager step {eager_time * 1e3:.2f} ms, "
+                        f"speed-up {eager_time / compiled_time:.2f}x"
+                    )
         
-        print("Epoch: {}, Loss1: {:4e}, Loss2: {:4e}, Loss3: {:4e}, Loss: {:4e}".format(epoch+1, loss1.item(), loss2.item(), loss3.item(), loss.item()))
-
-    torch.save(
-        {
-            'net': demo_model.state_dict(),
-            'data_in_mean': features_mean.cpu().numpy(),
-            'data_in_std': features_std.cpu().numpy(),
-            'data_target_mean': labels_mean.cpu().numpy(),
-            'data_target_std': labels_std.cpu().numpy(),
-        },
-        output_path
+            totals = all_reduce_sum(totals.cpu().numpy())
+            loss1, loss2, loss3, loss = totals[:4] / totals[4]
+            epoch_time = time.perf_counter() - epoch_start
+            if is_main:
+                print("Epoch: {}, Loss1: {:4e}, Loss2: {:4e}, Loss3: {:4e}, Loss: {:4e}, Time: {:.2f} s".format(
+                    epoch+1, loss1, loss2, loss3, loss, epoch_time))
+            if recorder is not None:
+                recorder.log_epoch(
+                    epoch + 1, totals[4], n_steps, epoch_time,
+                    {'loss1': loss1, 'loss2': loss2, 'loss3': loss3, 'loss': loss},
+                )
+
+    if recorder is not None:
+        recorder.close()
+
+    if not is_main:
+        cleanup_distributed()
+        return
+
+    pipelines = (dataset.feature_pipeline, dataset.target_pipeline)
+    envelope = training_envelope(dataset, stats, seed)
+    torch.save(make_checkpoint(demo_model, stats, envelope, model_architecture, pipelines), output_path)
+    cleanup_distributed()
+
+def training_envelope(dataset, stats, seed=0, max_rows=200000, indices=None):
+    """
+    Fit the `build_envelope` of a dataset on a row sample, with the bounds of the full data.
+
+    With `indices`, the sample is drawn from those rows only.
+    """
+    rng = np.random.default_rng(seed)
+    if indices is None:
+        indices = np.arange(len(dataset))
+    sample = rng.choice(indices, size=min(len(indices), max_rows), replace=False)
+    sample_features, _ = dataset.normalize(*dataset.transform(dataset.rows(sample)))
+    bounds = (
+        (stats['features_lower'] - stats['features_mean']) / stats['features_std'],
+        (stats['features_upper'] - stats['features_mean']) / stats['features_std'],
     )
+    return build_envelope(sample_features, bounds=bounds)
+
+def make_checkpoint(model, stats, envelope, architecture=None, pipelines=None):
+    """
+    Assemble the checkpoint dictionary read by `load_model`, `predict_Y` and the inference engine.
+
+    `pipelines` are the ``(features, targets)`` pipelines to store; by
+    default they are rebuilt from the statistics with lambda 0.1.
+    """
+    n_species = len(stats['features_mean']) - 2
+    if pipelines is None:
+        pipelines = (
+            feature_pipeline(n_species, stats['features_mean'], stats['features_std']),
+            target_pipeline(n_species - 1, stats['targets_mean'], stats['targets_std']),
+        )
+    checkpoint = {
+        'net': model.state_dict(),
+        'data_in_mean': stats['features_mean'].astype(np.float32),
+        'data_in_std': stats['features_std'].astype(np.float32),
+        'data_target_mean': stats['targets_mean'].astype(np.float32),
+        'data_target_std': stats['targets_std'].astype(np.float32),
+        'envelope': envelope,
+        'preprocess': {
+            'features': pipelines[0].state_dict(),
+            'targets': pipelines[1].state_dict(),
+        },
+    }
+    if architecture is not None:
+        checkpoint['architecture'] = dict(architecture, layers=list(architecture['layers']))
+    return checkpoint
@@ -0,0 +1,149 @@
+import hashlib
+from pathlib import Path
+from functools import lru_cache, cached_property
+
+import numpy as np
+import cantera as ct
+
+class Mechanism:
+    """
+    A chemical mechanism parsed once, together with cached derived arrays.
+
+    Instances are obtained through `get_mechanism`, which keeps one object per
+    mechanism file for the lifetime of the process. The shared `gas` object may
+    be used by any caller that sets the thermochemical state before reading it;
+    callers that need to hold a state of their own should ask for a private
+    copy with `new_solution`, which is built from the already parsed species
+    and reactions instead of re-reading the YAML file.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the YAML mechanism file.
+    """
+    def __init__(self, path):
+        self.path = Path(path).resolve()
+        self.gas = ct.Solution(str(self.path))
+
+        self._species = self.gas.species()
+        self._reactions = self.gas.reactions()
+
+    def __repr__(self):
+        return f"Mechanism('{self.path}', n_species={self.n_species})"
+
+    def new_solution(self, transport_model=None):
+        """Return a new `ct.Solution` built from the cached species and reactions."""
+        gas = ct.Solution(
+            thermo=self.gas.thermo_model,
+            kinetics=self.gas.kinetics_model,
+            species=self._species,
+            reactions=self._reactions,
+        )
+        gas.transport_model = transport_model or self.gas.transport_model
+        return gas
+
+    @property
+    def n_species(self):
+        return self.gas.n_species
+
+    @property
+    def n_elements(self):
+        return self.gas.n_elements
+
+    @cached_property
+    def species_names(self):
+        return list(self.gas.species_names)
+
+    @cached_property
+    def element_names(self):
+        return list(self.gas.element_names)
+
+    @cached_property
+    def molecular_weights(self):
+        """Species molecular weights [kg/kmol], shape (n_species,)."""
+        return self.gas.molecular_weights.copy()
+
+    @cached_property
+    def element_matrix(self):
+        """Number of atoms of each element in each species, shape (n_species, n_elements)."""
+        return np.array([
+            [self.gas.n_atoms(k, m) for m in range(self.n_elements)]
+            for k in range(self.n_species)
+        ], dtype=np.float64)
+
+    @cached_property
+    def element_mass_matrix(self):
+        """
+        Mass fraction of each element in each species, shape (n_species, n_elements).
+
+        ``Y @ element_mass_matrix`` gives the element mass fractions of a mixture.
+        """
+        atomic_weights = self.gas.atomic_weights
+        return self.element_matrix * atomic_weights[None, :] / self.molecular_weights[:, None]
+
+    @cached_property
+    def formation_enthalpies(self):
+        """Species enthalpies of formation at 298.15 K [J/kg], shape (n_species,)."""
+        gas = self.new_solution()
+        gas.TPY = 298.15, ct.one_atm, 'O2:1'
+        return gas.partial_molar_enthalpies / gas.molecular_weights
+
+    @cached_property
+    def nasa_coefficients(self):
+        """
+        NASA 7-coefficient polynomials, shape (n_species, 15).
+
+        Each row holds ``[T_mid, high-T coeffs (7), low-T coeffs (7)]`` as
+        returned by Cantera for `NasaPoly2` species thermo.
+
+        Raises
+        ------
+        ValueError
+            If a species does not use a NASA 7-coefficient parameterisation.
+        """
+        coeffs = []
+        for species in self._species:
+            if not isinstance(species.thermo, ct.NasaPoly2):
+                raise ValueError(f"Species {species.name} does not use NASA7 polynomials.")
+            coeffs.append(species.thermo.coeffs)
+        return np.array(coeffs)
+
+    @cached_property
+    def file_hash(self):
+        """SHA-256 digest of the mechanism file contents."""
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+@lru_cache(maxsize=None)
+def _load_mechanism(path, mtime):
+    return Mechanism(path)
+
+def get_mechanism(path):
+    """
+    Return the process-wide `Mechanism` for a mechanism file.
+
+    The YAML file is parsed only on the first call for a given path; later
+    calls return the same object. Editing the file on disk invalidates the
+    cached entry.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the YAML mechanism file.
+
+    Returns
+    -------
+    Mechanism
+        The cached mechanism.
+
+    Examples
+    --------
+    >>> mech = get_mechanism('mechanisms/Burke2012_s9r23.yaml')
+    >>> mech.n_species
+    9
+    """
+    path = Path(path).resolve()
+    return _load_mechanism(str(path), path.stat().st_mtime_ns)
+
+def clear_mechanism_cache():
+    """Drop all cached mechanisms."""
+    _load_mechanism.cache_clear()
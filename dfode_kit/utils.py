@@ -1,3 +1,5 @@
+import re
+
 import torch
 import numpy as np
 
@@ -45,6 +47,92 @@ def read_openfoam_scalar(file_path):
 
     return dim_array
 
+def _parse_openfoam_token(token):
+    if token.startswith('"') and token.endswith('"'):
+        return token[1:-1]
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+def read_openfoam_dict(file_path):
+    """
+    Read an OpenFOAM dictionary file (e.g. `constant/CanteraTorchProperties`).
+
+    Sub-dictionaries become nested dicts. Entries with a single value are
+    converted to int or float where possible and quoted strings are unquoted;
+    entries with several values are returned as lists. The `FoamFile` header
+    is skipped.
+    """
+    with open(file_path, 'r') as file:
+        text = file.read()
+
+    text = re.sub(r'/\*.*?\*/', ' ', text, flags=re.DOTALL)
+    text = re.sub(r'//[^\n]*', ' ', text)
+    tokens = re.findall(r'"[^"]*"|[{};]|[^\s{};]+', text)
+
+    root = {}
+    stack = [root]
+    entry = []
+    for token in tokens:
+        if token == '{':
+            sub_dict = {}
+            stack[-1][_parse_openfoam_token(entry[0])] = sub_dict
+            stack.append(sub_dict)
+            entry = []
+        elif token == '}':
+            stack.pop()
+            entry = []
+        elif token == ';':
+            if entry:
+                values = [_parse_openfoam_token(t) for t in entry[1:]]
+                stack[-1][_parse_openfoam_token(entry[0])] = values[0] if len(values) == 1 else values
+            entry = []
+        else:
+            entry.append(token)
+
+    root.pop('FoamFile', None)
+    return root
+
+def openfoam_switch(value):
+    """Convert an OpenFOAM switch word (on/off, yes/no, true/false, ...) to bool."""
+    value = str(value)
+    if value in ("true", "True", "on", "yes", "y", "t", "any"):
+        return True
+    if value in ("false", "False", "off", "no", "n", "f", "none"):
+        return False
+    raise ValueError(f"Invalid OpenFOAM switch value: {value}")
+
+STORAGE_DTYPES = ('float64', 'float32')
+
+def storage_dtype(name):
+    """
+    NumPy dtype for stored and in-memory state arrays.
+
+    'float32' halves disk, memory and I/O of sampled, augmented and labeled
+    data. Chemistry integration always runs in float64; only the results are
+    rounded to the storage dtype.
+    """
+    if name is None:
+        return np.dtype(np.float64)
+    if str(np.dtype(name)) not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported dtype '{name}', expected one of {STORAGE_DTYPES}.")
+    return np.dtype(name)
+
+def load_checkpoint(model_path, map_location='cpu'):
+    """
+    Load a checkpoint written by `dfode_kit.dfode_core.train.train.train`.
+
+    The normalisation statistics are stored as NumPy arrays, which newer
+    PyTorch releases refuse to unpickle by default, so the full pickle
+    loader is requested explicitly.
+    """
+    return torch.load(model_path, map_location=map_location, weights_only=False)
+
 def BCT(x, lam=0.1):
     """
     Box-Cox Transformation (BCT)
@@ -132,5 +220,3 @@ def inverse_BCT_torch(y, lam=0.1):
             raise ValueError('FATAL ERROR: Invalid input for inverse_BCT_torch.')
         else:
             return torch.pow(lam * y + 1, 1 / lam)
-        
-        
\ No newline at end of file